@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Check that an incremental update gives the same neighbors as a full recompute.
+
+On synthetic ratings (below the MR1 co-rater caps, so no sampling is involved):
+
+    1. MR1 -> MR3 on train with statistics (local_runner.py --keep-stats)
+    2. incremental_update.py with a delta of new ratings
+    3. MR1 -> MR3 on train + delta
+    4. compare the two neighbor files per ID
+
+Similarities are compared with a small tolerance (the sums are added in another
+order), and neighbors tied on similarity at the Top-K cut-off may differ.
+
+    python check_incremental.py            # both modes
+    python check_incremental.py item --users 500
+"""
+import argparse
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+INCREMENTAL_DIR = os.path.dirname(os.path.abspath(__file__))
+HADOOP_DIR = os.path.dirname(INCREMENTAL_DIR)
+sys.path.insert(0, HADOOP_DIR)
+
+from local_runner import getmerge, run_pipeline  # noqa: E402
+
+REL_TOL = 1e-9
+
+
+def write_ratings(path, rows):
+    with open(path, "w") as f:
+        for user, movie, rating in rows:
+            f.write(f"{user},{movie},{rating}\n")
+
+
+def make_data(n_users, n_movies, per_user, n_delta, seed):
+    """(train rows, delta rows); the delta only holds new (user, movie) pairs."""
+    rng = random.Random(seed)
+    rated = {u: rng.sample(range(1, n_movies + 1), per_user) for u in range(1, n_users + 1)}
+    rating = lambda: rng.choice([1, 2, 2.5, 3, 3.5, 4, 4.5, 5])  # noqa: E731
+    train = [(u, m, rating()) for u, movies in rated.items() for m in movies]
+
+    delta = set()
+    while len(delta) < n_delta:
+        u = rng.randint(1, n_users)
+        m = rng.randint(1, n_movies)
+        if m not in rated[u] and (u, m) not in {(d[0], d[1]) for d in delta}:
+            delta.add((u, m, rating()))
+    return train, sorted(delta)
+
+
+def read_neighbors(path):
+    out = {}
+    with open(path) as f:
+        for line in f:
+            id_val, _, rest = line.rstrip("\n").partition("\t")
+            out[id_val] = [(nid, float(sim)) for nid, sim in (p.split(":") for p in rest.split(",") if p)]
+    return out
+
+
+def same_list(a, b):
+    """Same similarities in order; same IDs except among ties at the last similarity."""
+    if len(a) != len(b):
+        return False
+    if not all(math.isclose(x[1], y[1], rel_tol=REL_TOL, abs_tol=REL_TOL) for x, y in zip(a, b)):
+        return False
+    if not a:
+        return True
+    cut = a[-1][1]
+    above = lambda lst: {nid for nid, sim in lst if not math.isclose(sim, cut, rel_tol=REL_TOL, abs_tol=REL_TOL)}  # noqa: E731
+    return above(a) == above(b)
+
+
+def check(mode, args, workdir):
+    train, delta = make_data(args.users, args.movies, args.per_user, args.delta, args.seed)
+    train_path = os.path.join(workdir, f"{mode}_train.csv")
+    delta_path = os.path.join(workdir, f"{mode}_delta.csv")
+    full_path = os.path.join(workdir, f"{mode}_full.csv")
+    write_ratings(train_path, train)
+    write_ratings(delta_path, delta)
+    write_ratings(full_path, train + delta)
+
+    old_dir, _ = run_pipeline(mode, train_path, os.path.join(workdir, f"{mode}_old"), 2, 2, keep_stats=True)
+    old_neighbors = os.path.join(workdir, f"{mode}_old.txt")
+    getmerge(old_dir, old_neighbors)
+
+    inc_neighbors = os.path.join(workdir, f"{mode}_incremental.txt")
+    subprocess.check_call([
+        sys.executable, os.path.join(INCREMENTAL_DIR, "incremental_update.py"), mode,
+        "--train", train_path, "--delta", delta_path,
+        "--stats", os.path.join(workdir, f"{mode}_old", f"{mode}_mr2"), "--neighbors", old_neighbors,
+        "--out-stats", os.path.join(workdir, f"{mode}_stats_new.txt"), "--out-neighbors", inc_neighbors,
+    ])
+
+    full_dir, _ = run_pipeline(mode, full_path, os.path.join(workdir, f"{mode}_full"), 2, 2)
+    full_neighbors = os.path.join(workdir, f"{mode}_full.txt")
+    getmerge(full_dir, full_neighbors)
+
+    inc, full = read_neighbors(inc_neighbors), read_neighbors(full_neighbors)
+    bad = sorted(i for i in set(inc) | set(full) if not same_list(inc.get(i, []), full.get(i, [])))
+    print(f"[{mode}] {len(full)} ids, {len(bad)} differ from the full recompute" + (f": {bad[:10]}" if bad else ""))
+    return not bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description="incremental update vs. full recompute")
+    parser.add_argument("modes", nargs="*", help="user and/or item (default: both)")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--per-user", type=int, default=30, help="train ratings per user")
+    parser.add_argument("--delta", type=int, default=200, help="new ratings")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    modes = args.modes or ["user", "item"]
+    if set(modes) - {"user", "item"}:
+        parser.error(f"modes must be user / item, got {modes}")
+
+    with tempfile.TemporaryDirectory(prefix="check-incremental-") as workdir:
+        ok = [check(mode, args, workdir) for mode in modes]
+    sys.exit(0 if all(ok) else 1)
+
+
+if __name__ == "__main__":
+    main()
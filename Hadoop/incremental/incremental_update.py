@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Incremental neighbor update from a batch of new ratings.
+
+Instead of re-running MR1 -> MR3 over the whole ratings_train.csv, reuse the
+per-pair sufficient statistics kept by MR2 ("reducer2.py stats"):
+
+    ID1,ID2 \t Similarity \t Count \t sum_xy \t sum_x2 \t sum_y2
+
+1. read the delta file (userId,movieId,rating) of new ratings
+2. scan ratings_train.csv once, only keeping the co-raters of the delta
+   (movies of the delta for user-based, users of the delta for item-based)
+3. build the pair deltas exactly like reducer1 + reducer2 would
+4. stream the stored statistics, add the deltas, write the merged statistics
+5. redo the Top-K (reducer3.select_top_k) only for IDs touched by a changed pair
+   and patch those lines into the old neighbor file
+
+Usage:
+    python incremental_update.py user --train ratings_train.csv --delta new_ratings.csv \
+        --stats user_mr2_stats/ --neighbors user_topk_neighbors.txt \
+        --out-stats user_mr2_stats_new.txt --out-neighbors user_topk_neighbors_new.txt \
+        --append-train
+
+Limitations:
+- the delta must contain new (user, movie) ratings; re-ratings of a movie the
+  user already rated in the train file are skipped (the old rating cannot be
+  subtracted because MR1 samples co-raters)
+- MR1 caps co-raters (MAX_USERS_PER_MOVIE / MAX_MOVIES_PER_USER) by random
+  sampling; the same caps are applied here to the existing co-raters
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from itertools import combinations
+
+HADOOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(HADOOP_DIR, "step3"))
+
+from reducer3 import select_top_k  # noqa: E402
+
+# Same caps as step1_userbased/reducer1.py and step1_itembased/reducer1.py
+MAX_USERS_PER_MOVIE = 200
+MAX_MOVIES_PER_USER = 500
+
+
+def read_rating_lines(path):
+    """(userId, movieId, rating_str) from a header-less or headed ratings CSV."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or not line[0].isdigit():
+                continue
+            parts = line.split(",")
+            if len(parts) < 3:
+                continue
+            yield parts[0], parts[1], parts[2]
+
+
+def list_input_files(path):
+    """A single file, or every part file of a step output directory."""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, f)
+            for f in os.listdir(path)
+            if not f.startswith(("_", "."))
+        )
+    return [path]
+
+
+def load_delta(path, mode):
+    """
+    Group new ratings the way MR1 groups them.
+    user mode: {movieId: {userId: rating}}  (pairs of users who rated the movie)
+    item mode: {userId: {movieId: rating}}  (pairs of movies rated by the user)
+    """
+    delta = defaultdict(dict)
+    rows = 0
+    for user, movie, rating in read_rating_lines(path):
+        if mode == "user":
+            delta[movie][user] = rating
+        else:
+            delta[user][movie] = rating
+        rows += 1
+    return delta, rows
+
+
+def load_existing(path, delta, mode):
+    """Existing ratings of the delta's groups only (one scan of the train file)."""
+    existing = defaultdict(dict)
+    for user, movie, rating in read_rating_lines(path):
+        if mode == "user":
+            if movie in delta:
+                existing[movie][user] = rating
+        else:
+            if user in delta:
+                existing[user][movie] = rating
+    return existing
+
+
+def canonical(id1, id2, x, y):
+    """Order a pair like item-based reducer1 (string order), swapping its ratings along."""
+    if id2 < id1:
+        return f"{id2},{id1}", y, x
+    return f"{id1},{id2}", x, y
+
+
+def build_pair_deltas(delta, existing, mode):
+    """
+    {pair: [sum_xy, sum_x2, sum_y2, count]} contributed by the new ratings.
+    New x existing and new x new co-ratings; existing x existing is unchanged.
+    """
+    cap = MAX_USERS_PER_MOVIE if mode == "user" else MAX_MOVIES_PER_USER
+    deltas = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    skipped = 0
+
+    for group, new_map in delta.items():
+        old_map = existing.get(group, {})
+
+        new_items = []
+        for id_val, r in new_map.items():
+            if id_val in old_map:
+                skipped += 1  # re-rating, see module docstring
+                continue
+            new_items.append((id_val, float(r)))
+        if not new_items:
+            continue
+
+        old_items = [(id_val, float(r)) for id_val, r in old_map.items()]
+        if len(old_items) + len(new_items) > cap:
+            old_items = random.sample(old_items, max(0, cap - len(new_items)))
+
+        pairs = [(a, b) for a in new_items for b in old_items]
+        pairs.extend(combinations(new_items, 2))
+
+        for (id1, r1), (id2, r2) in pairs:
+            if id1 == id2:
+                continue
+            key, x, y = canonical(id1, id2, r1, r2)
+            acc = deltas[key]
+            acc[0] += x * y
+            acc[1] += x * x
+            acc[2] += y * y
+            acc[3] += 1
+
+    return deltas, skipped
+
+
+def cosine(sum_xy, sum_x2, sum_y2):
+    denom = math.sqrt(sum_x2) * math.sqrt(sum_y2)
+    return sum_xy / denom if denom != 0 else 0
+
+
+def merge_stats(stats_path, deltas, out_path):
+    """
+    Stream stored pair statistics, add the deltas and write the merged file.
+    Returns the touched IDs and their candidate neighbors [(id, sim, count), ...].
+
+    Pairs of touched IDs are folded by canonical key first: statistics written by an
+    older user-based reducer1 can hold both "a,b" and "b,a" for the same pair.
+    """
+    touched = set()
+    for key in deltas:
+        id1, id2 = key.split(",")
+        touched.add(id1)
+        touched.add(id2)
+
+    merged = defaultdict(lambda: [0.0, 0.0, 0.0, 0])  # touched pairs: [sum_xy, sum_x2, sum_y2, count]
+    n_pairs = 0
+
+    with open(out_path, "w") as out:
+        for path in list_input_files(stats_path):
+            with open(path, "r") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) < 3:
+                        continue
+                    if len(parts) < 6:
+                        raise ValueError(
+                            f"{path}: no pair statistics, re-run MR2 with 'reducer2.py stats'"
+                        )
+                    try:
+                        id1, id2 = parts[0].split(",")
+                        count = int(parts[2])
+                        sxy, sx2, sy2 = float(parts[3]), float(parts[4]), float(parts[5])
+                    except ValueError:
+                        continue
+                    n_pairs += 1
+
+                    if id1 not in touched and id2 not in touched:
+                        out.write(line if line.endswith("\n") else line + "\n")
+                        continue
+
+                    key, sx2, sy2 = canonical(id1, id2, sx2, sy2)
+                    acc = merged[key]
+                    acc[0] += sxy
+                    acc[1] += sx2
+                    acc[2] += sy2
+                    acc[3] += count
+
+        n_new = sum(1 for key in deltas if key not in merged)  # pairs that never co-rated before
+        for key, d in deltas.items():
+            acc = merged[key]
+            for i in range(4):
+                acc[i] += d[i]
+
+        candidates = defaultdict(list)
+        for key, (sxy, sx2, sy2, count) in merged.items():
+            id1, id2 = key.split(",")
+            sim = cosine(sxy, sx2, sy2)
+            out.write(f"{key}\t{sim}\t{count}\t{sxy}\t{sx2}\t{sy2}\n")
+            if id1 in touched:
+                candidates[id1].append((id2, sim, count))
+            if id2 in touched:
+                candidates[id2].append((id1, sim, count))
+
+    return touched, candidates, n_pairs, n_new
+
+
+def patch_neighbors(old_path, touched, candidates, out_path):
+    """Copy the old Top-K file, recomputing the lines of touched IDs."""
+    def line_for(id_val):
+        top = select_top_k(candidates.get(id_val, []))
+        return f"{id_val}\t" + ",".join(f"{nid}:{sim}" for nid, sim in top) + "\n"
+
+    written = set()
+    with open(out_path, "w") as out:
+        if old_path and os.path.exists(old_path):
+            with open(old_path, "r") as f:
+                for line in f:
+                    id_val = line.split("\t", 1)[0].strip()
+                    if id_val in touched:
+                        out.write(line_for(id_val))
+                        written.add(id_val)
+                    else:
+                        out.write(line if line.endswith("\n") else line + "\n")
+        for id_val in sorted(touched - written):
+            out.write(line_for(id_val))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental Top-K neighbor update")
+    parser.add_argument("mode", choices=["user", "item"])
+    parser.add_argument("--train", required=True, help="ratings the stats were built from")
+    parser.add_argument("--delta", required=True, help="new ratings, userId,movieId,rating")
+    parser.add_argument("--stats", required=True, help="MR2 output with statistics (file or directory)")
+    parser.add_argument("--neighbors", required=True, help="current Top-K neighbor file")
+    parser.add_argument("--out-stats", required=True)
+    parser.add_argument("--out-neighbors", required=True)
+    parser.add_argument("--append-train", action="store_true",
+                        help="append the delta to --train for the next increment")
+    args = parser.parse_args()
+
+    t0 = time.time()
+    delta, n_rows = load_delta(args.delta, args.mode)
+    existing = load_existing(args.train, delta, args.mode)
+    deltas, skipped = build_pair_deltas(delta, existing, args.mode)
+    t1 = time.time()
+    print(f"delta: {n_rows} ratings -> {len(deltas)} pair deltas ({skipped} re-ratings skipped) in {t1 - t0:.2f}s")
+
+    touched, candidates, n_pairs, n_new = merge_stats(args.stats, deltas, args.out_stats)
+    t2 = time.time()
+    print(f"stats merged: {n_pairs} stored pairs, {n_new} new pairs in {t2 - t1:.2f}s")
+
+    patch_neighbors(args.neighbors, touched, candidates, args.out_neighbors)
+    t3 = time.time()
+    print(f"top-k recomputed for {len(touched)} ids in {t3 - t2:.2f}s")
+
+    if args.append_train:
+        with open(args.train, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            needs_newline = False
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        with open(args.train, "a") as out:
+            if needs_newline:
+                out.write("\n")
+            for user, movie, rating in read_rating_lines(args.delta):
+                out.write(f"{user},{movie},{rating}\n")
+        print(f"appended delta to {args.train}")
+
+    print(f"total: {t3 - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Local multi-core MapReduce runner for the Hadoop Streaming scripts.
+
+Runs a mapper / reducer pair the same way Hadoop Streaming does, on one box:
+
+    input splits --(N map tasks)--> hash partition + sorted spills on disk
+                 --(R reduce tasks)--> k-way merge of the spills -> reducer -> part-000xx
+
+A reduce task merges at most MERGE_FACTOR spills at once (Hadoop's io.sort.factor):
+with more, groups of them are first merged into intermediate sorted runs, so the
+open files per reducer stay bounded however large the map output is.
+
+Single step:
+    python local_runner.py step --mapper step2/mapper2.py --reducer step2/reducer2.py \
+        --input out/usercf_mr1 --output out/usercf_mr2 --maps 8 --reduces 8
+
+Whole pipeline (MR1 -> MR2 -> MR3), with timings per step:
+    python local_runner.py pipeline user --input ratings_train.csv --workdir out \
+        --maps 8 --reduces 8 --getmerge user_topk_neighbors.txt
+"""
+import argparse
+import heapq
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from multiprocessing import Pool
+
+HADOOP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SPLIT_SIZE = 64 * 1024 * 1024   # bytes of input per map task (like the HDFS block size)
+SPILL_SIZE = 64 * 1024 * 1024   # bytes of map output buffered before a sorted spill
+MERGE_FACTOR = 64               # spills merged at once per reduce task (also <= half the fd limit)
+COPY_BLOCK = 1024 * 1024
+
+# Pipelines: (step name, mapper cmd, reducer cmd, sort spec or None)
+# sort spec None = Hadoop default: sort on the key (text before the first tab).
+PIPELINES = {
+    "user": [
+        ("mr1", ["step1_userbased/mapper1.py"], ["step1_userbased/reducer1.py"], None),
+        ("mr2", ["step2/mapper2.py"], ["step2/reducer2.py"], None),
+        ("mr3", ["step3/mapper3.py"], ["step3/reducer3.py"], None),
+    ],
+    "item": [
+        ("mr1", ["step1_itembased/mapper1.py"], ["step1_itembased/reducer1.py"], None),
+        ("mr2", ["step2/mapper2.py"], ["step2/reducer2.py"], None),
+        ("mr3", ["step3/mapper3.py"], ["step3/reducer3.py"], None),
+    ],
+    "user-lsh": [
+        ("lsh1", ["step1_lsh/mapper_lsh.py", "user"], ["step1_lsh/reducer_lsh.py"], None),
+        ("lsh2", ["step2/mapper2.py"], ["step1_lsh/reducer_bucket.py"], None),
+        ("mr2", ["step2/mapper2.py"], ["step2/reducer2.py"], None),
+        ("mr3", ["step3/mapper3.py"], ["step3/reducer3.py"], None),
+    ],
+    "item-lsh": [
+        ("lsh1", ["step1_lsh/mapper_lsh.py", "item"], ["step1_lsh/reducer_lsh.py"], None),
+        ("lsh2", ["step2/mapper2.py"], ["step1_lsh/reducer_bucket.py"], None),
+        ("mr2", ["step2/mapper2.py"], ["step2/reducer2.py"], None),
+        ("mr3", ["step3/mapper3.py"], ["step3/reducer3.py"], None),
+    ],
+}
+
+# MR3 with secondary sort (run_mr3_sorted.sh): -k1,1 -k2,2nr -k3,3, partition on -k1,1
+SORTED_MR3 = ("mr3", ["step3/mapper3_sorted.py"], ["step3/reducer3_sorted.py"], "1,2nr,3")
+
+
+# --- sort keys ---
+
+class _Rev:
+    """Inverts the ordering of a wrapped value (reverse text fields)."""
+    __slots__ = ("v",)
+
+    def __init__(self, v):
+        self.v = v
+
+    def __lt__(self, other):
+        return other.v < self.v
+
+    def __eq__(self, other):
+        return self.v == other.v
+
+
+def parse_sort_spec(spec):
+    """
+    "1,2nr,3" -> [(0, False, False), (1, True, True), (2, False, False)]
+    i.e. (field index, numeric, reverse), same letters as KeyFieldBasedComparator.
+    """
+    fields = []
+    for part in spec.split(","):
+        part = part.strip()
+        digits = part.rstrip("nr")
+        flags = part[len(digits):]
+        fields.append((int(digits) - 1, "n" in flags, "r" in flags))
+    return fields
+
+
+def make_sort_key(spec):
+    """Key function over a raw output line (bytes)."""
+    if not spec:
+        # Hadoop Streaming default: key = everything before the first tab
+        return lambda line: line.split(b"\t", 1)[0].rstrip(b"\n")
+
+    fields = parse_sort_spec(spec)
+    n_split = max(i for i, _, _ in fields) + 1
+
+    def key(line):
+        parts = line.rstrip(b"\n").split(b"\t", n_split)
+        out = []
+        for i, numeric, reverse in fields:
+            v = parts[i] if i < len(parts) else b""
+            if numeric:
+                try:
+                    v = float(v)
+                except ValueError:
+                    v = 0.0
+                out.append(-v if reverse else v)
+            else:
+                out.append(_Rev(v) if reverse else v)
+        return tuple(out)
+
+    return key
+
+
+def partition_of(line, n_partitions):
+    """Hash partitioner on the first field (KeyFieldBasedPartitioner -k1,1)."""
+    key = line.split(b"\t", 1)[0].rstrip(b"\n")
+    return zlib.crc32(key) % n_partitions
+
+
+# --- input splits ---
+
+def list_input_files(path):
+    """A single file, or every part file of a previous step's output directory."""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, f)
+            for f in os.listdir(path)
+            if not f.startswith(("_", "."))
+        )
+    return [path]
+
+
+def compute_splits(paths, split_size):
+    """Byte ranges [start, end) that always end right after a newline."""
+    splits = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if size == 0:
+            continue
+        with open(path, "rb") as f:
+            start = 0
+            while start < size:
+                end = start + split_size
+                if end >= size:
+                    end = size
+                else:
+                    f.seek(end)
+                    f.readline()  # move to the end of the current line
+                    end = min(f.tell(), size)
+                splits.append((path, start, end))
+                start = end
+    return splits
+
+
+# --- map side ---
+
+def _feed_split(proc, path, start, end):
+    """Copy one input split into the mapper's stdin."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = f.read(min(COPY_BLOCK, remaining))
+                if not block:
+                    break
+                proc.stdin.write(block)
+                remaining -= len(block)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def _spill(buffers, sort_key, tmp_dir, task_id, spill_id, spills):
+    for p, lines in enumerate(buffers):
+        if not lines:
+            continue
+        lines.sort(key=sort_key)
+        spill_path = os.path.join(tmp_dir, f"map-{task_id:05d}-spill-{spill_id}-part-{p:05d}")
+        with open(spill_path, "wb") as out:
+            out.writelines(lines)
+        spills[p].append(spill_path)
+        lines.clear()
+
+
+def run_map_task(args):
+    """One map task: mapper subprocess -> partition -> sorted spill files."""
+    task_id, split, mapper_cmd, n_partitions, sort_spec, tmp_dir, spill_size = args
+    sort_key = make_sort_key(sort_spec)
+    path, start, end = split
+
+    proc = subprocess.Popen(
+        mapper_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=HADOOP_DIR
+    )
+    feeder = threading.Thread(target=_feed_split, args=(proc, path, start, end))
+    feeder.start()
+
+    buffers = [[] for _ in range(n_partitions)]
+    spills = [[] for _ in range(n_partitions)]
+    buffered = 0
+    spill_id = 0
+    records = 0
+
+    for line in proc.stdout:
+        if not line.endswith(b"\n"):
+            line += b"\n"
+        buffers[partition_of(line, n_partitions)].append(line)
+        buffered += len(line)
+        records += 1
+        if buffered >= spill_size:
+            _spill(buffers, sort_key, tmp_dir, task_id, spill_id, spills)
+            spill_id += 1
+            buffered = 0
+
+    _spill(buffers, sort_key, tmp_dir, task_id, spill_id, spills)
+    feeder.join()
+    if proc.wait() != 0:
+        raise RuntimeError(f"mapper failed on {path}[{start}:{end}]: {' '.join(mapper_cmd)}")
+
+    return spills, records, spill_id + 1
+
+
+# --- reduce side ---
+
+def effective_merge_factor(merge_factor):
+    """merge_factor, lowered to half the soft open-file limit (stdio, pipes and the output need the rest)."""
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != resource.RLIM_INFINITY:
+        merge_factor = min(merge_factor, soft // 2)
+    return max(2, merge_factor)
+
+
+def merge_runs(paths, sort_key, merge_factor):
+    """
+    Merge groups of merge_factor sorted files into intermediate runs (deleting
+    the merged inputs) until at most merge_factor are left; returns the remaining paths.
+    """
+    paths = list(paths)
+    n_merges = 0
+    while len(paths) > merge_factor:
+        group, paths = paths[:merge_factor], paths[merge_factor:]
+        run_path = f"{group[0]}.merge-{n_merges}"
+        files = [open(p, "rb") for p in group]
+        try:
+            with open(run_path, "wb") as out:
+                out.writelines(heapq.merge(*files, key=sort_key))
+        finally:
+            for f in files:
+                f.close()
+        for p in group:
+            os.remove(p)
+        paths.append(run_path)  # merged again only after the other groups: runs stay balanced
+        n_merges += 1
+    return paths
+
+
+def run_reduce_task(args):
+    """One reduce task: merge this partition's spills in key order into the reducer."""
+    partition, spill_paths, reducer_cmd, sort_spec, output_dir, merge_factor = args
+    sort_key = make_sort_key(sort_spec)
+    out_path = os.path.join(output_dir, f"part-{partition:05d}")
+
+    spill_paths = merge_runs(spill_paths, sort_key, effective_merge_factor(merge_factor))
+    files = [open(p, "rb") for p in spill_paths]
+    records = 0
+    try:
+        with open(out_path, "wb") as out:
+            proc = subprocess.Popen(
+                reducer_cmd, stdin=subprocess.PIPE, stdout=out, cwd=HADOOP_DIR
+            )
+            try:
+                for line in heapq.merge(*files, key=sort_key):
+                    proc.stdin.write(line)
+                    records += 1
+            except BrokenPipeError:
+                pass
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+            if proc.wait() != 0:
+                raise RuntimeError(f"reducer failed on partition {partition}: {' '.join(reducer_cmd)}")
+    finally:
+        for f in files:
+            f.close()
+
+    return records
+
+
+def script_cmd(cmd):
+    """["step2/mapper2.py", "arg"] -> [python, /abs/step2/mapper2.py, "arg"]"""
+    script = cmd[0]
+    if not os.path.isabs(script):
+        script = os.path.join(HADOOP_DIR, script)
+    return [sys.executable, script] + list(cmd[1:])
+
+
+def run_step(mapper_cmd, reducer_cmd, input_path, output_dir, n_maps=4, n_reduces=4,
+             sort_spec=None, tmp_root=None, split_size=SPLIT_SIZE, spill_size=SPILL_SIZE,
+             merge_factor=MERGE_FACTOR):
+    """Run one MapReduce step and return its timing / counter report."""
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    tmp_dir = tempfile.mkdtemp(prefix="mr-spill-", dir=tmp_root)
+
+    mapper_cmd = script_cmd(mapper_cmd)
+    reducer_cmd = script_cmd(reducer_cmd)
+
+    try:
+        t0 = time.time()
+        splits = compute_splits(list_input_files(input_path), split_size)
+        map_args = [
+            (i, split, mapper_cmd, n_reduces, sort_spec, tmp_dir, spill_size)
+            for i, split in enumerate(splits)
+        ]
+        spills_per_partition = [[] for _ in range(n_reduces)]
+        map_records = 0
+        n_spills = 0
+        with Pool(processes=n_maps) as pool:
+            for spills, records, task_spills in pool.imap_unordered(run_map_task, map_args):
+                for p in range(n_reduces):
+                    spills_per_partition[p].extend(spills[p])
+                map_records += records
+                n_spills += task_spills
+        t1 = time.time()
+
+        reduce_args = [
+            (p, spills_per_partition[p], reducer_cmd, sort_spec, output_dir, merge_factor)
+            for p in range(n_reduces)
+        ]
+        with Pool(processes=n_reduces) as pool:
+            reduce_records = sum(pool.imap_unordered(run_reduce_task, reduce_args))
+        t2 = time.time()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    open(os.path.join(output_dir, "_SUCCESS"), "w").close()
+
+    return {
+        "map_tasks": len(splits),
+        "spills": n_spills,
+        "map_output_records": map_records,
+        "reduce_input_records": reduce_records,
+        "map_time": t1 - t0,
+        "reduce_time": t2 - t1,
+        "total_time": t2 - t0,
+    }
+
+
+def getmerge(output_dir, dest):
+    """hadoop fs -getmerge: concatenate part files into one local file."""
+    with open(dest, "wb") as out:
+        for path in list_input_files(output_dir):
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, out, COPY_BLOCK)
+
+
+def print_report(name, report):
+    print(
+        f"[{name}] maps={report['map_tasks']} spills={report['spills']} "
+        f"map_out={report['map_output_records']} "
+        f"map {report['map_time']:.2f}s  shuffle+reduce {report['reduce_time']:.2f}s  "
+        f"total {report['total_time']:.2f}s"
+    )
+
+
+def run_pipeline(kind, input_path, workdir, n_maps, n_reduces, sorted_mr3=False,
+                 keep_stats=False, tmp_root=None, split_size=SPLIT_SIZE, spill_size=SPILL_SIZE,
+                 merge_factor=MERGE_FACTOR):
+    steps = list(PIPELINES[kind])
+    if sorted_mr3:
+        steps[-1] = SORTED_MR3
+    if keep_stats:
+        # MR2 also writes sum_xy / sum_x2 / sum_y2 for Hadoop/incremental/
+        steps = [
+            (name, m, ["step2/reducer2.py", "stats"], s) if r == ["step2/reducer2.py"] else (name, m, r, s)
+            for name, m, r, s in steps
+        ]
+
+    reports = []
+    current_input = input_path
+    for name, mapper_cmd, reducer_cmd, sort_spec in steps:
+        output_dir = os.path.join(workdir, f"{kind}_{name}")
+        report = run_step(
+            mapper_cmd, reducer_cmd, current_input, output_dir,
+            n_maps=n_maps, n_reduces=n_reduces, sort_spec=sort_spec,
+            tmp_root=tmp_root, split_size=split_size, spill_size=spill_size,
+            merge_factor=merge_factor,
+        )
+        print_report(name, report)
+        reports.append((name, report))
+        current_input = output_dir
+
+    total = sum(r["total_time"] for _, r in reports)
+    print(f"[{kind}] pipeline finished in {total:.2f}s -> {current_input}")
+    return current_input, reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local multi-core Hadoop Streaming runner")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p):
+        p.add_argument("--input", required=True, help="input file or step output directory")
+        p.add_argument("--maps", type=int, default=os.cpu_count(), help="parallel map tasks")
+        p.add_argument("--reduces", type=int, default=os.cpu_count(), help="reduce partitions / parallel reducers")
+        p.add_argument("--tmp-dir", default=None, help="where spill files go (default: system temp)")
+        p.add_argument("--split-mb", type=float, default=SPLIT_SIZE // (1024 * 1024))
+        p.add_argument("--spill-mb", type=float, default=SPILL_SIZE // (1024 * 1024))
+        p.add_argument("--merge-factor", type=int, default=MERGE_FACTOR, help="spills merged at once per reducer")
+        p.add_argument("--getmerge", default=None, help="also merge the final part files into this file")
+
+    step = sub.add_parser("step", help="run one mapper/reducer pair")
+    add_common(step)
+    step.add_argument("--mapper", required=True, help='mapper script (+ args), e.g. "step1_lsh/mapper_lsh.py item"')
+    step.add_argument("--reducer", required=True)
+    step.add_argument("--output", required=True)
+    step.add_argument("--sort", default=None, help='key fields to sort on, e.g. "1,2nr,3" (default: first field)')
+
+    pipe = sub.add_parser("pipeline", help="run a full MR1 -> MR3 pipeline")
+    add_common(pipe)
+    pipe.add_argument("kind", choices=sorted(PIPELINES))
+    pipe.add_argument("--workdir", required=True)
+    pipe.add_argument("--sorted-mr3", action="store_true", help="use the secondary-sort MR3 job")
+    pipe.add_argument("--keep-stats", action="store_true",
+                      help="keep per-pair statistics in the MR2 output (for incremental updates)")
+
+    args = parser.parse_args()
+    split_size = max(1, int(args.split_mb * 1024 * 1024))
+    spill_size = max(1, int(args.spill_mb * 1024 * 1024))
+
+    if args.command == "step":
+        report = run_step(
+            args.mapper.split(), args.reducer.split(), args.input, args.output,
+            n_maps=args.maps, n_reduces=args.reduces, sort_spec=args.sort,
+            tmp_root=args.tmp_dir, split_size=split_size, spill_size=spill_size,
+            merge_factor=args.merge_factor,
+        )
+        print_report("step", report)
+        final_dir = args.output
+    else:
+        final_dir, _ = run_pipeline(
+            args.kind, args.input, args.workdir, args.maps, args.reduces,
+            sorted_mr3=args.sorted_mr3, keep_stats=args.keep_stats, tmp_root=args.tmp_dir,
+            split_size=split_size, spill_size=spill_size, merge_factor=args.merge_factor,
+        )
+
+    if args.getmerge:
+        getmerge(final_dir, args.getmerge)
+        print(f"merged -> {args.getmerge}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import sys
+
+# --- LSH Mapper 1: group ratings by the entity we build signatures for ---
+# Using in User-Based and Item-Based (pass the mode as first argument)
+# input：userId, movieId, rating
+# output (user mode)：userId \t movieId:rating
+# output (item mode)：movieId \t userId:rating
+#
+# Hadoop Streaming: -mapper "mapper_lsh.py user"  or  -mapper "mapper_lsh.py item"
+
+MODE = sys.argv[1] if len(sys.argv) > 1 else "user"
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line or not line[0].isdigit():   # skip the header and anormal lines
+        continue
+
+    parts = line.split(',')
+    if len(parts) < 3:
+        continue
+
+    user = parts[0]
+    movie = parts[1]
+    rating = parts[2]
+
+    if MODE == "item":
+        # signature of a movie = the set of users who rated it
+        print(f"{movie}\t{user}:{rating}")
+    else:
+        # signature of a user = the set of movies he rated
+        print(f"{user}\t{movie}:{rating}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import sys
+import random
+from itertools import combinations
+
+# --- LSH Reducer 2: candidate pairs inside each bucket ---
+# Mapper: step2/mapper2.py (pass-through)
+# input：Band:BucketHash \t EntityID \t h0,h1,... \t f1:r1;f2:r2;...
+# output：id1,id2 \t r1,r2 \t band   (one line per co-rated feature, as step1 reducer1 + the band)
+#
+# The output feeds step2/mapper2.py + reducer2.py, so only the LSH candidate
+# pairs get a cosine similarity instead of every co-rating pair. A pair sharing
+# several buckets is emitted from each of them; reducer2.py keeps the lines of
+# one band per pair.
+
+current_bucket = None
+members = []
+
+# Safety threshold: a huge bucket means the band is not selective enough
+# (e.g. users who only rated blockbusters). Same idea as MAX_USERS_PER_MOVIE.
+MAX_BUCKET_SIZE = 200
+
+
+def parse_member(rest):
+    """EntityID \t bands \t features -> (id, [band hashes], {feature: rating_str})"""
+    entity, bands_str, features_str = rest.split("\t")
+    bands = bands_str.split(",")
+    ratings = {}
+    for fr in features_str.split(";"):
+        if ":" not in fr:
+            continue
+        fid, r = fr.split(":", 1)
+        ratings[fid] = r
+    return entity, bands, ratings
+
+
+def process_bucket(bucket, members):
+    """
+    Emit co-rating lines for every candidate pair in one bucket, tagged with
+    the band. Every band where a pair survives the sampling emits it (taking
+    only the first shared band would lose the pair whenever it was sampled
+    out of that one); reducer2 counts one band's lines per pair.
+    """
+    n = len(members)
+    if n < 2:
+        return
+
+    if n > MAX_BUCKET_SIZE:
+        members = random.sample(members, MAX_BUCKET_SIZE)
+
+    band = bucket.split(":", 1)[0]
+
+    for a, b in combinations(members, 2):
+        id_a, bands_a, ratings_a = a
+        id_b, bands_b, ratings_b = b
+
+        # consistent key ordering, same rule as item-based reducer1
+        if id_b < id_a:
+            id_a, ratings_a, id_b, ratings_b = id_b, ratings_b, id_a, ratings_a
+
+        # iterate over the smaller rating map
+        if len(ratings_a) <= len(ratings_b):
+            common = [f for f in ratings_a if f in ratings_b]
+        else:
+            common = [f for f in ratings_b if f in ratings_a]
+
+        for f in common:
+            print(f"{id_a},{id_b}\t{ratings_a[f]},{ratings_b[f]}\t{band}")
+
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+
+    try:
+        # Input format: Band:BucketHash \t EntityID \t bands \t features
+        bucket, rest = line.split("\t", 1)
+        member = parse_member(rest)
+    except ValueError:
+        continue
+
+    if current_bucket is None:
+        current_bucket = bucket
+
+    if bucket != current_bucket:
+        process_bucket(current_bucket, members)
+        current_bucket = bucket
+        members = []
+
+    members.append(member)
+
+# Process the last bucket
+if current_bucket is not None:
+    process_bucket(current_bucket, members)
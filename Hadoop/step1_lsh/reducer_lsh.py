@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import sys
+import random
+import zlib
+
+# --- LSH Reducer 1: signatures + banding ---
+# Goal: replace the exhaustive pair generation of step1 with LSH candidate buckets.
+# input：EntityID \t FeatureID:rating   (grouped by EntityID, see mapper_lsh.py)
+# output：Band:BucketHash \t EntityID \t h0,h1,...,hB-1 \t f1:r1;f2:r2;...
+#
+# Every entity is written once per band. Entities that land in the same
+# (band, bucket) are candidates; reducer_bucket.py turns them into the
+# "id1,id2 \t r1,r2" co-rating lines that step2/reducer2.py already scores.
+#
+# Hadoop Streaming: -reducer "reducer_lsh.py [minhash|simhash] [BANDS] [ROWS]"
+
+# --- CONFIGURATION EXPLANATION ---
+# Signature:
+#   minhash -> approximates Jaccard similarity of the rated sets
+#   simhash -> random hyperplanes over the rating vector, approximates cosine
+# Banding: the signature has BANDS * ROWS values. Two entities with similarity s
+# become candidates with probability 1 - (1 - s^ROWS)^BANDS, so the S-curve
+# threshold is roughly (1 / BANDS) ^ (1 / ROWS).
+#   BANDS=16, ROWS=4 -> threshold ~0.50
+#   BANDS=32, ROWS=4 -> threshold ~0.42 (higher recall, more pairs)
+#   BANDS=16, ROWS=6 -> threshold ~0.63 (lower recall, fewer pairs)
+# More bands = more recall; more rows per band = fewer false candidates.
+SIGNATURE = sys.argv[1] if len(sys.argv) > 1 else "minhash"
+BANDS = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+ROWS = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+# Entities with fewer features than this have unreliable signatures.
+MIN_FEATURES = 2
+
+# Fixed seed: every reducer must draw the same hash functions.
+SEED = 482
+PRIME = (1 << 61) - 1
+MASK64 = (1 << 64) - 1
+
+_rng = random.Random(SEED)
+HASH_PARAMS = [
+    (_rng.randrange(1, PRIME), _rng.randrange(0, PRIME))
+    for _ in range(BANDS * ROWS)
+]
+
+
+def mix64(x):
+    """splitmix64 finalizer: deterministic 64-bit hash of an integer id."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def minhash_signature(features):
+    """One min value per hash function h(x) = (a*x + b) mod p."""
+    ids = [mix64(fid) for fid, _ in features]
+    return [min((a * x + b) % PRIME for x in ids) for a, b in HASH_PARAMS]
+
+
+def simhash_signature(features):
+    """One bit per random hyperplane: sign of sum(rating * ±1)."""
+    n_bits = BANDS * ROWS
+    acc = [0.0] * n_bits
+    for fid, rating in features:
+        h = mix64(fid)
+        for bit in range(n_bits):
+            if bit and bit % 64 == 0:
+                h = mix64(h)  # re-hash for signatures longer than 64 bits
+            if (h >> (bit % 64)) & 1:
+                acc[bit] += rating
+            else:
+                acc[bit] -= rating
+    return [1 if v > 0 else 0 for v in acc]
+
+
+def band_hashes(signature):
+    """Collapse every band of ROWS values into one bucket hash."""
+    out = []
+    for b in range(BANDS):
+        rows = signature[b * ROWS:(b + 1) * ROWS]
+        out.append(zlib.crc32(".".join(map(str, rows)).encode()))
+    return out
+
+
+def process_entity(entity, feature_ratings):
+    """
+    Build the signature of one entity and emit it to one bucket per band.
+    """
+    features = []
+    for fr in feature_ratings:
+        try:
+            fid, r = fr.split(':', 1)
+            features.append((int(fid), float(r)))
+        except ValueError:
+            continue
+
+    if len(features) < MIN_FEATURES:
+        return
+
+    if SIGNATURE == "simhash":
+        signature = simhash_signature(features)
+    else:
+        signature = minhash_signature(features)
+
+    bands = band_hashes(signature)
+    bands_str = ",".join(map(str, bands))
+    # keep the raw rating strings so reducer2 sees exactly what reducer1 would emit
+    features_str = ";".join(feature_ratings)
+
+    for b, h in enumerate(bands):
+        print(f"{b}:{h}\t{entity}\t{bands_str}\t{features_str}")
+
+
+current_entity = None
+feature_ratings = []
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+
+    try:
+        # Input format: EntityID \t FeatureID:rating
+        entity, fr = line.split("\t", 1)
+    except ValueError:
+        continue
+
+    if ":" not in fr:
+        continue
+
+    if current_entity is None:
+        current_entity = entity
+
+    if entity != current_entity:
+        process_entity(current_entity, feature_ratings)
+        current_entity = entity
+        feature_ratings = []
+
+    feature_ratings.append(fr)
+
+# Process the last entity
+if current_entity is not None:
+    process_entity(current_entity, feature_ratings)
@@ -31,7 +31,11 @@ def process_movie(movie, user_ratings):
             continue
         u1, r1 = a.split(':', 1)
         u2, r2 = b.split(':', 1)
-        print(f"{u1},{u2}\t{r1},{r2}")
+        # Consistent key order (like the item-based reducer1): one record per pair in MR2
+        if u1 < u2:
+            print(f"{u1},{u2}\t{r1},{r2}")
+        else:
+            print(f"{u2},{u1}\t{r2},{r1}")
 
 
 for line in sys.stdin:
@@ -2,7 +2,18 @@
 import sys
 import math
 
+# "reducer2.py stats" also emits the sufficient statistics of every pair:
+#   ID1,ID2 \t Similarity \t Count \t sum_xy \t sum_x2 \t sum_y2
+# mapper3 only reads the first three columns, so MR3 is unchanged, and
+# Hadoop/incremental/ can later add new ratings to these sums.
+WITH_STATS = len(sys.argv) > 1 and sys.argv[1] == "stats"
+
+# Input from step1_lsh/reducer_bucket.py has a third column, the LSH band: a pair
+# sharing buckets in several bands comes once per band, each time with all of its
+# co-ratings, so only the lines of the pair's first seen band are counted.
+
 current_pair = None
+current_band = None
 sum_xy = 0.0
 sum_x2 = 0.0
 sum_y2 = 0.0
@@ -14,7 +25,7 @@ for line in sys.stdin:
         continue
     
     try:
-        pair, ratings = line.split("\t")
+        pair, ratings, *band = line.split("\t")
         r1, r2 = ratings.split(",")
         r1 = float(r1)
         r2 = float(r2)
@@ -29,7 +40,10 @@ for line in sys.stdin:
         if count > 0:
             denom = math.sqrt(sum_x2) * math.sqrt(sum_y2)
             sim = sum_xy / denom if denom != 0 else 0
-            print(f"{current_pair}\t{sim}\t{count}")
+            if WITH_STATS:
+                print(f"{current_pair}\t{sim}\t{count}\t{sum_xy}\t{sum_x2}\t{sum_y2}")
+            else:
+                print(f"{current_pair}\t{sim}\t{count}")
         
         # reset accumulator
         current_pair = pair
@@ -37,6 +51,13 @@ for line in sys.stdin:
         sum_x2 = 0.0
         sum_y2 = 0.0
         count = 0
+        current_band = None
+
+    if band:
+        if current_band is None:
+            current_band = band[0]
+        elif band[0] != current_band:
+            continue  # same pair from another LSH band
 
     # accumulate
     sum_xy += r1 * r2
@@ -48,4 +69,7 @@ for line in sys.stdin:
 if current_pair is not None and count > 0:
     denom = math.sqrt(sum_x2) * math.sqrt(sum_y2)
     sim = sum_xy / denom if denom != 0 else 0
-    print(f"{current_pair}\t{sim}\t{count}")
\ No newline at end of file
+    if WITH_STATS:
+        print(f"{current_pair}\t{sim}\t{count}\t{sum_xy}\t{sum_x2}\t{sum_y2}")
+    else:
+        print(f"{current_pair}\t{sim}\t{count}")
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import sys
+
+# --- Mapper 3 (secondary sort): composite key for reducer3_sorted.py ---
+# Using in User-Based and Item-Based
+# input：ID1,ID2 \t Similarity \t Count
+# output：ID1 \t Bucket \t Rank \t ID2:Similarity:Count (and vice versa)
+#
+# Key = (ID, Bucket, Rank), see run_mr3_sorted.sh:
+#   - partition on ID only, so every neighbor of an ID still meets in one reducer
+#   - sort Bucket descending: neighbors passing the strictest count threshold first
+#   - sort Rank ascending: Rank = 1 - Similarity, i.e. highest similarity first
+# Rank is fixed width so a plain byte comparison orders it numerically.
+
+# Must match THRESHOLDS in reducer3_sorted.py
+THRESHOLDS = [5, 4, 3, 2, 1]
+
+
+def count_bucket(cnt):
+    """Strictest threshold this count passes (0 = passes none)."""
+    for t in sorted(THRESHOLDS, reverse=True):
+        if cnt >= t:
+            return t
+    return 0
+
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+
+    try:
+        parts = line.split("\t")
+
+        # safety check
+        if len(parts) < 3:
+            continue
+
+        pair_str = parts[0]
+        sim = parts[1]
+        count = parts[2]
+
+        bucket = count_bucket(int(count))
+        rank = f"{1.0 - float(sim):.12f}"  # cosine in [-1, 1] -> rank in [0, 2]
+
+        # Split Key "u1,u2" or "m1,m2"
+        if "," in pair_str:
+            id1, id2 = pair_str.split(",")
+
+            # Output to ID1
+            print(f"{id1}\t{bucket}\t{rank}\t{id2}:{sim}:{count}")
+
+            # Output to ID2
+            print(f"{id2}\t{bucket}\t{rank}\t{id1}:{sim}:{count}")
+
+    except ValueError:
+        continue
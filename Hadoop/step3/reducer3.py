@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import sys
+from heapq import heappush, heapreplace
 
 # --- Reducer 3: dynamic threshold and combine with Top-K ---
 # Using in User-Based and Item-Based
 # input：MainID \t NeighborID:Sim:Count
 # output：MainID \t Neighbor1:Sim,Neighbor2:Sim...
-
-current_id = None
-neighbors = []
+#
+# Single streaming pass per MainID: every neighbor goes into one bounded
+# min-heap of size K per threshold (plus one for the fallback), so memory per
+# key is O(K * len(THRESHOLDS)) no matter how many neighbors a popular ID has.
 
 # --- config ---
 K = 50
@@ -15,75 +17,116 @@ K = 50
 # Logic: find Count>=5 first and then >=4...
 THRESHOLDS = [5, 4, 3, 2, 1]
 
-def emit_result(main_id, neighbor_list):
+
+def new_group():
     """
-    excute filter and output Top-K
+    Per-key state:
+    heaps[i]      -> top-K (sim, -seq, id) among neighbors with Count >= THRESHOLDS[i]
+    heaps[-1]     -> top-K among all neighbors (fallback)
+    qualified[i]  -> how many neighbors have Count >= THRESHOLDS[i]
     """
-    # 1. Seperate data
-    parsed_neighbors = []
-    for n in neighbor_list:
-        try:
-            # n format: "id:sim:count"
-            parts = n.split(':')
-            nid = parts[0]
-            sim = float(parts[1])
-            cnt = int(parts[2])
-            parsed_neighbors.append({'id': nid, 'sim': sim, 'count': cnt})
-        except (ValueError, IndexError):
-            continue
+    heaps = [[] for _ in range(len(THRESHOLDS) + 1)]
+    qualified = [0] * len(THRESHOLDS)
+    return heaps, qualified
 
-    selected_candidates = None
 
-    # 2. Dynamic threshold filtering
-    for t in THRESHOLDS:
-        # filtrate Count >= t nerighbors
-        filtered = [x for x in parsed_neighbors if x['count'] >= t]
+def add_neighbor(group, seq, nid, sim, cnt):
+    """
+    Offer one neighbor to every heap it qualifies for.
+    -seq breaks ties on sim in arrival order, same as a stable sort.
+    """
+    heaps, qualified = group
+    rec = (sim, -seq, nid)
+
+    for i, t in enumerate(THRESHOLDS):
+        if cnt >= t:
+            qualified[i] += 1
+            _push_bounded(heaps[i], rec)
+    _push_bounded(heaps[-1], rec)
+
+
+def _push_bounded(heap, rec):
+    if len(heap) < K:
+        heappush(heap, rec)
+    elif rec > heap[0]:
+        heapreplace(heap, rec)  # drop the current K-th best
+
+
+def top_k(group):
+    """
+    Pick the first threshold with at least K neighbors (or the fallback)
+    and return its heap as [(id, sim), ...] sorted by similarity desc.
+    """
+    heaps, qualified = group
 
+    selected = heaps[-1]
+    for i in range(len(THRESHOLDS)):
         # if enough candidates, break
-        if len(filtered) >= K:
-            selected_candidates = filtered
+        if qualified[i] >= K:
+            selected = heaps[i]
             break
 
-    # 3. Fallback logic
-    # If after the loop there are still not enough K neighbors (or there are very few neighbors), use the last filtered result or all data
-    if selected_candidates is None:
-        selected_candidates = parsed_neighbors
+    return [(nid, sim) for sim, _, nid in sorted(selected, reverse=True)]
+
 
-    # 4. Sort by similarity in descending order
-    selected_candidates.sort(key=lambda x: x['sim'], reverse=True)
+def select_top_k(records):
+    """records: iterable of (id, sim, count) -> [(id, sim), ...]"""
+    group = new_group()
+    for seq, (nid, sim, cnt) in enumerate(records):
+        add_neighbor(group, seq, nid, sim, cnt)
+    return top_k(group)
 
-    # 5. Take Top K
-    top_k = selected_candidates[:K]
 
-    # 6. Format output (remove Count, keep only ID:Sim for Python prediction script)
-    out_list = [f"{x['id']}:{x['sim']}" for x in top_k]
-    out_str = ",".join(out_list)
+def emit_result(main_id, group):
+    # Format output (remove Count, keep only ID:Sim for Python prediction script)
+    out_str = ",".join(f"{nid}:{sim}" for nid, sim in top_k(group))
 
     # Final output: ID \t n1:0.9,n2:0.8...
     print(f"{main_id}\t{out_str}")
 
-# --- Main loop ---
-for line in sys.stdin:
-    line = line.strip()
-    if not line:
-        continue
 
-    try:
-        # Input format: MainID \t NeighborInfo
-        id_val, neighbor_info = line.split("\t", 1)
-    except ValueError:
-        continue
+def main():
+    current_id = None
+    group = None
+    seq = 0
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            # Input format: MainID \t NeighborInfo
+            id_val, neighbor_info = line.split("\t", 1)
+        except ValueError:
+            continue
+
+        if current_id is None:
+            current_id = id_val
+            group = new_group()
+
+        if id_val != current_id:
+            emit_result(current_id, group)
+            current_id = id_val
+            group = new_group()
+            seq = 0
+
+        try:
+            # neighbor_info format: "id:sim:count"
+            parts = neighbor_info.split(':')
+            nid = parts[0]
+            sim = float(parts[1])
+            cnt = int(parts[2])
+        except (ValueError, IndexError):
+            continue
 
-    if current_id is None:
-        current_id = id_val
+        add_neighbor(group, seq, nid, sim, cnt)
+        seq += 1
 
-    if id_val != current_id:
-        emit_result(current_id, neighbors)
-        current_id = id_val
-        neighbors = []
+    # Process the last group
+    if current_id is not None:
+        emit_result(current_id, group)
 
-    neighbors.append(neighbor_info)
 
-# Process the last group
-if current_id is not None:
-    emit_result(current_id, neighbors)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
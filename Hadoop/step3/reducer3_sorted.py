@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import sys
+
+# --- Reducer 3 (secondary sort): early-exit Top-K ---
+# Using in User-Based and Item-Based, together with mapper3_sorted.py
+# input：MainID \t Bucket \t Rank \t NeighborID:Sim:Count
+#        (per MainID, ordered by Bucket desc, then Similarity desc)
+# output：MainID \t Neighbor1:Sim,Neighbor2:Sim...   (same as reducer3.py)
+#
+# Same selection rule as reducer3.py: use the strictest Count threshold that
+# still leaves K neighbors, then keep the K most similar of those.
+# Because the shuffle already delivers neighbors in (Bucket desc, Sim desc)
+# order, the K-th record read tells us which threshold wins. After that only
+# records of that same bucket can still make the Top-K, and at most K of them,
+# so the rest of the group is skipped without being parsed.
+
+# --- config ---
+K = 50
+# Must match mapper3_sorted.py
+THRESHOLDS = [5, 4, 3, 2, 1]
+
+
+def emit_result(main_id, selected):
+    # Top-K by similarity among the buffered candidates (at most 2K records)
+    selected.sort(key=lambda x: x[1], reverse=True)
+    out_str = ",".join(f"{nid}:{sim}" for nid, sim, _ in selected[:K])
+
+    # Final output: ID \t n1:0.9,n2:0.8...
+    print(f"{main_id}\t{out_str}")
+
+
+current_id = None
+selected = []          # [(id, sim, bucket), ...] candidates for the current ID
+cut_bucket = None      # bucket of the K-th record = chosen threshold (0 -> fallback)
+cut_taken = 0          # records of cut_bucket kept so far
+done = False           # Top-K of the current ID is final, skip the rest
+
+for line in sys.stdin:
+    line = line.strip()
+    if not line:
+        continue
+
+    id_val, sep, rest = line.partition("\t")
+    if not sep:
+        continue
+
+    if current_id is None:
+        current_id = id_val
+
+    if id_val != current_id:
+        emit_result(current_id, selected)
+        current_id = id_val
+        selected = []
+        cut_bucket = None
+        cut_taken = 0
+        done = False
+
+    if done:
+        continue
+
+    try:
+        # rest format: Bucket \t Rank \t id:sim:count
+        bucket_str, _, neighbor_info = rest.split("\t", 2)
+        bucket = int(bucket_str)
+        parts = neighbor_info.split(':')
+        nid = parts[0]
+        sim = float(parts[1])
+    except (ValueError, IndexError):
+        continue
+
+    if cut_bucket is not None:
+        if bucket != cut_bucket or cut_taken >= K:
+            # lower bucket reached, or K best of the cut bucket already kept
+            done = True
+            continue
+        cut_taken += 1
+        selected.append((nid, sim, bucket))
+        continue
+
+    selected.append((nid, sim, bucket))
+    if len(selected) == K:
+        # #(Count >= bucket) >= K and every stricter threshold had fewer than K
+        cut_bucket = bucket
+        cut_taken = sum(1 for x in selected if x[2] == bucket)
+
+# Process the last group
+if current_id is not None:
+    emit_result(current_id, selected)
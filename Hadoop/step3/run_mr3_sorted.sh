@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+# MR3 with secondary sort (EMR / Hadoop Streaming)
+# Usage: bash run_mr3_sorted.sh /usercf_mr2 /usercf_mr3 [code_dir]
+#
+# Composite map output key: ID \t Bucket \t Rank   (see mapper3_sorted.py)
+#   partitioner : KeyFieldBasedPartitioner on field 1  -> all neighbors of an ID in one reducer
+#   comparator  : -k1,1 -k2,2nr -k3,3                   -> ID, Bucket desc, Rank asc (= Sim desc)
+# so reducer3_sorted.py can stop parsing a group after its K best neighbors.
+set -e
+
+INPUT=${1:-/usercf_mr2}
+OUTPUT=${2:-/usercf_mr3}
+CODE_DIR=${3:-/home/hadoop/code/mr3}
+REDUCERS=${REDUCERS:-40}
+
+hdfs dfs -rm -r -f "$OUTPUT"
+
+hadoop jar /usr/lib/hadoop-mapreduce/hadoop-streaming.jar \
+  -D mapreduce.job.reduces="$REDUCERS" \
+  -D stream.num.map.output.key.fields=3 \
+  -D mapreduce.partition.keypartitioner.options=-k1,1 \
+  -D mapreduce.job.output.key.comparator.class=org.apache.hadoop.mapreduce.lib.partition.KeyFieldBasedComparator \
+  -D mapreduce.partition.keycomparator.options="-k1,1 -k2,2nr -k3,3" \
+  -files "$CODE_DIR/mapper3_sorted.py,$CODE_DIR/reducer3_sorted.py" \
+  -partitioner org.apache.hadoop.mapred.lib.KeyFieldBasedPartitioner \
+  -mapper mapper3_sorted.py \
+  -reducer reducer3_sorted.py \
+  -input "$INPUT" \
+  -output "$OUTPUT"
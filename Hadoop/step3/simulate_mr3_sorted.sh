@@ -0,0 +1,14 @@
+#!/usr/bin/env bash
+# Local simulation of run_mr3_sorted.sh with a single reducer.
+# Usage: bash simulate_mr3_sorted.sh mr2_output.txt > user_topk_neighbors.txt
+#
+# `sort` plays the shuffle: same key fields and order as the
+# KeyFieldBasedComparator options, byte order (LC_ALL=C) like Hadoop.
+set -e
+
+DIR=$(cd "$(dirname "$0")" && pwd)
+INPUT=${1:-/dev/stdin}
+
+python3 "$DIR/mapper3_sorted.py" < "$INPUT" \
+  | LC_ALL=C sort -t "$(printf '\t')" -k1,1 -k2,2nr -k3,3 \
+  | python3 "$DIR/reducer3_sorted.py"
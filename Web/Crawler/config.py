@@ -11,4 +11,12 @@ MYSQL_PASSWORD = "PASSWORD"
 MYSQL_DB = "cse482"
 
 # Base URL for TMDB poster images
-POSTER_BASE_URL = "https://image.tmdb.org/t/p/w185"
\ No newline at end of file
+POSTER_BASE_URL = "https://image.tmdb.org/t/p/w185"
+
+# Local poster cache (Crawler/poster_cache.py, served by /poster/<movie_id>)
+POSTER_CACHE_DIR = "poster_cache"
+POSTER_CACHE_MAX_BYTES = 512 * 2**20   # LRU-evicted above this
+POSTER_THUMB_WIDTHS = (92, 185)        # allowed ?w= values (resized with Pillow if installed)
+
+# Seconds a movie's TMDB fields stay in the cache tier (cache_backend.py)
+TMDB_CACHE_TTL = 24 * 3600
@@ -0,0 +1,232 @@
+# Crawler/poster_cache.py
+"""
+Content-addressed disk cache of TMDB posters, served by /poster/<movie_id>.
+
+    poster_cache/
+        blobs/ab/<sha256>.jpg        poster bytes, named by their hash
+        blobs/ab/<sha256>-w92.jpg    downscaled copies (Pillow, if installed)
+        refs/<movie_id>              "<sha256> <poster_path>"
+
+Reading a blob touches its mtime; when the blobs grow past max_bytes the
+least recently used ones are deleted. Request paths only queue downloads
+(prefetch(), background threads); warm the cache for every movie in
+movies_tmdb with:
+
+    python -m Crawler.poster_cache
+"""
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+import requests
+
+from .config import POSTER_BASE_URL, POSTER_CACHE_DIR, POSTER_CACHE_MAX_BYTES
+
+try:
+    from PIL import Image  # optional: without it thumbnails are the original poster
+except ImportError:
+    Image = None
+
+THUMB_QUALITY = 85
+EVICT_TO = 0.9  # evict down to this fraction of max_bytes
+PREFETCH_WORKERS = 4  # background poster downloads per process
+
+
+def fetch_poster(poster_path: str) -> Optional[bytes]:
+    """Download a poster (TMDB poster_path, e.g. '/abc.jpg') from the TMDB image CDN."""
+    url = f"{POSTER_BASE_URL}{poster_path}"
+    try:
+        resp = requests.get(url, timeout=10)
+        if resp.status_code == 200:
+            return resp.content
+        print(f"[WARN] poster {poster_path} request failed, status={resp.status_code}")
+    except Exception as e:
+        print(f"[ERROR] poster request {poster_path} failed: {e}")
+    return None
+
+
+class PosterCache:
+    """Posters on disk by content hash; fetcher(poster_path) -> bytes fills misses."""
+
+    def __init__(
+        self,
+        root: str = POSTER_CACHE_DIR,
+        max_bytes: int = POSTER_CACHE_MAX_BYTES,
+        fetcher: Callable[[str], Optional[bytes]] = fetch_poster,
+    ):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.fetcher = fetcher
+        self.lock = threading.Lock()
+        self.pending = set()  # movie ids with a prefetch queued or running
+        self.pool: Optional[ThreadPoolExecutor] = None
+        os.makedirs(os.path.join(self.root, "blobs"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "refs"), exist_ok=True)
+        self.total = sum(size for _, _, size in self._blobs())
+
+    def _blob_path(self, digest: str, width: Optional[int] = None) -> str:
+        name = f"{digest}-w{width}.jpg" if width else f"{digest}.jpg"
+        return os.path.join(self.root, "blobs", digest[:2], name)
+
+    def _ref_path(self, movie_id: int) -> str:
+        return os.path.join(self.root, "refs", str(int(movie_id)))
+
+    def _blobs(self):
+        """(mtime, path, size) of every blob file."""
+        for dirpath, _, names in os.walk(os.path.join(self.root, "blobs")):
+            for name in names:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, path, st.st_size
+
+    def _write(self, path: str, data: bytes, is_blob: bool = True):
+        """Write via temp file + rename, so readers never see a partial file."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        if is_blob:
+            with self.lock:
+                self.total += len(data)
+                if self.total > self.max_bytes:
+                    self._evict()
+
+    def _evict(self):
+        """Delete least recently used blobs until under EVICT_TO * max_bytes (lock held)."""
+        target = self.max_bytes * EVICT_TO
+        blobs = sorted(self._blobs())
+        self.total = sum(size for _, _, size in blobs)
+        removed = 0
+        for _, path, size in blobs:
+            if self.total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.total -= size
+            removed += 1
+        print(f"[INFO] poster cache: evicted {removed} files, {self.total / 2**20:.1f}MB left")
+
+    def ref(self, movie_id: int) -> Optional[Tuple[str, str]]:
+        """(sha256, poster_path) of a movie's cached poster, or None."""
+        try:
+            with open(self._ref_path(movie_id), "r") as f:
+                digest, poster_path = f.read().split(" ", 1)
+        except (OSError, ValueError):
+            return None
+        return digest, poster_path
+
+    def put(self, movie_id: int, poster_path: Optional[str]) -> Optional[str]:
+        """Fetch and store a movie's poster unless already cached; returns its hash."""
+        if not poster_path:
+            return None
+        ref = self.ref(movie_id)
+        if ref and ref[1] == poster_path and os.path.exists(self._blob_path(ref[0])):
+            return ref[0]
+
+        data = self.fetcher(poster_path)
+        if not data:
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        if not os.path.exists(self._blob_path(digest)):  # same image for another movie: stored once
+            self._write(self._blob_path(digest), data)
+        self._write(self._ref_path(movie_id), f"{digest} {poster_path}".encode("utf-8"), is_blob=False)
+        return digest
+
+    def prefetch(self, movie_id: int, poster_path: Optional[str]):
+        """put() in a background thread; returns at once, a movie already queued is skipped."""
+        if not poster_path:
+            return
+        movie_id = int(movie_id)
+        with self.lock:
+            if movie_id in self.pending:
+                return
+            self.pending.add(movie_id)
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix="poster")
+        self.pool.submit(self._prefetch, movie_id, poster_path)
+
+    def _prefetch(self, movie_id: int, poster_path: str):
+        try:
+            self.put(movie_id, poster_path)
+        except Exception as e:
+            print(f"[ERROR] poster prefetch {movie_id} failed: {e}")
+        finally:
+            with self.lock:
+                self.pending.discard(movie_id)
+
+    def get(self, movie_id: int, width: Optional[int] = None) -> Optional[Tuple[str, str]]:
+        """(file path, etag) of a cached poster, downscaled to width if given; None on a miss."""
+        ref = self.ref(movie_id)
+        if ref is None:
+            return None
+        digest = ref[0]
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            return None  # evicted
+        etag = digest
+
+        if width and Image is not None:
+            thumb = self._blob_path(digest, width)
+            if os.path.exists(thumb) or self._resize(path, thumb, width):
+                path, etag = thumb, f"{digest}-w{width}"
+
+        try:
+            os.utime(path)  # LRU: mtime = last use
+        except OSError:
+            pass
+        return path, etag
+
+    def _resize(self, src: str, dst: str, width: int) -> bool:
+        try:
+            with Image.open(src) as im:
+                if im.width <= width:
+                    return False  # already small enough: serve the original
+                height = max(1, round(im.height * width / im.width))
+                small = im.convert("RGB").resize((width, height), Image.LANCZOS)
+            buf = io.BytesIO()
+            small.save(buf, "JPEG", quality=THUMB_QUALITY, optimize=True)
+        except OSError as e:
+            print(f"[WARN] poster resize {src} failed: {e}")
+            return False
+        self._write(dst, buf.getvalue())
+        return True
+
+
+_cache: Optional[PosterCache] = None
+
+
+def init_poster_cache(**kwargs) -> PosterCache:
+    """(Re)create the shared cache, e.g. init_poster_cache(fetcher=stub) in tests or offline."""
+    global _cache
+    _cache = PosterCache(**kwargs)
+    return _cache
+
+
+def get_poster_cache() -> PosterCache:
+    if _cache is None:
+        return init_poster_cache()
+    return _cache
+
+
+if __name__ == "__main__":
+    from .tmdb_utils import get_mysql_connection
+
+    conn = get_mysql_connection()
+    with conn.cursor() as cur:
+        cur.execute("SELECT movie_id, poster_path FROM movies_tmdb WHERE poster_path IS NOT NULL")
+        rows = cur.fetchall()
+    conn.close()
+
+    cache = get_poster_cache()
+    stored = sum(cache.put(r["movie_id"], r["poster_path"]) is not None for r in rows)
+    print(f"[INFO] {stored}/{len(rows)} posters cached in {cache.root} ({cache.total / 2**20:.1f}MB)")
@@ -0,0 +1,174 @@
+# Crawler/tmdb_async.py
+"""
+Async versions of the tmdb_service helpers for asgi_app.py:
+aiomysql connection pool + one shared httpx.AsyncClient, so a request waiting
+on MySQL or the TMDB API does not hold a worker.
+
+    pip install aiomysql httpx
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Set
+
+import aiomysql
+import httpx
+
+from .config import TMDB_API_KEY, MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DB
+from .poster_cache import get_poster_cache
+from .tmdb_service import cache_tmdb, cached_tmdb, tmdb_fields
+from .tmdb_utils import CREATE_MOVIES_TMDB_SQL, UPSERT_MOVIE_SQL, build_imdb_id, movie_row
+
+MYSQL_POOL_SIZE = 20     # connections shared by all in-flight requests
+TMDB_CONCURRENCY = 8     # TMDB API calls in flight per process (rate limit)
+
+_pool: Optional[aiomysql.Pool] = None
+_client: Optional[httpx.AsyncClient] = None
+_tmdb_slots: Optional[asyncio.Semaphore] = None
+
+
+async def init_tmdb_async():
+    """Open the pool / HTTP client (call once on the serving event loop)."""
+    global _pool, _client, _tmdb_slots
+    _pool = await aiomysql.create_pool(
+        host=MYSQL_HOST,
+        port=MYSQL_PORT,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        db=MYSQL_DB,
+        charset="utf8mb4",
+        autocommit=True,
+        cursorclass=aiomysql.DictCursor,
+        minsize=1,
+        maxsize=MYSQL_POOL_SIZE,
+    )
+    _client = httpx.AsyncClient(timeout=10)
+    _tmdb_slots = asyncio.Semaphore(TMDB_CONCURRENCY)
+
+    async with _pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(CREATE_MOVIES_TMDB_SQL)  # create movies_tmdb if not exists
+
+
+async def close_tmdb_async():
+    global _pool, _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+async def fetch_tmdb_json(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """GET a TMDB API url, None on any failure (logged like tmdb_utils)."""
+    async with _tmdb_slots:
+        try:
+            resp = await _client.get(url, params=params)
+        except httpx.HTTPError as e:
+            print(f"[ERROR] TMDB request {url} failed: {e}")
+            return None
+    if resp.status_code != 200:
+        print(f"[WARN] TMDB request {url} failed, status={resp.status_code}")
+        return None
+    return resp.json()
+
+
+async def fetch_tmdb_by_id(tmdb_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch TMDB movie detail by tmdbId."""
+    if not tmdb_id:
+        return None
+    url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
+    return await fetch_tmdb_json(url, {"api_key": TMDB_API_KEY, "language": "en-US"})
+
+
+async def fetch_tmdb_by_imdb(imdb_id: str) -> Optional[Dict[str, Any]]:
+    """Fetch TMDB movie detail by IMDB id."""
+    if not imdb_id:
+        return None
+    url = f"https://api.themoviedb.org/3/find/{imdb_id}"
+    data = await fetch_tmdb_json(url, {"api_key": TMDB_API_KEY, "external_source": "imdb_id"})
+    results = (data or {}).get("movie_results") or []  # TMDB returns list under movie_results
+    if not results or not results[0].get("id"):
+        print(f"[INFO] No movie_results for IMDb {imdb_id}")
+        return None
+    return await fetch_tmdb_by_id(str(results[0]["id"]))  # take first match
+
+
+async def ensure_tmdb_for_movie(movie_id: int, link: Dict[str, Any]):
+    """Fill TMDB metadata for a single movie from its links row."""
+    imdb_id = build_imdb_id(link["imdbId"])  # zero-pad + prefix to standard IMDB id
+    tmdb_raw = link["tmdbId"]
+
+    tmdb_json = None
+    if tmdb_raw is not None and str(tmdb_raw).strip().isdigit():
+        tmdb_json = await fetch_tmdb_by_id(str(tmdb_raw).strip())  # lookup by TMDB id
+    elif imdb_id:
+        tmdb_json = await fetch_tmdb_by_imdb(imdb_id)              # fallback: lookup by IMDB id
+    if not tmdb_json:
+        return
+
+    async with _pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(UPSERT_MOVIE_SQL, movie_row(movie_id, imdb_id, tmdb_json))
+    # local poster copy for /poster, downloaded in the background
+    get_poster_cache().prefetch(movie_id, tmdb_json.get("poster_path"))
+
+
+async def ensure_tmdb_for_movie_ids(movie_ids: Iterable[int]):
+    """
+    Ensure TMDB info for a batch of movieIds; the missing ones are fetched
+    concurrently (at most TMDB_CONCURRENCY API calls at a time).
+    """
+    ids: Set[int] = {int(mid) for mid in movie_ids}
+    ids -= (await asyncio.to_thread(cached_tmdb, ids)).keys()  # cached = already in movies_tmdb
+    if not ids:
+        return
+
+    ids_tuple = tuple(ids)
+    placeholder = ",".join(["%s"] * len(ids_tuple))
+    async with _pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            # movies that have no TMDB metadata yet, with their links row
+            await cur.execute(
+                f"SELECT l.movieId, l.imdbId, l.tmdbId FROM links l "
+                f"LEFT JOIN movies_tmdb t ON t.movie_id = l.movieId "
+                f"WHERE l.movieId IN ({placeholder}) AND t.movie_id IS NULL",
+                ids_tuple,
+            )
+            missing = await cur.fetchall()
+
+    print(f"[TMDB] need to fill {len(missing)} movies")
+    await asyncio.gather(*(ensure_tmdb_for_movie(row["movieId"], row) for row in missing))
+
+
+async def load_tmdb_map(movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Load TMDB fields for given movieIds: cache first, movies_tmdb for the rest.
+    Returns: {movie_id: {poster_path, overview, title_tmdb}, ...}
+    """
+    ids: Set[int] = {int(mid) for mid in movie_ids}
+    if not ids:
+        return {}
+
+    # cache calls are blocking (socket / lock): off the event loop
+    result = await asyncio.to_thread(cached_tmdb, ids)
+    missing = ids - result.keys()
+    if not missing:
+        return result
+
+    ids_tuple = tuple(missing)
+    placeholder = ",".join(["%s"] * len(ids_tuple))
+    async with _pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                f"SELECT movie_id, poster_path, overview, title_tmdb "
+                f"FROM movies_tmdb WHERE movie_id IN ({placeholder})",
+                ids_tuple,
+            )
+            rows = await cur.fetchall()
+
+    loaded = tmdb_fields(rows)
+    await asyncio.to_thread(cache_tmdb, loaded)
+    result.update(loaded)
+    return result
@@ -1,6 +1,6 @@
 # Crawler/tmdb_service.py
 
-from typing import Iterable, Dict, Any, Set
+from typing import Iterable, Dict, Any, Optional, Set, Tuple, Union
 
 from .tmdb_utils import (
     get_mysql_connection,
@@ -10,7 +10,18 @@ from .tmdb_utils import (
     fetch_tmdb_by_imdb,
     upsert_movie,
 )
-from .config import POSTER_BASE_URL
+from .config import POSTER_BASE_URL, TMDB_CACHE_TTL
+from .poster_cache import get_poster_cache
+
+# cache tier for load_tmdb_map (get_many / set_many, e.g. cache_backend.get_cache()),
+# set by the web app with set_tmdb_cache(); None: every lookup goes to movies_tmdb
+_tmdb_cache = None
+
+
+def set_tmdb_cache(cache):
+    """Use `cache` (get_many(keys) / set_many(mapping, ttl)) for TMDB fields."""
+    global _tmdb_cache
+    _tmdb_cache = cache
 
 
 def ensure_tmdb_for_movie(conn, movie_id: int):
@@ -38,6 +49,7 @@ def ensure_tmdb_for_movie(conn, movie_id: int):
 
     if tmdb_json:
         upsert_movie(conn, movie_id, imdb_id, tmdb_json)     # insert or update movies_tmdb row
+        get_poster_cache().prefetch(movie_id, tmdb_json.get("poster_path"))  # local copy for /poster, in the background
 
 
 def ensure_tmdb_for_movie_ids(movie_ids: Iterable[int]):
@@ -46,6 +58,7 @@ def ensure_tmdb_for_movie_ids(movie_ids: Iterable[int]):
     only fetch for those missing in movies_tmdb.
     """
     ids: Set[int] = {int(mid) for mid in movie_ids}  # normalize to int + unique
+    ids -= cached_tmdb(ids).keys()                   # cached = already in movies_tmdb
     if not ids:
         return
 
@@ -73,17 +86,52 @@ def ensure_tmdb_for_movie_ids(movie_ids: Iterable[int]):
     conn.close()
 
 
+def tmdb_key(movie_id: int) -> str:
+    return f"tmdb:{int(movie_id)}"
+
+
+def cached_tmdb(movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """load_tmdb_map entries found in the cache (one multi-get for the whole page)."""
+    ids = [int(mid) for mid in movie_ids]
+    if _tmdb_cache is None:
+        return {}
+    hits = _tmdb_cache.get_many([tmdb_key(mid) for mid in ids])
+    return {mid: hits[tmdb_key(mid)] for mid in ids if tmdb_key(mid) in hits}
+
+
+def cache_tmdb(tmdb_map: Dict[int, Dict[str, Any]]):
+    if _tmdb_cache is None:
+        return
+    _tmdb_cache.set_many({tmdb_key(mid): tm for mid, tm in tmdb_map.items()}, TMDB_CACHE_TTL)
+
+
+def tmdb_fields(rows) -> Dict[int, Dict[str, Any]]:
+    return {
+        r["movie_id"]: {
+            "poster_path": r["poster_path"],
+            "overview": r["overview"],
+            "title_tmdb": r["title_tmdb"],
+        }
+        for r in rows
+    }
+
+
 def load_tmdb_map(movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
     """
-    Load TMDB fields for given movieIds from movies_tmdb.
+    Load TMDB fields for given movieIds: cache first, movies_tmdb for the rest.
     Returns: {movie_id: {poster_path, overview, title_tmdb}, ...}
     """
     ids: Set[int] = {int(mid) for mid in movie_ids}
     if not ids:
         return {}
 
+    result = cached_tmdb(ids)
+    missing = ids - result.keys()
+    if not missing:
+        return result
+
     conn = get_mysql_connection()
-    ids_tuple = tuple(ids)
+    ids_tuple = tuple(missing)
     placeholder = ",".join(["%s"] * len(ids_tuple))
 
     sql = f"""
@@ -96,16 +144,30 @@ def load_tmdb_map(movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
         rows = cur.fetchall()
     conn.close()
 
-    result: Dict[int, Dict[str, Any]] = {}
-    for r in rows:
-        result[r["movie_id"]] = {
-            "poster_path": r["poster_path"],
-            "overview": r["overview"],
-            "title_tmdb": r["title_tmdb"],
-        }
+    loaded = tmdb_fields(rows)
+    cache_tmdb(loaded)  # movies without a row stay uncached until the crawler fills them
+    result.update(loaded)
     return result
 
 
 def get_poster_base_url() -> str:
     """Base URL prefix for TMDB poster images."""
-    return POSTER_BASE_URL  # e.g. https://image.tmdb.org/t/p/w342/
\ No newline at end of file
+    return POSTER_BASE_URL  # e.g. https://image.tmdb.org/t/p/w342/
+
+
+def get_poster_file(movie_id: int, width: Optional[int] = None) -> Union[Tuple[str, str], str, None]:
+    """
+    (file path, etag) of a movie's poster from the local cache. On a miss the
+    poster is fetched in the background and its TMDB CDN url is returned to
+    redirect to meanwhile; None if the movie has no poster.
+    """
+    cache = get_poster_cache()
+    hit = cache.get(movie_id, width)
+    if hit is not None:
+        return hit
+
+    poster_path = load_tmdb_map([movie_id]).get(int(movie_id), {}).get("poster_path")
+    if not poster_path:
+        return None
+    cache.prefetch(movie_id, poster_path)
+    return f"{get_poster_base_url()}{poster_path}"
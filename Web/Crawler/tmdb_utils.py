@@ -10,24 +10,7 @@ from .config import TMDB_API_KEY, MYSQL_HOST, MYSQL_PORT, MYSQL_USER, MYSQL_PASS
 
 #DB helpers
 
-def get_mysql_connection():
-    """Create a new MySQL connection."""
-    conn = pymysql.connect(
-        host=MYSQL_HOST,
-        port=MYSQL_PORT,
-        user=MYSQL_USER,
-        password=MYSQL_PASSWORD,
-        database=MYSQL_DB,
-        charset="utf8mb4",
-        autocommit=True,
-        cursorclass=pymysql.cursors.DictCursor,
-    )
-    return conn
-
-
-def ensure_movies_tmdb_table(conn):
-    """Create movies_tmdb table if it does not exist."""
-    create_sql = """
+CREATE_MOVIES_TMDB_SQL = """
     CREATE TABLE IF NOT EXISTS movies_tmdb (
         movie_id INT PRIMARY KEY,
         tmdb_id INT,
@@ -47,8 +30,27 @@ def ensure_movies_tmdb_table(conn):
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
     ) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
     """
+
+
+def get_mysql_connection():
+    """Create a new MySQL connection."""
+    conn = pymysql.connect(
+        host=MYSQL_HOST,
+        port=MYSQL_PORT,
+        user=MYSQL_USER,
+        password=MYSQL_PASSWORD,
+        database=MYSQL_DB,
+        charset="utf8mb4",
+        autocommit=True,
+        cursorclass=pymysql.cursors.DictCursor,
+    )
+    return conn
+
+
+def ensure_movies_tmdb_table(conn):
+    """Create movies_tmdb table if it does not exist."""
     with conn.cursor() as cur:
-        cur.execute(create_sql)
+        cur.execute(CREATE_MOVIES_TMDB_SQL)
 
 
 #TMDB helpers
@@ -122,25 +124,7 @@ def parse_genres(genres_list) -> str:
     return ",".join(names)
 
 
-def upsert_movie(conn, movie_id: int, imdb_id: Optional[str], tmdb_json: Dict[str, Any]):
-    """Insert or update a row in movies_tmdb based on TMDB JSON."""
-    if not tmdb_json:
-        return
-
-    tmdb_id = tmdb_json.get("id")
-    title_tmdb = tmdb_json.get("title")
-    overview = tmdb_json.get("overview")
-    release_date = tmdb_json.get("release_date") or None  # may be empty string
-    runtime = tmdb_json.get("runtime")
-    vote_average = tmdb_json.get("vote_average")
-    vote_count = tmdb_json.get("vote_count")
-    popularity = tmdb_json.get("popularity")
-    original_language = tmdb_json.get("original_language")
-    genres_tmdb = parse_genres(tmdb_json.get("genres"))  # normalize to comma-separated names
-    poster_path = tmdb_json.get("poster_path")
-    backdrop_path = tmdb_json.get("backdrop_path")
-
-    sql = """
+UPSERT_MOVIE_SQL = """
     INSERT INTO movies_tmdb (
         movie_id, tmdb_id, imdb_id, title_tmdb, overview,
         release_date, runtime, vote_average, vote_count,
@@ -168,7 +152,23 @@ def upsert_movie(conn, movie_id: int, imdb_id: Optional[str], tmdb_json: Dict[st
         backdrop_path = VALUES(backdrop_path);
     """
 
-    params = {
+
+def movie_row(movie_id: int, imdb_id: Optional[str], tmdb_json: Dict[str, Any]) -> Dict[str, Any]:
+    """movies_tmdb row (UPSERT_MOVIE_SQL parameters) from TMDB JSON."""
+    tmdb_id = tmdb_json.get("id")
+    title_tmdb = tmdb_json.get("title")
+    overview = tmdb_json.get("overview")
+    release_date = tmdb_json.get("release_date") or None  # may be empty string
+    runtime = tmdb_json.get("runtime")
+    vote_average = tmdb_json.get("vote_average")
+    vote_count = tmdb_json.get("vote_count")
+    popularity = tmdb_json.get("popularity")
+    original_language = tmdb_json.get("original_language")
+    genres_tmdb = parse_genres(tmdb_json.get("genres"))  # normalize to comma-separated names
+    poster_path = tmdb_json.get("poster_path")
+    backdrop_path = tmdb_json.get("backdrop_path")
+
+    return {
         "movie_id": movie_id,
         "tmdb_id": tmdb_id,
         "imdb_id": imdb_id,
@@ -185,5 +185,11 @@ def upsert_movie(conn, movie_id: int, imdb_id: Optional[str], tmdb_json: Dict[st
         "backdrop_path": backdrop_path,
     }
 
+
+def upsert_movie(conn, movie_id: int, imdb_id: Optional[str], tmdb_json: Dict[str, Any]):
+    """Insert or update a row in movies_tmdb based on TMDB JSON."""
+    if not tmdb_json:
+        return
+
     with conn.cursor() as cur:
-        cur.execute(sql, params)  # INSERT ... ON DUPLICATE KEY UPDATE
\ No newline at end of file
+        cur.execute(UPSERT_MOVIE_SQL, movie_row(movie_id, imdb_id, tmdb_json))  # INSERT ... ON DUPLICATE KEY UPDATE
\ No newline at end of file
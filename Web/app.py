@@ -1,17 +1,39 @@
 # app.py
-from flask import Flask, render_template, request, redirect, session
-from data_loader import load_all_data
+import os
+import resource
+
+from flask import Flask, render_template, request, redirect, session, jsonify, abort, send_file, make_response
+from data_loader import SHARD, data_version, load_all_data
+from cache_backend import get_cache
+from reloader import DataReloader
+import http_cache
+import views
 from Crawler.tmdb_service import (
     ensure_tmdb_for_movie_ids,
     load_tmdb_map,
-    get_poster_base_url,
+    get_poster_file,
+    set_tmdb_cache,
 )
 
 app = Flask(__name__)
 app.secret_key = "cse482-secret"  # session signing key (replace in production)
+http_cache.init_app(app)  # gzip / br for large text responses
+set_tmdb_cache(get_cache())  # TMDB fields in the cache tier (CACHE_URL)
 
-# load data once at startup
-data = load_all_data()
+# hot reload: POST /admin/reload (views.ADMIN_TOKEN), or touch one of RELOAD_WATCH
+RELOAD_WATCH = ["reload.trigger"]  # e.g. touched by the import job when it is done
+RELOAD_INTERVAL = 5.0              # seconds between checks of RELOAD_WATCH
+
+# load data once at startup; reloads build a new copy in the background and swap it in.
+# Handlers read `data` once per request, so a request never mixes two versions.
+def load_data():
+    version = data_version()  # read first: a table swapped in meanwhile triggers the next reload
+    new = load_all_data()
+    new["version"] = version  # ETag / cache key base, the same in every worker
+    return new
+
+
+data = load_data()
 
 movies = data["movies"]                # {movieId: {title, genres}}
 user_ratings = data["user_ratings"]    # {userId: [(movieId, rating), ...]}
@@ -20,35 +42,63 @@ user_recs = data["user_recs"]          # {userId: [(movieId, prediction), ...]}
 all_users = data["all_users"]          # sorted list of userIds with data
 
 
+def swap_data(new):
+    global data, movies, user_ratings, user_neighbors, user_recs, all_users
+    movies = new["movies"]
+    user_ratings = new["user_ratings"]
+    user_neighbors = new["user_neighbors"]
+    user_recs = new["user_recs"]
+    all_users = new["all_users"]
+    data = new  # the switch handlers see: one reference assignment
+
+
+reloader = DataReloader(load_data, swap_data, RELOAD_WATCH, RELOAD_INTERVAL)
+reloader.start_watch()
+
+
+def serving_status():
+    # /admin/reload body: reload state + what this process holds
+    status = reloader.status()
+    status["shard"] = SHARD
+    status["users"] = len(data["all_users"])
+    status["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    return status
+
+
+def respond(result):
+    # views.py result -> Flask response
+    if isinstance(result, views.Redirect):
+        return redirect(result.url)
+    if isinstance(result, views.Error):
+        abort(result.status)
+    if isinstance(result, views.Login):
+        session["user_id"] = result.user_id  # store logged-in user in session
+        return redirect("/dashboard")
+    if isinstance(result, views.Page):
+        resp = make_response(render_template(result.template, **result.context))
+    elif isinstance(result, views.Json):
+        resp = make_response(jsonify(result.body), result.status)
+    elif isinstance(result, views.File):
+        resp = send_file(result.path, mimetype=result.mimetype, etag=result.etag, conditional=True)  # Range requests
+    else:  # NotModified
+        resp = make_response("", 304)
+    return views.with_validators(resp, result)
+
+
 @app.route("/")
 def index():
     return redirect("/login")
 
 
+@app.route("/admin/reload", methods=["GET", "POST"])
+def admin_reload():
+    return respond(views.admin_reload(request.method, request.headers, request.remote_addr, reloader, serving_status))
+
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
-    if request.method == "POST":
-        try:
-            user_id = int(request.form["user_id"])  # parse user id from form
-        except (KeyError, ValueError):
-            return render_template(
-                "login.html",
-                all_users=all_users,
-                error="Please input a valid user id.",
-            )
-
-        # accept only users that appear in ratings or recommendations
-        if user_id not in user_ratings and user_id not in user_recs:
-            return render_template(
-                "login.html",
-                all_users=all_users,
-                error=f"User {user_id} not found.",
-            )
-
-        session["user_id"] = user_id  # store logged-in user in session
-        return redirect("/dashboard")
-
-    return render_template("login.html", all_users=all_users)
+    d = data  # this request's data version
+    return respond(views.login(d, request.method, request.form, request.if_none_match))
 
 
 @app.route("/logout")
@@ -59,75 +109,42 @@ def logout():
 
 @app.route("/dashboard")
 def dashboard():
-    user_id = session.get("user_id")
-    if user_id is None:
-        return redirect("/login")
-
-    rated_list = user_ratings.get(user_id, [])   # [(movieId, rating), ...]
-    rec_list = user_recs.get(user_id, [])        # [(movieId, prediction), ...]
-
-    # movie ids needed for this page (history + recommendations)
-    movie_ids = {mid for mid, _ in rated_list} | {mid for mid, _ in rec_list}
-
-    # ensure TMDB metadata exists for these movies (fetch missing ones)
-    ensure_tmdb_for_movie_ids(movie_ids)
-
-    # load TMDB metadata: movieId -> {poster_path, overview, ...}
-    tmdb_map = load_tmdb_map(movie_ids)
-    poster_base_url = get_poster_base_url()  # e.g. https://image.tmdb.org/t/p/w342/
-
-    rated_view = []
-    for mid, rating in rated_list:
-        tm = tmdb_map.get(mid, {})
-        poster_path = tm.get("poster_path")
-        overview = tm.get("overview")
-
-        rated_view.append(
-            {
-                "movieId": mid,
-                "title": movies.get(mid, {}).get("title", f"Movie {mid}"),
-                "genres": movies.get(mid, {}).get("genres", ""),
-                "rating": rating,
-                "ml_url": f"https://movielens.org/movies/{mid}",  # link back to MovieLens
-                "poster_path": poster_path,
-                "poster_url": f"{poster_base_url}{poster_path}" if poster_path else None,
-                "overview": overview,
-            }
-        )
-
-    rec_view = []
-    for mid, pred in rec_list[:30]:  # show top 30 recommendations
-        tm = tmdb_map.get(mid, {})
-        poster_path = tm.get("poster_path")
-        overview = tm.get("overview")
-
-        rec_view.append(
-            {
-                "movieId": mid,
-                "title": movies.get(mid, {}).get("title", f"Movie {mid}"),
-                "genres": movies.get(mid, {}).get("genres", ""),
-                "prediction": pred,
-                "ml_url": f"https://movielens.org/movies/{mid}",
-                "poster_path": poster_path,
-                "poster_url": f"{poster_base_url}{poster_path}" if poster_path else None,
-                "overview": overview,
-            }
-        )
-
-    neighbor_list = user_neighbors.get(user_id, [])  # similar users for current user
-    neighbor_view = [
-        {"neighborId": nid, "sim": sim}
-        for nid, sim in neighbor_list
-    ]
-
-    return render_template(
-        "dashboard.html",
-        user_id=user_id,
-        rated_movies=rated_view,
-        recommended_movies=rec_view,
-        neighbors=neighbor_view,
-    )
+    d = data  # this request's data version
+    job = views.dashboard(d, session.get("user_id"), request.args, request.if_none_match)
+    if not isinstance(job, views.DashboardJob):
+        return respond(job)
+
+    cache = get_cache()
+    context = cache.get(job.key)
+    if context is None:
+        # ensure TMDB metadata exists for these movies (fetch missing ones)
+        movie_ids = job.movie_ids()
+        ensure_tmdb_for_movie_ids(movie_ids)
+
+        # load TMDB metadata: movieId -> {poster_path, overview, ...}
+        context = job.context(load_tmdb_map(movie_ids))
+        cache.set(job.key, context, job.ttl(context))
+    return respond(job.page(context))
+
+
+@app.route("/poster/<int:movie_id>")
+def poster(movie_id):
+    hit = get_poster_file(movie_id, views.poster_width(request.args))  # local cache; a miss redirects to TMDB
+    return respond(views.poster(hit, request.if_none_match))
+
+
+@app.route("/api/users/<int:user_id>/recommendations")
+def api_recommendations(user_id):
+    d = data  # this request's data version
+    return respond(views.api_recommendations(d, user_id, request.args, request.if_none_match))
+
+
+@app.route("/api/users/<int:user_id>/recommendations/by-genre")
+def api_recommendations_by_genre(user_id):
+    d = data  # this request's data version
+    return respond(views.api_recommendations_by_genre(d, user_id, request.args, request.if_none_match))
 
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=5000, debug=False)
\ No newline at end of file
+    # PORT: one port per local shard process (router.py)
+    app.run(host="127.0.0.1", port=int(os.environ.get("PORT", 5000)), debug=False)
@@ -0,0 +1,131 @@
+# asgi_app.py
+# async serving mode: the pages of app.py on Quart (ASGI). TMDB metadata is read /
+# filled through aiomysql + httpx (Crawler/tmdb_async.py), so while one dashboard
+# waits on MySQL or the TMDB API the event loop serves the others.
+#
+#   pip install quart aiomysql httpx hypercorn
+#   hypercorn asgi_app:app --bind 127.0.0.1:5000
+#
+# Data, hot reload and the request logic (views.py) are app.py's: only the I/O differs.
+import asyncio
+
+from quart import Quart, Response, abort, jsonify, redirect, render_template, request, send_file, session
+
+import app as wsgi
+from cache_backend import get_cache
+import http_cache
+import views
+from Crawler import tmdb_async
+from Crawler.tmdb_service import get_poster_file
+
+app = Quart(__name__)
+app.secret_key = wsgi.app.secret_key  # same session cookie as app.py
+
+
+@app.before_serving
+async def startup():
+    await tmdb_async.init_tmdb_async()
+
+
+@app.after_serving
+async def shutdown():
+    await tmdb_async.close_tmdb_async()
+
+
+@app.after_request
+async def compress(resp):
+    resp.headers.add("Vary", "Accept-Encoding")
+    if resp.status_code != 200 or "Content-Encoding" in resp.headers or resp.mimetype not in http_cache.COMPRESSIBLE:
+        return resp
+    body, encoding = http_cache.compress_body(await resp.get_data(), request.accept_encodings)
+    if encoding is not None:
+        resp.set_data(body)
+        resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+async def respond(result):
+    # views.py result -> Quart response (same mapping as app.respond)
+    if isinstance(result, views.Redirect):
+        return redirect(result.url)
+    if isinstance(result, views.Error):
+        abort(result.status)
+    if isinstance(result, views.Login):
+        session["user_id"] = result.user_id  # store logged-in user in session
+        return redirect("/dashboard")
+    if isinstance(result, views.Page):
+        resp = Response(await render_template(result.template, **result.context))
+    elif isinstance(result, views.Json):
+        resp = jsonify(result.body)
+        resp.status_code = result.status
+    elif isinstance(result, views.File):
+        resp = await send_file(result.path, mimetype=result.mimetype)
+    else:  # NotModified
+        resp = Response("", 304)
+    return views.with_validators(resp, result)
+
+
+@app.route("/")
+async def index():
+    return redirect("/login")
+
+
+@app.route("/admin/reload", methods=["GET", "POST"])
+async def admin_reload():
+    return await respond(
+        views.admin_reload(request.method, request.headers, request.remote_addr, wsgi.reloader, wsgi.serving_status)
+    )
+
+
+@app.route("/login", methods=["GET", "POST"])
+async def login():
+    d = wsgi.data  # this request's data version
+    form = await request.form if request.method == "POST" else None
+    return await respond(views.login(d, request.method, form, request.if_none_match))
+
+
+@app.route("/logout")
+async def logout():
+    session.clear()
+    return redirect("/login")
+
+
+@app.route("/dashboard")
+async def dashboard():
+    d = wsgi.data  # this request's data version
+    job = views.dashboard(d, session.get("user_id"), request.args, request.if_none_match)
+    if not isinstance(job, views.DashboardJob):
+        return await respond(job)
+
+    # awaits: other requests run while this one waits on the cache / MySQL / TMDB
+    cache = get_cache()
+    context = await asyncio.to_thread(cache.get, job.key)
+    if context is None:
+        movie_ids = job.movie_ids()
+        await tmdb_async.ensure_tmdb_for_movie_ids(movie_ids)
+        context = job.context(await tmdb_async.load_tmdb_map(movie_ids))
+        await asyncio.to_thread(cache.set, job.key, context, job.ttl(context))
+    return await respond(job.page(context))
+
+
+@app.route("/poster/<int:movie_id>")
+async def poster(movie_id):
+    # disk cache + (on a miss) movies_tmdb lookup, blocking: in a worker thread
+    hit = await asyncio.to_thread(get_poster_file, movie_id, views.poster_width(request.args))
+    return await respond(views.poster(hit, request.if_none_match))
+
+
+@app.route("/api/users/<int:user_id>/recommendations")
+async def api_recommendations(user_id):
+    d = wsgi.data  # this request's data version
+    return await respond(views.api_recommendations(d, user_id, request.args, request.if_none_match))
+
+
+@app.route("/api/users/<int:user_id>/recommendations/by-genre")
+async def api_recommendations_by_genre(user_id):
+    d = wsgi.data  # this request's data version
+    return await respond(views.api_recommendations_by_genre(d, user_id, request.args, request.if_none_match))
+
+
+if __name__ == "__main__":
+    app.run(host="127.0.0.1", port=5000, debug=False)
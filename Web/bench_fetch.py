@@ -0,0 +1,102 @@
+# bench_fetch.py
+# per-user fetch latency of the dashboard's two lists, old tables vs. ranked serving tables
+#   old: user_topk_neighbors (one comma-joined string per user, parsed in Python)
+#        user_item_predictions WHERE userId = ? ORDER BY prediction DESC LIMIT n
+#   new: user_neighbor_ranks / user_rec_ranks WHERE userId = ? ORDER BY rank LIMIT n
+#
+#   python bench_fetch.py [--users 1000] [--topk 50] [--top-n 100]
+import argparse
+import random
+import time
+
+import numpy as np
+import pymysql
+
+from data_loader import (
+    NEIGHBORS_TABLE,
+    RECS_TABLE,
+    fetch_user_neighbors,
+    fetch_user_recs,
+    get_connection,
+)
+
+SAMPLE_USERS = 1000
+SEED = 42
+
+
+def old_neighbors(conn, user_id, topk=50):
+    with conn.cursor() as cur:
+        cur.execute("SELECT neighbors FROM user_topk_neighbors WHERE userId = %s", (user_id,))
+        row = cur.fetchone()
+    pairs = []
+    for item in (row["neighbors"] if row else "").split(","):
+        if ":" not in item:
+            continue
+        nid, sim = item.split(":", 1)
+        pairs.append((int(nid), float(sim)))
+    return pairs[:topk]
+
+
+def old_recs(conn, user_id, n=100):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT movieId, prediction FROM user_item_predictions "
+            "WHERE userId = %s ORDER BY prediction DESC LIMIT %s",
+            (user_id, n),
+        )
+        return [(int(r["movieId"]), float(r["prediction"])) for r in cur.fetchall()]
+
+
+def sample_users(conn, table, n):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT DISTINCT userId FROM {table}")
+        users = [r["userId"] for r in cur.fetchall()]
+    random.Random(SEED).shuffle(users)
+    return users[:n]
+
+
+def time_fetch(conn, fetch, users, limit):
+    times = np.empty(len(users))
+    rows = 0
+    for i, uid in enumerate(users):
+        t0 = time.perf_counter()
+        rows += len(fetch(conn, uid, limit))
+        times[i] = time.perf_counter() - t0
+    return times * 1000.0, rows
+
+
+def report(name, conn, fetch, users, limit):
+    try:
+        ms, rows = time_fetch(conn, fetch, users, limit)
+    except pymysql.err.ProgrammingError as e:  # table not imported
+        print(f"{name:<34} skipped: {e.args[-1]}")
+        return
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    print(
+        f"{name:<34} {ms.mean():8.3f} {p50:8.3f} {p95:8.3f} {p99:8.3f}"
+        f"  ({rows / len(users):.1f} rows/user)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="per-user fetch latency: old vs. ranked tables")
+    parser.add_argument("--users", type=int, default=SAMPLE_USERS, help="users sampled per query")
+    parser.add_argument("--topk", type=int, default=50, help="neighbors per user")
+    parser.add_argument("--top-n", type=int, default=100, help="recommendations per user")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    try:
+        users = sample_users(conn, RECS_TABLE, args.users)
+        if not users:
+            print(f"no users in {RECS_TABLE}; import it with bulk_import.py prediction-ranks")
+            exit(1)
+
+        print(f"{len(users)} users, neighbors top-{args.topk}, recommendations top-{args.top_n}")
+        print(f"{'query (ms)':<34} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        report("user_topk_neighbors (parse)", conn, old_neighbors, users, args.topk)
+        report(NEIGHBORS_TABLE, conn, fetch_user_neighbors, users, args.topk)
+        report("user_item_predictions (sort)", conn, old_recs, users, args.top_n)
+        report(RECS_TABLE, conn, fetch_user_recs, users, args.top_n)
+    finally:
+        conn.close()
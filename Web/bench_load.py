@@ -0,0 +1,85 @@
+# bench_load.py
+# dashboard load test: logged-in clients requesting /dashboard back to back, at
+# several concurrency levels. Run it against app.py (WSGI) and asgi_app.py (ASGI)
+# to compare how throughput scales while requests wait on MySQL / TMDB.
+#
+#   python bench_load.py http://127.0.0.1:5000 --concurrency 1,4,16,64 --requests 400
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+USERS = 600   # logged-in users are drawn from userIds 1..USERS
+SEED = 42
+
+
+def login(base_url, user_id):
+    s = requests.Session()
+    resp = s.post(f"{base_url}/login", data={"user_id": user_id}, allow_redirects=False)
+    if resp.status_code != 302:
+        return None  # unknown user
+    return s
+
+
+def make_sessions(base_url, n, users):
+    rng = random.Random(SEED)
+    sessions = []
+    while len(sessions) < n:
+        s = login(base_url, rng.randint(1, users))
+        if s is not None:
+            sessions.append(s)
+    return sessions
+
+
+def run_level(base_url, sessions, total):
+    # len(sessions) clients, each sending requests until `total` have been sent
+    lock = threading.Lock()
+    remaining = [total]
+    latencies, errors = [], [0]
+
+    def client(s):
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            t0 = time.perf_counter()
+            ok = s.get(f"{base_url}/dashboard", headers={"Accept-Encoding": "gzip"}).status_code == 200
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                errors[0] += not ok
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+        list(pool.map(client, sessions))
+    elapsed = time.perf_counter() - t0
+    return elapsed, np.array(latencies) * 1000.0, errors[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/dashboard throughput vs. concurrency")
+    parser.add_argument("base_url", nargs="?", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=400, help="requests per level")
+    parser.add_argument("--users", type=int, default=USERS, help="draw users from 1..N")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    print(f"{args.base_url}/dashboard, {args.requests} requests per level")
+    print(f"{'clients':>7} {'req/s':>8} {'mean ms':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>6}")
+    base = None
+    for c in levels:
+        sessions = make_sessions(args.base_url, c, args.users)
+        elapsed, ms, errors = run_level(args.base_url, sessions, args.requests)
+        rps = len(ms) / elapsed
+        base = base or rps
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        print(
+            f"{c:>7} {rps:>8.1f} {ms.mean():>8.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {errors:>6}"
+            f"  (x{rps / base:.1f})"
+        )
@@ -0,0 +1,349 @@
+# bulk_import.py
+# stream Hadoop / prediction outputs into MySQL:
+#   staging table without indexes -> parallel LOAD DATA LOCAL INFILE (or multi-row INSERT)
+#   -> indexes built once after the load -> atomic RENAME TABLE swap with the live table
+#
+#   python bulk_import.py user-neighbors user_topk_neighbors.txt
+#   python bulk_import.py item-neighbors item_topk_neighbors.txt
+#   python bulk_import.py predictions user_based_recommendations/ --top-n 100
+#   python bulk_import.py predictions user_based_recommendations.csv --top-n 100 --workers 8
+#
+# serving schema (one row per (userId, rank), clustered PK (userId, rank); data_loader.py reads these)
+#   python bulk_import.py neighbor-ranks user_topk_neighbors.txt        # or a compiled .nbr store
+#   python bulk_import.py prediction-ranks user_based_recommendations/ --top-n 100
+import argparse
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pymysql
+
+from data_loader import DB_CONFIG
+
+# eval helpers (header detection, per-user top-N)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "eval"))
+import cf_engine  # noqa: E402
+import ratings_io  # noqa: E402
+
+BATCH_ROWS = 500000   # rows per LOAD DATA / INSERT batch
+NUM_WORKERS = 4       # parallel connections loading batches
+PROGRESS_EVERY = 10   # print rows/sec every N loaded batches
+
+# target tables: columns of the staging table, indexes added after the load
+TABLES = {
+    "user-neighbors": {
+        "table": "user_topk_neighbors",
+        "columns": ["userId INT NOT NULL", "neighbors MEDIUMTEXT NOT NULL"],
+        "indexes": ["ADD PRIMARY KEY (userId)"],
+    },
+    "item-neighbors": {
+        "table": "item_topk_neighbors",
+        "columns": ["movieId INT NOT NULL", "neighbors MEDIUMTEXT NOT NULL"],
+        "indexes": ["ADD PRIMARY KEY (movieId)"],
+    },
+    "predictions": {
+        "table": "user_item_predictions",
+        "columns": ["userId INT NOT NULL", "movieId INT NOT NULL", "prediction FLOAT NOT NULL"],
+        "indexes": ["ADD PRIMARY KEY (userId, movieId)", "ADD KEY idx_user_pred (userId, prediction)"],
+    },
+    "neighbor-ranks": {
+        "table": "user_neighbor_ranks",
+        "columns": [
+            "userId INT NOT NULL", "`rank` SMALLINT UNSIGNED NOT NULL",
+            "neighborId INT NOT NULL", "sim FLOAT NOT NULL",
+        ],
+        "indexes": ["ADD PRIMARY KEY (userId, `rank`)"],
+    },
+    "prediction-ranks": {
+        "table": "user_rec_ranks",
+        "columns": [
+            "userId INT NOT NULL", "`rank` MEDIUMINT UNSIGNED NOT NULL",
+            "movieId INT NOT NULL", "prediction FLOAT NOT NULL",
+        ],
+        "indexes": ["ADD PRIMARY KEY (userId, `rank`)"],
+    },
+}
+PREDICTION_COLUMNS = ["userId", "movieId", "prediction"]
+# decimals kept per column in the LOAD DATA files; other float columns (neighbor sims)
+# are written at full precision
+ROUND_DECIMALS = {"prediction": 4}
+
+
+def get_connection():
+    return pymysql.connect(**DB_CONFIG, local_infile=True, autocommit=True)
+
+
+def column_names(spec):
+    return [c.split()[0] for c in spec["columns"]]
+
+
+def group_ranks(users):
+    # 1-based position of every row within its run of equal users
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(users)) + 1])
+    return np.arange(len(users)) - np.repeat(starts, np.diff(np.append(starts, len(users)))) + 1
+
+
+# --- readers: DataFrame batches of at most BATCH_ROWS rows ---
+
+def input_files(path):
+    # a file, or a directory of part files (user_based_predict.py output)
+    if not os.path.isdir(path):
+        return [path]
+    names = sorted(n for n in os.listdir(path) if n.startswith("part-") and n.endswith((".tsv", ".csv")))
+    return [os.path.join(path, n) for n in names]
+
+
+def neighbor_batches(path, names):
+    # "id \t n1:sim,n2:sim,..." -> (id, neighbors string), kept as the text the web parses
+    for df in pd.read_csv(
+        path, sep="\t", header=None, names=names, dtype={names[0]: np.int64, names[1]: str},
+        usecols=[0, 1], engine="c", chunksize=BATCH_ROWS, keep_default_na=False,
+    ):
+        yield df
+
+
+def neighbor_rank_batches(path, names):
+    # one row per (id, rank), straight from the neighbor index arrays
+    nbr = cf_engine.load_neighbor_index(path)  # text file or compiled .nbr store
+    ids = np.asarray(nbr["ids"])
+    neighbors = np.asarray(nbr["neighbors"])
+    sims = np.asarray(nbr["sims"])
+    step = max(1, BATCH_ROWS // max(neighbors.shape[1], 1))
+    for i in range(0, len(ids), step):
+        valid = neighbors[i : i + step] >= 0  # lists are left-aligned: column j is rank j + 1
+        yield pd.DataFrame({
+            names[0]: np.repeat(ids[i : i + step], valid.sum(axis=1)),
+            names[1]: np.nonzero(valid)[1] + 1,
+            names[2]: neighbors[i : i + step][valid],
+            names[3]: sims[i : i + step][valid],
+        })
+
+
+def read_predictions(path, names):
+    with open(path, "r") as f:
+        first = f.readline()
+    return pd.read_csv(
+        path, sep="\t" if "\t" in first else ",", header=None, names=names,
+        skiprows=1 if ratings_io.has_header(path) else 0, usecols=[0, 1, 2],
+        dtype={names[0]: np.int64, names[1]: np.int64, names[2]: np.float32},
+        engine="c", chunksize=BATCH_ROWS,
+    )
+
+
+def top_n_frame(df, n, ranked):
+    users, movies, preds = cf_engine.top_n_per_user(
+        df.iloc[:, 0].to_numpy(), df.iloc[:, 1].to_numpy(), df.iloc[:, 2].to_numpy(), n
+    )
+    out = pd.DataFrame({"userId": users, "movieId": movies, "prediction": preds})
+    if ranked:
+        out["`rank`"] = group_ranks(users)
+    return out
+
+
+def prediction_batches(paths, top_n=None, ranked=False):
+    # with top_n or ranked, rows must come grouped by user: a user's rows may span chunks
+    # (the last group of a chunk is carried over), but a user must not come back later
+    if ranked and top_n is None:
+        top_n = np.iinfo(np.int64).max  # rank everything
+    carry = None
+    finished = set()
+    for path in paths:
+        for df in read_predictions(path, PREDICTION_COLUMNS):
+            if top_n is None:
+                yield df
+                continue
+
+            if carry is not None:
+                df = pd.concat([carry, df], ignore_index=True)
+            users = df.iloc[:, 0].to_numpy()
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(users)) + 1])
+
+            group_users = users[starts].tolist()
+            if len(set(group_users)) != len(group_users) or not finished.isdisjoint(group_users[:-1]):
+                raise ValueError(f"{path}: rows are not grouped by user, cannot truncate to top-{top_n}")
+
+            carry = df.iloc[starts[-1]:]
+            done = df.iloc[: starts[-1]]
+            finished.update(group_users[:-1])
+            if len(done):
+                yield top_n_frame(done, top_n, ranked)
+
+    if carry is not None and len(carry):
+        yield top_n_frame(carry, top_n, ranked)
+
+
+# --- loading ---
+
+def load_batch(conn, table, names, df, tmp_dir, use_insert):
+    if use_insert:
+        if conn is None:  # dry run
+            return
+        # pymysql turns executemany on a VALUES statement into multi-row INSERTs
+        sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+        with conn.cursor() as cur:
+            cur.executemany(sql, df.itertuples(index=False, name=None))
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".tsv", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            df.round(ROUND_DECIMALS).to_csv(f, sep="\t", header=False, index=False)
+        if conn is not None:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+                    "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                    f"({', '.join(names)})",
+                    (path,),
+                )
+    finally:
+        os.remove(path)
+
+
+def worker(tasks, table, names, tmp_dir, use_insert, dry_run, stats, lock, errors):
+    conn = None
+    try:
+        if not dry_run:
+            conn = get_connection()
+            with conn.cursor() as cur:
+                cur.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        while True:
+            df = tasks.get()
+            if df is None:
+                return
+            if errors:
+                continue  # drain after a failure elsewhere
+            load_batch(conn, table, names, df, tmp_dir, use_insert)
+            with lock:
+                stats["rows"] += len(df)
+                stats["batches"] += 1
+                if stats["batches"] % PROGRESS_EVERY == 0:
+                    rate = stats["rows"] / (time.time() - stats["t0"])
+                    print(f"  {stats['rows']} rows loaded ({rate:.0f} rows/s)")
+    except Exception as e:  # reported by the main thread
+        errors.append(e)
+        while tasks.get() is not None:  # keep the producer from blocking
+            pass
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def swap_in(conn, table, staging):
+    with conn.cursor() as cur:
+        cur.execute("SHOW TABLES LIKE %s", (table,))
+        if cur.fetchone():
+            # one RENAME TABLE statement swaps both names atomically
+            cur.execute(f"DROP TABLE IF EXISTS {table}_old")
+            cur.execute(f"RENAME TABLE {table} TO {table}_old, {staging} TO {table}")
+            cur.execute(f"DROP TABLE {table}_old")
+        else:
+            cur.execute(f"RENAME TABLE {staging} TO {table}")
+
+
+def bulk_import(kind, path, top_n=None, workers=NUM_WORKERS, use_insert=False, dry_run=False, table=None):
+    spec = TABLES[kind]
+    table = table or spec["table"]
+    staging = f"{table}_staging"
+    names = column_names(spec)
+
+    paths = [path] if kind == "neighbor-ranks" else input_files(path)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if not paths or missing:
+        print(f"input not found: {missing[0] if missing else path}")
+        exit(1)
+
+    if kind in ("predictions", "prediction-ranks"):
+        ranked = kind == "prediction-ranks"
+        batches = (df[names] for df in prediction_batches(paths, top_n, ranked))
+    elif kind == "neighbor-ranks":
+        batches = neighbor_rank_batches(path, names)
+    else:
+        batches = (df for p in paths for df in neighbor_batches(p, names))
+
+    conn = None
+    if not dry_run:
+        conn = get_connection()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {staging}")
+            cur.execute(f"CREATE TABLE {staging} ({', '.join(spec['columns'])}) ENGINE=InnoDB")
+
+    mode = "dry run" if dry_run else ("INSERT" if use_insert else "LOAD DATA")
+    print(f"importing {', '.join(paths[:3])}{' ...' if len(paths) > 3 else ''} -> {table} "
+          f"({mode}, {workers} workers{f', top-{top_n}' if top_n else ''})")
+
+    tmp_dir = tempfile.mkdtemp(prefix="bulk_import_")
+    tasks = queue.Queue(maxsize=2 * workers)  # bounded: reading never runs far ahead of loading
+    stats = {"rows": 0, "batches": 0, "t0": time.time()}
+    lock = threading.Lock()
+    errors = []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(tasks, staging, names, tmp_dir, use_insert, dry_run, stats, lock, errors),
+            daemon=True,
+        )
+        for _ in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        try:
+            for df in batches:
+                if errors:
+                    break
+                tasks.put(df)
+        finally:
+            for _ in threads:
+                tasks.put(None)
+            for t in threads:
+                t.join()
+        if errors:
+            raise errors[0]
+
+        load_time = time.time() - stats["t0"]
+        print(f"loaded {stats['rows']} rows in {load_time:.2f}s "
+              f"({stats['rows'] / max(load_time, 1e-9):.0f} rows/s)")
+
+        if conn is not None:
+            t0 = time.time()
+            with conn.cursor() as cur:
+                cur.execute(f"ALTER TABLE {staging} {', '.join(spec['indexes'])}")
+            print(f"indexes built in {time.time() - t0:.2f}s")
+            swap_in(conn, table, staging)
+            print(f"{staging} swapped in as {table}")
+    except BaseException:
+        if conn is not None:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {staging}")
+        raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if conn is not None:
+            conn.close()
+
+    total = time.time() - stats["t0"]
+    print(f"total     : {total:.2f}s ({stats['rows'] / max(total, 1e-9):.0f} rows/s end to end)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bulk import Hadoop / prediction outputs into MySQL")
+    parser.add_argument("kind", choices=sorted(TABLES))
+    parser.add_argument("path", help="input file, or a directory of part-* files")
+    parser.add_argument("--top-n", type=int, help="predictions: keep the best N per user while streaming")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--insert", action="store_true", help="multi-row INSERT instead of LOAD DATA LOCAL")
+    parser.add_argument("--table", help="target table (default per kind)")
+    parser.add_argument("--dry-run", action="store_true", help="read, truncate and batch only; no MySQL")
+    args = parser.parse_args()
+
+    BATCH_ROWS = args.batch_rows
+    bulk_import(args.kind, args.path, args.top_n, max(1, args.workers), args.insert, args.dry_run, args.table)
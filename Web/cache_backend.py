@@ -0,0 +1,141 @@
+# cache_backend.py
+# cache tier for TMDB metadata and per-user dashboard data, one interface
+# (get_many / set_many, JSON values) with two backends:
+#   CACHE_URL unset                      -> LocalCache: in-process LRU, per worker
+#   CACHE_URL=redis://127.0.0.1:6379/0   -> RedisCache: shared by every worker / host
+#                                           (pip install redis)
+# Cache errors never fail a request: a Redis outage reads as misses.
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis  # optional: only needed for a redis:// CACHE_URL
+except ImportError:
+    redis = None
+
+CACHE_URL = os.environ.get("CACHE_URL")
+KEY_PREFIX = "cse482:"
+LOCAL_MAX_ITEMS = 100000
+MGET_CHUNK = 500  # keys per MGET inside one pipelined round trip
+
+
+class CacheBackend:
+    # get_many(keys) -> {key: value} of the hits; set_many({key: value}, ttl seconds)
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value, ttl):
+        self.set_many({key: value}, ttl)
+
+
+class LocalCache(CacheBackend):
+    # thread-safe LRU with per-entry expiry; values are stored as JSON like in Redis,
+    # so both backends hand out independent copies
+    def __init__(self, max_items=LOCAL_MAX_ITEMS):
+        self.max_items = max_items
+        self.items = OrderedDict()  # key -> (expires_at, json)
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        found = {}
+        with self.lock:
+            for key in keys:
+                entry = self.items.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self.items[key]
+                    continue
+                self.items.move_to_end(key)
+                found[key] = entry[1]
+        return {k: json.loads(v) for k, v in found.items()}
+
+    def set_many(self, mapping, ttl):
+        expires = time.time() + ttl
+        encoded = [(k, json.dumps(v)) for k, v in mapping.items()]
+        with self.lock:
+            for key, value in encoded:
+                self.items[key] = (expires, value)
+                self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.items.pop(key, None)
+
+
+class RedisCache(CacheBackend):
+    # Redis (or any server speaking its protocol); a page's keys are fetched with
+    # MGETs pipelined into one round trip, writes as one pipeline of SET ... EX
+    def __init__(self, url, prefix=KEY_PREFIX):
+        if redis is None:
+            raise ImportError(f"CACHE_URL={url} needs the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        pipe = self.client.pipeline(transaction=False)
+        for i in range(0, len(keys), MGET_CHUNK):
+            pipe.mget([self.prefix + k for k in keys[i : i + MGET_CHUNK]])
+        try:
+            chunks = pipe.execute()
+        except redis.RedisError as e:
+            print(f"[WARN] cache get failed: {e}")
+            return {}
+        values = [v for chunk in chunks for v in chunk]
+        return {k: json.loads(v) for k, v in zip(keys, values) if v is not None}
+
+    def set_many(self, mapping, ttl):
+        if not mapping:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"[WARN] cache set failed: {e}")
+
+    def delete_many(self, keys):
+        keys = [self.prefix + k for k in keys]
+        if not keys:
+            return
+        try:
+            self.client.delete(*keys)
+        except redis.RedisError as e:
+            print(f"[WARN] cache delete failed: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def make_cache(url=None):
+    if url:
+        return RedisCache(url)
+    return LocalCache()
+
+
+def get_cache():
+    # process-wide cache for CACHE_URL, created on first use
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = make_cache(CACHE_URL)
+    return _cache
+
+
+def set_cache(cache):
+    # swap the backend (tests, or a cache configured in code)
+    global _cache
+    _cache = cache
@@ -0,0 +1,114 @@
+# check_redis_cache.py
+# round-trip check of RedisCache (cache_backend.py) against a real server: starts a
+# throwaway redis-server on a free port (no persistence), then checks get / set,
+# get_many across several MGET chunks, TTL expiry, the key prefix, and that a stopped
+# server reads as misses instead of raising.
+#
+#   python check_redis_cache.py                        # redis-server from PATH
+#   python check_redis_cache.py --server /path/to/redis-server
+import argparse
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import cache_backend
+from cache_backend import MGET_CHUNK, RedisCache
+
+STARTUP_TIMEOUT = 10.0  # seconds
+
+failures = []
+
+
+def check(name, ok):
+    print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    if not ok:
+        failures.append(name)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(binary, port):
+    proc = subprocess.Popen(
+        [binary, "--port", str(port), "--bind", "127.0.0.1", "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{binary} exited with {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError(f"{binary} not listening on {port} after {STARTUP_TIMEOUT}s")
+
+
+def run_checks(url):
+    cache = RedisCache(url)
+    raw = cache.client
+
+    cache.set("a", {"poster_path": "/x.jpg", "n": [1, 2]}, 60)
+    check("get after set", cache.get("a") == {"poster_path": "/x.jpg", "n": [1, 2]})
+    check("get of a missing key is None", cache.get("missing") is None)
+
+    n = 2 * MGET_CHUNK + 7  # three MGETs in one pipeline
+    cache.set_many({f"k{i}": i for i in range(0, n, 2)}, 60)
+    keys = [f"k{i}" for i in range(n)]
+    hits = cache.get_many(keys)
+    check(f"get_many over {n} keys: only the hits", hits == {f"k{i}": i for i in range(0, n, 2)})
+    check("get_many of no keys", cache.get_many([]) == {})
+
+    check("keys are stored under the prefix", raw.get(cache.prefix + "a") is not None and raw.get("a") is None)
+    check("every stored key has the prefix", all(k.decode().startswith(cache.prefix) for k in raw.scan_iter()))
+    other = RedisCache(url, prefix="other:")
+    other.set("a", "other value", 60)
+    check("another prefix does not see these keys", other.get("k0") is None)
+    check("same key under two prefixes", cache.get("a")["poster_path"] == "/x.jpg" and other.get("a") == "other value")
+    other.delete_many(["a"])
+    check("delete_many stays in its prefix", other.get("a") is None and cache.get("a") is not None)
+
+    cache.set("short", "v", 1)
+    check("TTL set on the key", 0 < raw.ttl(cache.prefix + "short") <= 1)
+    check("value before expiry", cache.get("short") == "v")
+    time.sleep(1.5)
+    check("miss after expiry", cache.get("short") is None)
+    cache.set("zero", "v", 0)  # clamped to 1s: SET ... EX 0 is an error
+    check("TTL 0 is stored for 1s", raw.ttl(cache.prefix + "zero") == 1)
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RedisCache round trip against a throwaway redis-server")
+    parser.add_argument("--server", default=shutil.which("redis-server"), help="redis-server binary")
+    args = parser.parse_args()
+    if cache_backend.redis is None:
+        parser.error("needs the redis package (pip install redis)")
+    if not args.server:
+        parser.error("redis-server not found on PATH, pass --server")
+
+    port = free_port()
+    proc = start_server(args.server, port)
+    try:
+        cache = run_checks(f"redis://127.0.0.1:{port}/0")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    # server gone: reads are misses, writes are dropped, nothing raises
+    check("server down: get_many is a miss", cache.get_many(["a", "k0"]) == {})
+    cache.set("a", 1, 60)
+
+    print(f"{len(failures)} failed" if failures else "all passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 # data_loader.py
+import hashlib
+import os
+import sys
 import pymysql
 from collections import defaultdict
 
+from genre_index import GenreIndex
+from id_maps import load_id_maps, raw_lookup
+
+# compiled neighbor store reader (eval/neighbor_store.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "eval"))
+from neighbor_store import NeighborStore  # noqa: E402
+from mf_model import MFRecommendations, load_model  # noqa: E402
+
 # MySQL connection config
 DB_CONFIG = {
     "host": "localhost",
@@ -14,10 +25,88 @@ DB_CONFIG = {
 }
 
 
+# True when ratings_train / user_neighbor_ranks / user_rec_ranks were loaded
+# from re-indexed files (data-preprocessing/reindex.py); ids are mapped back to
+# MovieLens ids on load, so the rest of the app only sees raw ids
+DENSE_IDS = False
+
+# compiled user_topk_neighbors.txt.nbr (eval/neighbor_store.py); when set, neighbor
+# rows are read from its memory map on demand instead of parsed out of MySQL
+NEIGHBORS_STORE = None
+
+# matrix factorization model dir (eval/train_mf.py); when set, recommendations are
+# dot-product top-N computed per user on demand instead of read from user_rec_ranks
+MF_MODEL = None
+MF_TOP_N = 100
+
+# serving tables written by bulk_import.py (neighbor-ranks / prediction-ranks):
+# one row per (userId, rank) with PRIMARY KEY (userId, rank), so a user's list
+# is one clustered range scan already in rank order
+NEIGHBORS_TABLE = "user_neighbor_ranks"
+RECS_TABLE = "user_rec_ranks"
+
+# user shard served by this process, "k/N" (e.g. SHARD=1/4 python app.py): only users
+# with userId % N == k are loaded; router.py sends each user's requests to its shard
+SHARD = os.environ.get("SHARD")
+
+
 def get_connection():
     return pymysql.connect(**DB_CONFIG)  # new MySQL connection
 
 
+def shard_spec():
+    # (k, N) of SHARD, or None when this process serves every user
+    if not SHARD:
+        return None
+    k, n = (int(x) for x in SHARD.split("/"))
+    if not 0 <= k < n:
+        raise ValueError(f"SHARD={SHARD}: need 0 <= k < N")
+    return k, n
+
+
+def in_shard(user_id):
+    spec = shard_spec()
+    return spec is None or int(user_id) % spec[1] == spec[0]
+
+
+def shard_condition():
+    # (SQL condition, args) keeping this shard's users, or None. Raw ids only: with
+    # DENSE_IDS the table ids are not the ids users are routed by, so the loaders
+    # filter after translation instead
+    spec = shard_spec()
+    if spec is None or DENSE_IDS:
+        return None
+    return "userId MOD %s = %s", (spec[1], spec[0])
+
+
+def shard_filter():
+    # per-row check for the loaders when shard_condition() could not filter in SQL, else None
+    spec = shard_spec()
+    if spec is None or not DENSE_IDS:
+        return None
+    k, n = spec
+    return lambda uid: uid % n == k
+
+
+def where(conditions):
+    # " WHERE a AND b" + args from [(condition, args) or None, ...]
+    conditions = [c for c in conditions if c is not None]
+    if not conditions:
+        return "", ()
+    sql = " WHERE " + " AND ".join(c for c, _ in conditions)
+    return sql, tuple(a for _, args in conditions for a in args)
+
+
+def id_translators():
+    # (user, movie) functions: table id -> raw MovieLens id
+    if not DENSE_IDS:
+        return int, int
+    maps = load_id_maps()
+    users = raw_lookup(maps["users"])
+    movies = raw_lookup(maps["movies"])
+    return (lambda x: users[int(x)]), (lambda x: movies[int(x)])
+
+
 def load_movies():
     movies = {}
 
@@ -40,19 +129,26 @@ def load_movies():
 
 def load_ratings():
     user_ratings = defaultdict(list)  # {userId: [(movieId, rating), ...]}
+    to_user, to_movie = id_translators()
+
+    cond, args = where([shard_condition()])
+    keep = shard_filter()
 
     conn = get_connection()
     try:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT userId, movieId, rating "
-                "FROM ratings_train"
+                "FROM ratings_train" + cond,
+                args,
             )
             rows = cur.fetchall()
 
         for row in rows:
-            uid = int(row["userId"])
-            mid = int(row["movieId"])
+            uid = to_user(row["userId"])
+            if keep is not None and not keep(uid):
+                continue
+            mid = to_movie(row["movieId"])
             r = float(row["rating"])
             user_ratings[uid].append((mid, r))
     finally:
@@ -62,57 +158,69 @@ def load_ratings():
 
 
 def load_neighbors(topk=50):
-    user_neighbors = {}  # {userId: [(neighborId, similarity), ...]}
+    if NEIGHBORS_STORE is not None:
+        return load_neighbor_store(NEIGHBORS_STORE, topk)
+
+    user_neighbors = defaultdict(list)  # {userId: [(neighborId, similarity), ...]}
+    to_user, _ = id_translators()
+
+    rank = ("`rank` <= %s", (topk,)) if topk is not None else None
+    cond, args = where([rank, shard_condition()])
+    keep = shard_filter()
+    sql = f"SELECT userId, neighborId, sim FROM {NEIGHBORS_TABLE}{cond} ORDER BY userId, `rank`"  # PK order: no sort
 
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute("SELECT userId, neighbors FROM user_topk_neighbors")
+            cur.execute(sql, args)
             rows = cur.fetchall()
 
         for row in rows:
-            uid = int(row["userId"])
-            neigh_line = row["neighbors"] or "" 
-            pairs = []
-            for item in neigh_line.split(","):
-                item = item.strip()
-                if not item or ":" not in item:
-                    continue
-                nid_str, sim_str = item.split(":", 1)
-                try:
-                    nid = int(nid_str)
-                    sim = float(sim_str)
-                except ValueError:
-                    continue
-                pairs.append((nid, sim))
-
-            # optional: enforce top-k cutoff
-            if topk is not None and len(pairs) > topk:
-                pairs = pairs[:topk]
-
-            user_neighbors[uid] = pairs
+            uid = to_user(row["userId"])
+            if keep is not None and not keep(uid):
+                continue
+            user_neighbors[uid].append((to_user(row["neighborId"]), float(row["sim"])))
     finally:
         conn.close()
 
     return user_neighbors
 
 
+def load_neighbor_store(path, topk=50):
+    store = NeighborStore(path, topk)  # read-only {userId: [(neighborId, sim), ...]}
+    if not DENSE_IDS:
+        return store
+
+    to_user, _ = id_translators()
+    return {
+        to_user(uid): [(to_user(nid), sim) for nid, sim in store[uid]]
+        for uid in store
+        if in_shard(to_user(uid))
+    }
+
+
 def load_recommendations():
     user_recs = defaultdict(list)  # {userId: [(movieId, predicted_rating), ...]}
+    to_user, to_movie = id_translators()
+
+    cond, args = where([shard_condition()])
+    keep = shard_filter()
 
     conn = get_connection()
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT userId, movieId, prediction "
-                "FROM user_item_predictions "
-                "ORDER BY userId, prediction DESC"  # sorted by score within each user
+                f"SELECT userId, movieId, prediction FROM {RECS_TABLE}{cond} "
+                "ORDER BY userId, `rank`",  # primary key order = best first within each user
+                args,
             )
             rows = cur.fetchall()
 
         for row in rows:
-            uid = int(row["userId"])
-            mid = int(row["movieId"])
+            uid = to_user(row["userId"])
+            if keep is not None and not keep(uid):
+                continue
+            mid = to_movie(row["movieId"])
             pred = float(row["prediction"])
             user_recs[uid].append((mid, pred))
     finally:
@@ -121,14 +229,41 @@ def load_recommendations():
     return user_recs
 
 
+def data_version():
+    # changes when an import replaces a table (bulk_import.py renames a new one in)
+    # or a file source is rebuilt; the same in every worker / host, so ETags and
+    # shared cache keys built on it are shared too
+    parts = []
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN (%s, %s, %s, %s) "
+                "ORDER BY TABLE_NAME",
+                ("movies", "ratings_train", NEIGHBORS_TABLE, RECS_TABLE),
+            )
+            parts += [f"{r['TABLE_NAME']}:{r['CREATE_TIME']}:{r['UPDATE_TIME']}" for r in cur.fetchall()]
+    finally:
+        conn.close()
+    for path in (NEIGHBORS_STORE, MF_MODEL):
+        if path is not None:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
 def load_all_data():
     movies = load_movies()
     user_ratings = load_ratings()
     user_neighbors = load_neighbors()
-    user_recs = load_recommendations()
+    if MF_MODEL is not None:
+        user_recs = MFRecommendations(load_model(MF_MODEL), user_ratings, MF_TOP_N)
+    else:
+        user_recs = load_recommendations()
 
-    # all users that appear in either ratings or recommendations
-    all_users = sorted(set(user_ratings.keys()) | set(user_recs.keys()))
+    # all users (of this shard) that appear in either ratings or recommendations;
+    # the neighbor store / MF model are memory maps of every user, only touched on lookup
+    all_users = sorted(u for u in set(user_ratings.keys()) | set(user_recs.keys()) if in_shard(u))
 
     return {
         "movies": movies,
@@ -136,4 +271,27 @@ def load_all_data():
         "user_neighbors": user_neighbors,
         "user_recs": user_recs,
         "all_users": all_users,
-    }
\ No newline at end of file
+        "genre_index": GenreIndex(movies),  # genre= filters on the candidate lists
+    }
+
+
+# single-user reads (table ids): WHERE userId = ? ORDER BY rank LIMIT n is a
+# primary key range read, no filesort and no string parsing
+def fetch_user_neighbors(conn, user_id, topk=50):
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT neighborId, sim FROM {NEIGHBORS_TABLE} "
+            "WHERE userId = %s ORDER BY `rank` LIMIT %s",
+            (user_id, topk),
+        )
+        return [(int(r["neighborId"]), float(r["sim"])) for r in cur.fetchall()]
+
+
+def fetch_user_recs(conn, user_id, n=100):
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT movieId, prediction FROM {RECS_TABLE} "
+            "WHERE userId = %s ORDER BY `rank` LIMIT %s",
+            (user_id, n),
+        )
+        return [(int(r["movieId"]), float(r["prediction"])) for r in cur.fetchall()]
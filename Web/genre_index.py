@@ -0,0 +1,75 @@
+# genre_index.py
+# genre bitmask per movie, built once per data load from movies.genres
+# ("Action|Comedy|..."): bit i = GENRES[i]. A user's candidate list is filtered by genre
+# with one array lookup + bitwise AND instead of splitting each candidate's genre string.
+import numpy as np
+
+NO_GENRE = "(no genres listed)"  # MovieLens placeholder, not a genre of its own
+
+
+class GenreIndex:
+    def __init__(self, movies):
+        # movies: {movieId: {"title": ..., "genres": "A|B|..."}}
+        names = set()
+        for m in movies.values():
+            names.update(g for g in m["genres"].split("|") if g and g != NO_GENRE)
+        self.genres = sorted(names)
+        if len(self.genres) > 32:
+            raise ValueError(f"{len(self.genres)} genres do not fit a 32-bit mask")
+        self.bits = {g: 1 << i for i, g in enumerate(self.genres)}
+        self.lower = {g.lower(): g for g in self.genres}
+
+        # dense by movieId (MovieLens ids stay below ~300k: ~1MB); unknown movies -> 0
+        size = max(movies, default=0) + 1
+        self.masks = np.zeros(size, dtype=np.uint32)
+        for mid, m in movies.items():
+            mask = 0
+            for g in m["genres"].split("|"):
+                mask |= self.bits.get(g, 0)
+            self.masks[mid] = mask
+
+    def parse(self, values):
+        # request values ("comedy", "Comedy,Drama", ...) -> sorted genre names, None if one is unknown
+        names = set()
+        for value in values:
+            for name in value.split(","):
+                if not name.strip():
+                    continue
+                genre = self.lower.get(name.strip().lower())
+                if genre is None:
+                    return None
+                names.add(genre)
+        return tuple(sorted(names))
+
+    def mask(self, genres):
+        mask = 0
+        for genre in genres:
+            mask |= self.bits[genre]
+        return mask
+
+    def movie_masks(self, movie_ids):
+        ids = np.asarray(movie_ids, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(self.masks))
+        return np.where(known, self.masks[np.where(known, ids, 0)], 0).astype(np.uint32)
+
+    def filter(self, pairs, mask, n=None):
+        # [(movieId, score), ...] in rank order -> the first n whose movie has every genre in mask
+        if not mask or not pairs:
+            return list(pairs)[:n]
+        ids = np.fromiter((mid for mid, _ in pairs), dtype=np.int64, count=len(pairs))
+        keep = np.flatnonzero((self.movie_masks(ids) & np.uint32(mask)) == mask)
+        return [pairs[i] for i in keep[:n]]
+
+    def top_by_genre(self, pairs, n):
+        # {genre: first n of pairs in that genre} for every genre, from one (candidates x genres) AND
+        if not pairs:
+            return {}
+        ids = np.fromiter((mid for mid, _ in pairs), dtype=np.int64, count=len(pairs))
+        bits = np.array([self.bits[g] for g in self.genres], dtype=np.uint32)
+        hits = (self.movie_masks(ids)[:, None] & bits[None, :]) != 0
+        out = {}
+        for j, genre in enumerate(self.genres):
+            keep = np.flatnonzero(hits[:, j])[:n]
+            if len(keep):
+                out[genre] = [pairs[i] for i in keep]
+        return out
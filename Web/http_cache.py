@@ -0,0 +1,64 @@
+# http_cache.py
+# conditional GETs and response compression for the Flask app
+#   - ETag from (data version, user, ...): a repeat visit with If-None-Match gets a
+#     304 before any page work is done (views.py compares and sets them)
+#   - gzip / brotli (pip install brotli) for text responses above COMPRESS_MIN_BYTES
+import gzip
+import hashlib
+
+from flask import request
+
+try:
+    import brotli  # optional: br is only offered when installed
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024  # smaller bodies are sent as is
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5         # 11 is much slower for a few % on HTML
+COMPRESSIBLE = {"text/html", "text/plain", "text/css", "application/json", "application/javascript"}
+
+
+def make_etag(*parts):
+    return hashlib.sha1(":".join(map(str, parts)).encode("utf-8")).hexdigest()[:20]
+
+
+def pick_encoding(accept):
+    if brotli is not None and accept.quality("br") > 0:
+        return "br"
+    if accept.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress_body(body, accept):
+    # (body, Content-Encoding or None) for an Accept-Encoding; also used by asgi_app.py
+    encoding = pick_encoding(accept)
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), encoding
+
+
+def compress_response(resp):
+    # after_request hook
+    resp.headers.add("Vary", "Accept-Encoding")
+    if (
+        resp.status_code != 200
+        or resp.direct_passthrough
+        or resp.is_streamed
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESSIBLE
+    ):
+        return resp
+
+    body, encoding = compress_body(resp.get_data(), request.accept_encodings)
+    if encoding is not None:
+        resp.set_data(body)  # also sets Content-Length
+        resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -0,0 +1,35 @@
+# id_maps.py
+# dense <-> raw MovieLens ids, from the mapping written by data-preprocessing/reindex.py
+import os
+
+import numpy as np
+
+ID_MAP_DIR = "dense"  # reindex.py output dir (user_ids.npy, movie_ids.npy)
+
+
+def load_id_maps(map_dir=ID_MAP_DIR):
+    # raw id of every dense id, sorted (dense id = position)
+    return {
+        "users": np.load(os.path.join(map_dir, "user_ids.npy"), mmap_mode="r"),
+        "movies": np.load(os.path.join(map_dir, "movie_ids.npy"), mmap_mode="r"),
+    }
+
+
+def to_raw(raw_ids, dense):
+    # dense id(s) -> raw id(s); scalars stay scalars
+    if np.isscalar(dense):
+        return int(raw_ids[dense])
+    return np.asarray(raw_ids)[np.asarray(dense, dtype=np.int64)]
+
+
+def to_dense(raw_ids, raw):
+    # raw id(s) -> dense id(s), -1 for ids that were not re-indexed
+    values = np.atleast_1d(np.asarray(raw, dtype=np.int64))
+    pos = np.minimum(np.searchsorted(raw_ids, values), len(raw_ids) - 1)
+    dense = np.where(np.asarray(raw_ids)[pos] == values, pos, -1)
+    return int(dense[0]) if np.isscalar(raw) else dense
+
+
+def raw_lookup(raw_ids):
+    # plain list for per-row translation in the loaders: raw = lookup[dense]
+    return np.asarray(raw_ids).tolist()
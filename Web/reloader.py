@@ -0,0 +1,86 @@
+# reloader.py
+# zero-downtime reload of the data the app serves:
+#   load() builds a complete new data set in a background thread while requests keep
+#   using the current one, then swap(new) replaces it with one reference assignment.
+#   Requests that already took the old reference finish on it; the old version is
+#   freed when the last of them drops it (gc.collect() right after the swap for cycles).
+import gc
+import os
+import threading
+import time
+
+
+class DataReloader:
+    def __init__(self, load, swap, watch=(), interval=5.0):
+        self.load = load          # () -> new data set
+        self.swap = swap          # new data set -> None (installs it)
+        self.watch_paths = list(watch)
+        self.interval = interval  # seconds between mtime checks of watch_paths
+        self.lock = threading.Lock()  # held while a reload runs: one at a time
+        self.version = 1
+        self.loaded_at = time.time()
+        self.last_error = None
+        self.last_seconds = None
+
+    def reload(self):
+        # start a background reload; False when one is already running
+        if not self.lock.acquire(blocking=False):
+            return False
+        threading.Thread(target=self._run, name="data-reload", daemon=True).start()
+        return True
+
+    def _run(self):
+        try:
+            t0 = time.time()
+            print(f"reload {self.version + 1}: loading...")
+            try:
+                new = self.load()
+            except Exception as e:  # keep serving the current version
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"reload failed, still serving version {self.version}: {self.last_error}")
+                return
+            self.swap(new)
+            del new
+            self.version += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            self.last_seconds = self.loaded_at - t0
+            gc.collect()
+            print(f"reload {self.version}: swapped in after {self.last_seconds:.2f}s")
+        finally:
+            self.lock.release()
+
+    def status(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reloading": self.lock.locked(),
+            "last_seconds": self.last_seconds,
+            "last_error": self.last_error,
+        }
+
+    # --- file watch ---
+
+    def _mtimes(self):
+        out = {}
+        for path in self.watch_paths:
+            try:
+                out[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                out[path] = None  # missing: creating it counts as a change
+        return out
+
+    def start_watch(self):
+        # poll watch_paths; any mtime change triggers a reload
+        if not self.watch_paths:
+            return
+        threading.Thread(target=self._watch, name="data-watch", daemon=True).start()
+
+    def _watch(self):
+        seen = self._mtimes()
+        while True:
+            time.sleep(self.interval)
+            now = self._mtimes()
+            if now != seen and self.reload():
+                print(f"reload triggered by {[p for p in now if now[p] != seen[p]]}")
+                seen = now
@@ -0,0 +1,153 @@
+# router.py
+# thin routing layer in front of user-sharded app.py processes: shard k of N runs with
+# SHARD=k/N and loads only users with userId % N == k (data_loader.py). Requests for a
+# user (login, dashboard, API) go to shard userId % N, the rest to a fixed shard.
+#
+#   python router.py --shards 4     # local test: 4 app.py shards on ports 5001-5004, router on 5000
+#   SHARD_URLS=http://127.0.0.1:5001,http://127.0.0.1:5002 python router.py   # shard k = k-th url
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import urllib3
+from flask import Flask, Response, redirect, request, session
+
+SHARD_URLS = [u.rstrip("/") for u in os.environ.get("SHARD_URLS", "").split(",") if u]
+TIMEOUT = 30.0          # seconds per forwarded request
+STARTUP_TIMEOUT = 600   # seconds to wait for spawned shards to load their data
+
+# hop-by-hop / recomputed headers, not copied between the two connections
+SKIP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te",
+    "trailer", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+app = Flask(__name__)
+app.secret_key = "cse482-secret"  # same as app.py: the router reads userId from the session cookie
+
+# no cookie jar (unlike requests.Session): shard cookies must only reach their own client
+http = urllib3.PoolManager(maxsize=32, retries=False, timeout=TIMEOUT)
+
+
+def shard_for(user_id):
+    return SHARD_URLS[int(user_id) % len(SHARD_URLS)]
+
+
+def forward(base_url):
+    # replay the request on a shard and pass its response through unchanged
+    # (still compressed, redirects and Set-Cookie included)
+    url = base_url + request.full_path if request.query_string else base_url + request.path
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in SKIP_HEADERS}
+    headers["X-Forwarded-For"] = request.remote_addr or ""
+    try:
+        resp = http.request(
+            request.method, url, body=request.get_data(cache=True), headers=headers,
+            redirect=False, decode_content=False,
+        )
+    except urllib3.exceptions.HTTPError as e:
+        return Response(f"shard {base_url} unavailable: {e}\n", 502, mimetype="text/plain")
+    out = [(k, v) for k, v in resp.headers.items() if k.lower() not in SKIP_HEADERS]
+    return Response(resp.data, resp.status, out)
+
+
+@app.route("/login", methods=["GET", "POST"])
+def login():
+    if request.method == "POST":
+        request.get_data(cache=True)  # read the raw body first: form parsing then reuses it
+        try:
+            user_id = int(request.form["user_id"])
+        except (KeyError, ValueError):
+            user_id = 0  # any shard renders the error
+        return forward(shard_for(user_id))
+    return forward(SHARD_URLS[0])
+
+
+@app.route("/dashboard")
+def dashboard():
+    user_id = session.get("user_id")
+    if user_id is None:
+        return redirect("/login")
+    return forward(shard_for(user_id))
+
+
+@app.route("/api/users/<int:user_id>/<path:rest>")
+def api_user(user_id, rest):
+    return forward(shard_for(user_id))
+
+
+@app.route("/poster/<int:movie_id>")
+def poster(movie_id):
+    return forward(SHARD_URLS[movie_id % len(SHARD_URLS)])  # each poster cached on one shard
+
+
+@app.route("/admin/reload", methods=["GET", "POST"])
+def admin_reload():
+    # fan out: every shard reloads / reports its own status
+    statuses = []
+    for url in SHARD_URLS:
+        resp = forward(url)
+        try:
+            body = json.loads(resp.get_data())
+        except ValueError:
+            body = {"error": resp.get_data(as_text=True).strip()}
+        statuses.append({"url": url, "status": resp.status_code, **body})
+    code = max(s["status"] for s in statuses)
+    return Response(json.dumps({"shards": statuses}, indent=2), code, mimetype="application/json")
+
+
+@app.route("/", defaults={"path": ""})
+@app.route("/<path:path>", methods=["GET", "POST"])
+def other(path):
+    return forward(SHARD_URLS[0])
+
+
+def spawn_shards(n, base_port):
+    # n local app.py processes, SHARD=k/n on base_port + k
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    procs, urls = [], []
+    for k in range(n):
+        env = dict(os.environ, SHARD=f"{k}/{n}", PORT=str(base_port + k))
+        procs.append(subprocess.Popen([sys.executable, script], env=env))
+        urls.append(f"http://127.0.0.1:{base_port + k}")
+    return procs, urls
+
+
+def wait_ready(urls, procs):
+    deadline = time.time() + STARTUP_TIMEOUT
+    pending = list(urls)
+    while pending:
+        if any(p.poll() is not None for p in procs):
+            raise RuntimeError("a shard exited during startup")
+        if time.time() > deadline:
+            raise RuntimeError(f"shards not up after {STARTUP_TIMEOUT}s: {pending}")
+        try:
+            http.request("GET", pending[0] + "/admin/reload", timeout=2.0)
+            print(f"shard up: {pending.pop(0)}")
+        except urllib3.exceptions.HTTPError:
+            time.sleep(1.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="route requests to user-sharded app.py processes")
+    parser.add_argument("--shards", type=int, default=0, help="spawn N local shards instead of SHARD_URLS")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--shard-port", type=int, default=5001, help="first local shard port")
+    args = parser.parse_args()
+
+    procs = []
+    if args.shards:
+        procs, SHARD_URLS[:] = spawn_shards(args.shards, args.shard_port)
+    if not SHARD_URLS:
+        parser.error("set SHARD_URLS or --shards N")
+
+    try:
+        if procs:
+            wait_ready(SHARD_URLS, procs)
+        print(f"routing {len(SHARD_URLS)} shards: {', '.join(SHARD_URLS)}")
+        app.run(host="127.0.0.1", port=args.port, debug=False, threaded=True)
+    finally:
+        for p in procs:
+            p.terminate()
@@ -0,0 +1,384 @@
+# views.py
+# request logic shared by app.py (Flask) and asgi_app.py (Quart): each handler here takes
+# the request's data version and parsed request values and returns a result
+# (Page / Json / File / Redirect / Login / NotModified / Error) that the app turns into its
+# own response. Blocking I/O (cache, MySQL, TMDB, poster files) stays in the apps, so the
+# async one can await it; the dashboard is split around it (DashboardJob).
+import glob
+import hashlib
+import os
+
+import http_cache
+from Crawler.config import POSTER_THUMB_WIDTHS
+from Crawler.tmdb_service import get_poster_base_url
+
+# pages carry an ETag of (data version, user, ...) and are revalidated on every visit:
+# an unchanged page costs a 304 and no page work
+PAGE_CACHE = "private, no-cache"   # per-session pages
+API_CACHE = "public, no-cache"
+
+# posters: served from the local cache by /poster/<movie_id> instead of linking to the TMDB CDN
+POSTER_PROXY = True
+POSTER_THUMB_WIDTH = 92            # dashboard thumbnails (shown at 40x60 CSS px)
+POSTER_MAX_AGE = 7 * 24 * 3600     # seconds; revalidated by content-hash ETag afterwards
+
+# built dashboard data per (data version, user) in the cache tier (cache_backend.py,
+# CACHE_URL): a worker that did not build it still skips the TMDB / MySQL work
+DASHBOARD_CACHE_TTL = 600          # seconds
+DASHBOARD_RETRY_TTL = 60           # seconds, when some movies had no TMDB data yet (fetch failed)
+
+# /admin/reload: X-Admin-Token header, or from localhost when no token is set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+WEB_DIR = os.path.dirname(os.path.abspath(__file__))
+# what pages / JSON bodies are built with besides the data: part of every page ETag and
+# dashboard cache key, so a deploy that changes them is not answered from old copies
+CODE_FILES = ["views.py", "genre_index.py", "templates/*.html"]
+
+
+def code_fingerprint():
+    h = hashlib.sha1()
+    for pattern in CODE_FILES:
+        for path in sorted(glob.glob(os.path.join(WEB_DIR, pattern))):
+            with open(path, "rb") as f:
+                h.update(os.path.relpath(path, WEB_DIR).encode("utf-8") + b"\0" + f.read())
+    return h.hexdigest()[:12]
+
+
+CODE_VERSION = code_fingerprint()  # once per process, at startup
+
+
+def page_etag(*parts):
+    return http_cache.make_etag(CODE_VERSION, *parts)
+
+
+class Page:
+    def __init__(self, template, context, etag=None, cache_control=None):
+        self.template = template
+        self.context = context
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+class Json:
+    def __init__(self, body, status=200, etag=None, cache_control=None):
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+class File:
+    def __init__(self, path, mimetype, etag, cache_control):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        self.weak = False  # content hash: strong
+
+
+class NotModified:
+    def __init__(self, etag, cache_control, weak=True):
+        self.etag = etag
+        self.cache_control = cache_control
+        self.weak = weak
+
+
+class Redirect:
+    def __init__(self, url):
+        self.url = url
+
+
+class Login:
+    # store user_id in the session, then go to the dashboard
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+
+class Error:
+    def __init__(self, status):
+        self.status = status
+
+
+def with_validators(resp, result):
+    # ETag / Cache-Control of a result on a Flask or Quart response
+    etag = getattr(result, "etag", None)
+    if etag is not None:
+        resp.set_etag(etag, weak=getattr(result, "weak", True))
+    cache_control = getattr(result, "cache_control", None)
+    if cache_control is not None:
+        resp.headers["Cache-Control"] = cache_control
+    return resp
+
+
+def unchanged(if_none_match, etag, cache_control):
+    # NotModified when the client already has etag (weak comparison), else None
+    if if_none_match.contains_weak(etag):
+        return NotModified(etag, cache_control)
+    return None
+
+
+def poster_url(movie_id, poster_path, poster_base_url):
+    if not poster_path:
+        return None
+    if POSTER_PROXY:
+        return f"/poster/{movie_id}?w={POSTER_THUMB_WIDTH}"
+    return f"{poster_base_url}{poster_path}"
+
+
+def user_recs_in(d, user_id, genres=(), n=None):
+    # user's recommendations in rank order, only movies having every genre in `genres`:
+    # filtered in memory with the genre bitmask index, no MySQL query
+    rec_list = d["user_recs"].get(user_id, [])
+    if not genres:
+        return rec_list[:n]
+    index = d["genre_index"]
+    return index.filter(rec_list, index.mask(genres), n)
+
+
+def dashboard_movie_ids(d, user_id, genres=()):
+    # movie ids needed for this page (history + recommendations)
+    rated_list = d["user_ratings"].get(user_id, [])
+    rec_list = user_recs_in(d, user_id, genres)
+    return {mid for mid, _ in rated_list} | {mid for mid, _ in rec_list}
+
+
+def dashboard_context(d, user_id, tmdb_map, genres=()):
+    # dashboard.html variables; shared by app.py and asgi_app.py
+    movies = d["movies"]
+    rated_list = d["user_ratings"].get(user_id, [])   # [(movieId, rating), ...]
+    rec_list = user_recs_in(d, user_id, genres)       # [(movieId, prediction), ...]
+    poster_base_url = get_poster_base_url()  # e.g. https://image.tmdb.org/t/p/w342/
+
+    rated_view = []
+    for mid, rating in rated_list:
+        tm = tmdb_map.get(mid, {})
+        poster_path = tm.get("poster_path")
+        overview = tm.get("overview")
+
+        rated_view.append(
+            {
+                "movieId": mid,
+                "title": movies.get(mid, {}).get("title", f"Movie {mid}"),
+                "genres": movies.get(mid, {}).get("genres", ""),
+                "rating": rating,
+                "ml_url": f"https://movielens.org/movies/{mid}",  # link back to MovieLens
+                "poster_path": poster_path,
+                "poster_url": poster_url(mid, poster_path, poster_base_url),
+                "overview": overview,
+            }
+        )
+
+    rec_view = []
+    for mid, pred in rec_list[:30]:  # show top 30 recommendations
+        tm = tmdb_map.get(mid, {})
+        poster_path = tm.get("poster_path")
+        overview = tm.get("overview")
+
+        rec_view.append(
+            {
+                "movieId": mid,
+                "title": movies.get(mid, {}).get("title", f"Movie {mid}"),
+                "genres": movies.get(mid, {}).get("genres", ""),
+                "prediction": pred,
+                "ml_url": f"https://movielens.org/movies/{mid}",
+                "poster_path": poster_path,
+                "poster_url": poster_url(mid, poster_path, poster_base_url),
+                "overview": overview,
+            }
+        )
+
+    # TMDB state of the page (part of its ETag): a page built while TMDB fetches failed
+    # changes its ETag once the data is there
+    shown = [m["movieId"] for m in rated_view + rec_view]
+    tmdb_state = [
+        f"{mid}={tmdb_map[mid].get('poster_path') or ''}" if mid in tmdb_map else f"{mid}-"
+        for mid in shown
+    ]
+
+    neighbor_list = d["user_neighbors"].get(user_id, [])  # similar users for current user
+    neighbor_view = [
+        {"neighborId": nid, "sim": sim}
+        for nid, sim in neighbor_list
+    ]
+
+    return {
+        "user_id": user_id,
+        "rated_movies": rated_view,
+        "recommended_movies": rec_view,
+        "neighbors": neighbor_view,
+        "all_genres": d["genre_index"].genres,  # genre filter choices
+        "genres": list(genres),                 # current filter
+        "tmdb_stamp": http_cache.make_etag(*tmdb_state),
+        "tmdb_complete": all(mid in tmdb_map for mid in shown),
+    }
+
+
+def dashboard_key(d, user_id, genres=()):
+    return f"dashboard:{d['version']}:{CODE_VERSION}:{user_id}:{','.join(genres)}"
+
+
+def movie_json(movies, mid, pred):
+    return {
+        "movieId": mid,
+        "title": movies.get(mid, {}).get("title", f"Movie {mid}"),
+        "genres": movies.get(mid, {}).get("genres", ""),
+        "prediction": pred,
+    }
+
+
+def recommendations_body(d, user_id, n, genres=()):
+    # JSON of /api/users/<user_id>/recommendations
+    movies = d["movies"]
+    return {
+        "userId": user_id,
+        "genres": list(genres),
+        "recommendations": [movie_json(movies, mid, pred) for mid, pred in user_recs_in(d, user_id, genres, n)],
+        "neighbors": [
+            {"neighborId": nid, "sim": sim}
+            for nid, sim in d["user_neighbors"].get(user_id, [])
+        ],
+    }
+
+
+def recommendations_by_genre_body(d, user_id, n):
+    # JSON of /api/users/<user_id>/recommendations/by-genre: top-n per genre, one pass
+    movies = d["movies"]
+    by_genre = d["genre_index"].top_by_genre(d["user_recs"].get(user_id, []), n)
+    return {
+        "userId": user_id,
+        "genres": {
+            genre: [movie_json(movies, mid, pred) for mid, pred in pairs]
+            for genre, pairs in by_genre.items()
+        },
+    }
+
+
+def known_user(d, user_id):
+    # accept only users that appear in ratings or recommendations
+    return user_id in d["user_ratings"] or user_id in d["user_recs"]
+
+
+def admin_reload(method, headers, remote_addr, reloader, status):
+    if ADMIN_TOKEN is not None:
+        if headers.get("X-Admin-Token") != ADMIN_TOKEN:
+            return Error(403)
+    elif remote_addr not in ("127.0.0.1", "::1"):
+        return Error(403)
+
+    if method == "POST" and not reloader.reload():
+        return Json(status(), 409)  # one already running
+    return Json(status(), 202 if method == "POST" else 200)
+
+
+def login(d, method, form, if_none_match):
+    all_users = d["all_users"]
+    if method == "GET":
+        etag = page_etag("login", d["version"])
+        return unchanged(if_none_match, etag, PAGE_CACHE) or Page(
+            "login.html", {"all_users": all_users}, etag, PAGE_CACHE
+        )
+
+    try:
+        user_id = int(form["user_id"])  # parse user id from form
+    except (KeyError, ValueError):
+        return Page("login.html", {"all_users": all_users, "error": "Please input a valid user id."})
+
+    if not known_user(d, user_id):
+        return Page("login.html", {"all_users": all_users, "error": f"User {user_id} not found."})
+    return Login(user_id)
+
+
+class DashboardJob:
+    # a /dashboard request between parsing and rendering: the app looks up `key` in the
+    # cache, on a miss fetches TMDB data for movie_ids(), builds context(tmdb_map) and
+    # stores it for ttl(context) seconds, then returns page(context)
+    def __init__(self, d, user_id, genres, if_none_match):
+        self.d = d
+        self.user_id = user_id
+        self.genres = genres
+        self.if_none_match = if_none_match
+        self.key = dashboard_key(d, user_id, genres)
+
+    def movie_ids(self):
+        return dashboard_movie_ids(self.d, self.user_id, self.genres)
+
+    def context(self, tmdb_map):
+        return dashboard_context(self.d, self.user_id, tmdb_map, self.genres)
+
+    def ttl(self, context):
+        # incomplete TMDB data is retried sooner
+        return DASHBOARD_CACHE_TTL if context["tmdb_complete"] else DASHBOARD_RETRY_TTL
+
+    def page(self, context):
+        # same data version + user + filter + TMDB state -> same page: 304 without rendering
+        # (with a cached context, also without any TMDB / MySQL work)
+        etag = page_etag("dashboard", self.d["version"], self.user_id, *self.genres, context.get("tmdb_stamp", ""))
+        return unchanged(self.if_none_match, etag, PAGE_CACHE) or Page("dashboard.html", context, etag, PAGE_CACHE)
+
+
+def dashboard(d, user_id, args, if_none_match):
+    # DashboardJob, or the final result for a redirect / bad request
+    if user_id is None:
+        return Redirect("/login")
+    genres = d["genre_index"].parse(args.getlist("genre"))  # ?genre=Comedy
+    if genres is None:
+        return Error(400)  # unknown genre
+
+    return DashboardJob(d, user_id, genres, if_none_match)
+
+
+def poster_width(args):
+    width = args.get("w", type=int)
+    return width if width in POSTER_THUMB_WIDTHS else None  # None: original size
+
+
+def poster(hit, if_none_match):
+    # hit: (path, content etag) from the local poster cache, the TMDB CDN url while
+    # the poster is being fetched, or None
+    if hit is None:
+        return Error(404)
+    if isinstance(hit, str):
+        return Redirect(hit)
+    path, etag = hit
+    cache_control = f"public, max-age={POSTER_MAX_AGE}"
+    if if_none_match.contains(etag):
+        return NotModified(etag, cache_control, weak=False)
+    return File(path, "image/jpeg", etag, cache_control)
+
+
+def list_size(d, user_id, args, default):
+    # ?n= as a count in 1..(stored recommendations), None if it is below 1
+    n = args.get("n", default, type=int)
+    if n < 1:
+        return None
+    return min(n, len(d["user_recs"].get(user_id, [])))  # larger n: same body, same ETag
+
+
+def api_recommendations(d, user_id, args, if_none_match):
+    n = list_size(d, user_id, args, 30)
+    genres = d["genre_index"].parse(args.getlist("genre"))  # ?genre=Comedy&genre=Romance: both
+    if n is None or genres is None:
+        return Error(400)  # n < 1 / unknown genre
+
+    etag = page_etag("api-recs", d["version"], user_id, n, *genres)
+    cached = unchanged(if_none_match, etag, API_CACHE)
+    if cached is not None:
+        return cached
+    if not known_user(d, user_id):
+        return Error(404)
+    return Json(recommendations_body(d, user_id, n, genres), etag=etag, cache_control=API_CACHE)
+
+
+def api_recommendations_by_genre(d, user_id, args, if_none_match):
+    n = list_size(d, user_id, args, 10)
+    if n is None:
+        return Error(400)
+
+    etag = page_etag("api-recs-genre", d["version"], user_id, n)
+    cached = unchanged(if_none_match, etag, API_CACHE)
+    if cached is not None:
+        return cached
+    if not known_user(d, user_id):
+        return Error(404)
+    return Json(recommendations_by_genre_body(d, user_id, n), etag=etag, cache_control=API_CACHE)
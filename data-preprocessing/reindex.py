@@ -0,0 +1,94 @@
+"""
+Dense re-indexing of ratings files: userId -> 0..U-1, movieId -> 0..M-1.
+
+A dense id is the position of the raw id in the sorted array of all raw ids
+seen in the inputs, so the mapping keeps the id order and raw -> dense is a
+binary search, dense -> raw a plain index.
+
+Outputs (in OUTPUT_DIR):
+    user_ids.npy  movie_ids.npy     the mapping: raw id of every dense id (sorted int32)
+    user_map.csv  movie_map.csv     same as header-less denseId,rawId text (MySQL / Hadoop side data)
+    <input file names>              every input re-encoded, header-less userId,movieId,rating
+
+    python reindex.py ratings_train.csv ratings_test.csv
+
+Feed the re-encoded files to Hadoop / eval like the raw ones; Web/id_maps.py
+turns dense ids back into MovieLens ids.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# shared ratings helpers (eval/ratings_io.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "eval"))
+import ratings_io  # noqa: E402
+
+# I/O config
+INPUT_FILES = ["ratings_train.csv", "ratings_test.csv"]
+OUTPUT_DIR = "dense"
+CHUNK_ROWS = 2000000  # rows parsed / written at a time
+
+
+def collect_ids(paths):
+    """Sorted unique raw user and movie ids over all inputs (one chunked pass)."""
+    users = np.empty(0, dtype=np.int32)
+    movies = np.empty(0, dtype=np.int32)
+    for path in paths:
+        for df in ratings_io.parse_ratings_csv(path, chunksize=CHUNK_ROWS):
+            users = np.union1d(users, df["userId"].to_numpy())
+            movies = np.union1d(movies, df["movieId"].to_numpy())
+    return users, movies
+
+
+def save_mapping(out_dir, name, raw_ids):
+    np.save(os.path.join(out_dir, f"{name}_ids.npy"), raw_ids)
+    with open(os.path.join(out_dir, f"{name}_map.csv"), "w") as f:
+        for dense, raw in enumerate(raw_ids.tolist()):
+            f.write(f"{dense},{raw}\n")
+
+
+def encode_file(path, out_path, user_ids, movie_ids):
+    """Re-encode one ratings file chunk by chunk; returns the row count."""
+    rows = 0
+    with open(out_path, "w") as f:
+        for df in ratings_io.parse_ratings_csv(path, chunksize=CHUNK_ROWS):
+            df["userId"] = np.searchsorted(user_ids, df["userId"].to_numpy()).astype(np.int32)
+            df["movieId"] = np.searchsorted(movie_ids, df["movieId"].to_numpy()).astype(np.int32)
+            df.to_csv(f, index=False, header=False)
+            rows += len(df)
+    return rows
+
+
+def reindex(paths, out_dir):
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"input file not found: {path}")
+            exit(1)
+    os.makedirs(out_dir, exist_ok=True)
+
+    t0 = time.time()
+    user_ids, movie_ids = collect_ids(paths)
+    save_mapping(out_dir, "user", user_ids)
+    save_mapping(out_dir, "movie", movie_ids)
+    print(f"{len(user_ids)} users, {len(movie_ids)} movies ({time.time() - t0:.2f}s)")
+
+    for path in paths:
+        out_path = os.path.join(out_dir, os.path.basename(path))
+        before = os.path.getsize(path)
+        rows = encode_file(path, out_path, user_ids, movie_ids)
+        after = os.path.getsize(out_path)
+        print(f"{path} -> {out_path}: {rows} rows, {before / 2**20:.1f}MB -> {after / 2**20:.1f}MB")
+
+    print(f"time : {time.time() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", default=INPUT_FILES, help="ratings CSVs sharing one mapping")
+    parser.add_argument("--out-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    reindex(args.inputs, args.out_dir)
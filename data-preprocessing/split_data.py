@@ -1,34 +1,241 @@
+"""
+Streaming, parallel train/test split of ratings.csv.
+
+The file is cut into line-aligned byte ranges that worker processes parse
+and split on their own. Where a row goes depends only on the row (and SEED),
+so the output is the same for any chunk size or number of workers:
+
+  random        test iff hash(userId, movieId, SEED) falls in the last (1 - SPLIT_RATIO)
+  temporal      each user's latest (1 - SPLIT_RATIO) of ratings go to test
+  leave-k-out   each user's latest k ratings go to test (at least one stays in train)
+
+The per-user strategies take one extra pass that keeps only (user, order key)
+per rating, 12 bytes each, to find every user's cutoff. Equal timestamps are
+ordered by the row hash.
+
+Outputs are header-less userId,movieId,rating CSVs (Hadoop input). With
+--shards N > 1, ratings_train/ and ratings_test/ get part-xxxxx files instead,
+all rows of a user in the same part.
+
+    python split_data.py --strategy temporal --shards 16
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
 import pandas as pd
 
+# shared ratings helpers (eval/ratings_io.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "eval"))
+import ratings_io  # noqa: E402
+
 # I/O config
 INPUT_FILE = "ratings.csv"
 TRAIN_OUTPUT = "ratings_train.csv"
 TEST_OUTPUT = "ratings_test.csv"
 SPLIT_RATIO = 0.8  # 80/20 split
+STRATEGY = "random"
+LEAVE_K = 1
+SHARDS = 1
+SEED = 42
+CHUNK_MB = 64  # bytes of CSV per worker task
+NUM_CORES = os.cpu_count()
+
+NEVER = np.iinfo(np.uint64).max  # cutoff of users without test ratings
+
+# set in workers by init_worker
+global_config = None
+global_cutoffs = None  # (sorted user ids, order-key cutoffs) for the per-user strategies
+
+
+# --- hashing ---
+
+def mix64(x):
+    """splitmix64 finalizer on uint64 arrays (same as Hadoop/step1_lsh)."""
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def row_hash(users, movies, seed):
+    x = (users.astype(np.uint64) << np.uint64(32)) | movies.astype(np.uint64)
+    return mix64(x ^ mix64(np.array([seed], dtype=np.uint64)))
+
+
+def order_key(timestamps, hashes):
+    """Per-user ordering: timestamp in the high 32 bits, hash as tie breaker."""
+    return (timestamps.astype(np.uint64) << np.uint64(32)) | (hashes >> np.uint64(32))
+
+
+# --- input ranges ---
+
+def compute_ranges(path, chunk_bytes):
+    """Byte ranges [start, end) of the data lines, each ending right after a newline."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        if ratings_io.has_header(path):
+            f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # move to the end of the current line
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_range(path, start, end, with_time):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    names = ["userId", "movieId", "rating"] + (["timestamp"] if with_time else [])
+    return pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        usecols=list(range(len(names))),
+        names=names,
+        dtype={"userId": np.int32, "movieId": np.int32, "rating": np.float32, "timestamp": np.int64},
+        engine="c",
+    )
+
 
+# --- workers ---
 
-def split_dataset():
+def init_worker(config, cutoffs):
+    global global_config, global_cutoffs
+    global_config = config
+    global_cutoffs = cutoffs
+
+
+def scan_range(bounds):
+    """Pass 1 of the per-user strategies: (users, order keys) of one range."""
+    df = read_range(global_config["input"], *bounds, with_time=True)
+    users = df["userId"].to_numpy()
+    h = row_hash(users, df["movieId"].to_numpy(), global_config["seed"])
+    return users, order_key(df["timestamp"].to_numpy(), h)
+
+
+def split_range(bounds):
+    """CSV text of one range: [train shards, test shards]."""
+    config = global_config
+    per_user = config["strategy"] != "random"
+    df = read_range(config["input"], *bounds, with_time=per_user)
+    users = df["userId"].to_numpy()
+    h = row_hash(users, df["movieId"].to_numpy(), config["seed"])
+
+    if per_user:
+        cut_users, cut_keys = global_cutoffs
+        test = order_key(df["timestamp"].to_numpy(), h) >= cut_keys[np.searchsorted(cut_users, users)]
+    else:
+        test = (h >> np.uint64(11)).astype(np.float64) * 2.0**-53 >= config["ratio"]
+
+    n_shards = config["shards"]
+    shard = (mix64(users.astype(np.uint64)) % np.uint64(n_shards)).astype(np.int64)
+
+    df = df[["userId", "movieId", "rating"]]
+    out = []
+    for mask in (~test, test):
+        parts = []
+        for s in range(n_shards):
+            rows = df[mask & (shard == s)]
+            parts.append(rows.to_csv(index=False, header=False) if len(rows) else "")
+        out.append(parts)
+    return out
+
+
+# --- driver ---
+
+def user_cutoffs(users, keys, strategy, ratio, leave_k):
+    """(sorted user ids, cutoff keys): a rating is test iff its key >= its user's cutoff."""
+    order = np.lexsort((keys, users))
+    users = users[order]
+    keys = keys[order]
+    uniq, starts, counts = np.unique(users, return_index=True, return_counts=True)
+
+    if strategy == "temporal":
+        n_test = np.floor(counts * (1.0 - ratio) + 1e-9).astype(np.int64)  # 5 * (1 - 0.8) < 1.0
+    else:
+        n_test = np.minimum(leave_k, counts - 1)
+
+    cut = np.full(len(uniq), NEVER, dtype=np.uint64)
+    has = n_test > 0
+    cut[has] = keys[(starts + counts - n_test)[has]]
+    return uniq, cut
+
+
+def open_outputs(path, n_shards):
+    if n_shards == 1:
+        return [open(path, "w")]
+    out_dir = os.path.splitext(path)[0]
+    os.makedirs(out_dir, exist_ok=True)
+    return [open(os.path.join(out_dir, f"part-{s:05d}"), "w") for s in range(n_shards)]
+
+
+def split_dataset(strategy=STRATEGY, ratio=SPLIT_RATIO, leave_k=LEAVE_K, shards=SHARDS, seed=SEED,
+                  chunk_mb=CHUNK_MB, workers=NUM_CORES):
     """Create train/test split from ratings data."""
+    if not os.path.exists(INPUT_FILE):
+        print(f"input file not found: {INPUT_FILE}")
+        exit(1)
+
+    t0 = time.time()
+    ranges = compute_ranges(INPUT_FILE, max(1, int(chunk_mb * 1024 * 1024)))
+    config = {"input": INPUT_FILE, "strategy": strategy, "ratio": ratio, "shards": shards, "seed": seed}
+    print(f"{strategy} split of {INPUT_FILE}: {len(ranges)} chunks, {workers} workers, {shards} shard(s)")
+
+    cutoffs = None
+    if strategy != "random":
+        with Pool(processes=workers, initializer=init_worker, initargs=(config, None)) as pool:
+            scanned = pool.map(scan_range, ranges)
+        users = np.concatenate([u for u, _ in scanned])
+        keys = np.concatenate([k for _, k in scanned])
+        del scanned
+        cutoffs = user_cutoffs(users, keys, strategy, ratio, leave_k)
+        del users, keys
+        print(f"per-user cutoffs for {len(cutoffs[0])} users ({time.time() - t0:.2f}s)")
+
+    outputs = [open_outputs(TRAIN_OUTPUT, shards), open_outputs(TEST_OUTPUT, shards)]
+    rows = [0, 0]
     try:
-        df = pd.read_csv(INPUT_FILE, usecols=[0, 1, 2], engine="c")
-    except ValueError:
-        # no header case
-        df = pd.read_csv(
-            INPUT_FILE,
-            header=None,
-            names=["userId", "movieId", "rating"],
-            usecols=[0, 1, 2],
-            engine="c",
-        )
-
-    # reproducible random split
-    train = df.sample(frac=SPLIT_RATIO, random_state=42)
-    test = df.drop(train.index)
-
-    # Hadoop-friendly: no index, no header
-    train.to_csv(TRAIN_OUTPUT, index=False, header=False)
-    test.to_csv(TEST_OUTPUT, index=False, header=False)
+        with Pool(processes=workers, initializer=init_worker, initargs=(config, cutoffs)) as pool:
+            # imap keeps the chunk order, so the files come out the same on every run
+            for result in pool.imap(split_range, ranges):
+                for i, parts in enumerate(result):
+                    for f, text in zip(outputs[i], parts):
+                        f.write(text)
+                        rows[i] += text.count("\n")
+    finally:
+        for files in outputs:
+            for f in files:
+                f.close()
+
+    elapsed = time.time() - t0
+    total = rows[0] + rows[1]
+    print(f"train: {rows[0]} rows, test: {rows[1]} rows ({rows[1] / max(total, 1) * 100:.2f}% test)")
+    print(f"time : {elapsed:.2f}s ({total / max(elapsed, 1e-9):.0f} rows/s)")
 
 
 if __name__ == "__main__":
-    split_dataset()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--train", default=TRAIN_OUTPUT)
+    parser.add_argument("--test", default=TEST_OUTPUT)
+    parser.add_argument("--strategy", choices=["random", "temporal", "leave-k-out"], default=STRATEGY)
+    parser.add_argument("--ratio", type=float, default=SPLIT_RATIO, help="train fraction (random, temporal)")
+    parser.add_argument("--k", type=int, default=LEAVE_K, help="ratings held out per user (leave-k-out)")
+    parser.add_argument("--shards", type=int, default=SHARDS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_MB)
+    parser.add_argument("--workers", type=int, default=NUM_CORES)
+    args = parser.parse_args()
+
+    INPUT_FILE, TRAIN_OUTPUT, TEST_OUTPUT = args.input, args.train, args.test
+    split_dataset(args.strategy, args.ratio, args.k, max(1, args.shards), args.seed, args.chunk_mb, args.workers)
@@ -0,0 +1,457 @@
+"""
+Vectorized NumPy engine for user-based / item-based CF evaluation.
+
+Same formulas as the original per-row loops, but on arrays:
+- user / movie IDs are encoded to dense ints (position in the sorted unique ID array)
+- train ratings are one sorted int64 key array (user_code * n_movies + movie_code)
+  plus the aligned ratings, so r(u, i) for a whole batch is one np.searchsorted
+- neighbor lists are a fixed-K matrix (padded with -1) per target ID, so the
+  Σ over neighbors is a row sum over a (batch, K) gather
+
+Every structure is a flat dict of NumPy arrays, cheap to hand to worker
+processes (or to put into shared memory).
+"""
+import math
+
+import numpy as np
+
+import neighbor_store
+import ratings_io
+
+MISSING = -1
+
+
+# --- loading ---
+
+def encode(sorted_ids, values):
+    """Raw IDs -> dense codes (index into sorted_ids), MISSING when unknown."""
+    values = np.asarray(values, dtype=np.int64)
+    if len(sorted_ids) == 0:
+        return np.full(values.shape, MISSING, dtype=np.int64)
+    if sorted_ids[0] == 0 and sorted_ids[-1] == len(sorted_ids) - 1:
+        # dense IDs (data-preprocessing/reindex.py): the ID is its own code
+        return np.where((values >= 0) & (values < len(sorted_ids)), values, MISSING)
+    pos = np.searchsorted(sorted_ids, values)
+    pos = np.minimum(pos, len(sorted_ids) - 1)
+    return np.where(sorted_ids[pos] == values, pos, MISSING)
+
+
+def build_train_index(users, movies, ratings):
+    """
+    Train ratings as arrays:
+    user_ids / movie_ids -> sorted unique raw IDs (code = position)
+    keys                 -> sorted user_code * n_movies + movie_code
+    ratings              -> float32 rating aligned with keys
+    user_means           -> float64 mean rating per user code
+    user_ptr             -> CSR offsets: ratings of user code u are keys[user_ptr[u]:user_ptr[u + 1]]
+    A duplicated (user, movie) keeps the last rating, like the old dict loader.
+    """
+    user_ids, u_codes = np.unique(users, return_inverse=True)
+    movie_ids, m_codes = np.unique(movies, return_inverse=True)
+    n_movies = np.int64(len(movie_ids))
+
+    keys = u_codes.astype(np.int64) * n_movies + m_codes.astype(np.int64)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    ratings = np.asarray(ratings, dtype=np.float32)[order]
+
+    # dedupe: keep the last occurrence of every key
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+    keys = keys[last]
+    ratings = ratings[last]
+
+    row_users = keys // n_movies
+    counts = np.bincount(row_users, minlength=len(user_ids))
+    sums = np.bincount(row_users, weights=ratings.astype(np.float64), minlength=len(user_ids))
+    user_means = sums / np.maximum(counts, 1)
+    user_ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    return {
+        "user_ids": user_ids.astype(np.int64),
+        "movie_ids": movie_ids.astype(np.int64),
+        "keys": keys,
+        "ratings": ratings,
+        "user_means": user_means,
+        "user_ptr": user_ptr,
+    }
+
+
+def load_train_index(path):
+    return build_train_index(*ratings_io.load_ratings(path))
+
+
+def load_neighbor_index(path, k=None):
+    """
+    Neighbor index of a reducer3 text file, memory-mapped from its compiled
+    .nbr store (neighbor_store.py) when there is an up-to-date one; path may
+    also be a .nbr directory itself.
+    """
+    if neighbor_store.is_store(path):
+        return neighbor_store.open_store(path, k)
+    store = neighbor_store.find_store(path, k)
+    if store is not None:
+        return neighbor_store.open_store(store, k)
+    return parse_neighbor_file(path, k)
+
+
+def parse_neighbor_file(path, k=None):
+    """
+    "id \t n1:sim,n2:sim,..." lines -> fixed-K arrays
+    ids       -> sorted raw target IDs
+    neighbors -> (n_ids, K) raw neighbor IDs, MISSING padded
+    sims      -> (n_ids, K) float64 similarities, 0 padded
+    """
+    ids = []
+    lengths = []
+    flat_ids = []
+    flat_sims = []
+
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.strip().split("\t")
+            if not parts or not parts[0]:
+                continue
+            try:
+                target = int(parts[0])
+            except ValueError:
+                continue
+            n = 0
+            if len(parts) > 1 and parts[1]:
+                for x in parts[1].split(","):
+                    if ":" not in x:
+                        continue
+                    nid, sim = x.split(":")
+                    try:
+                        flat_ids.append(int(nid))
+                        flat_sims.append(float(sim))
+                    except ValueError:
+                        continue
+                    n += 1
+                    if k is not None and n >= k:
+                        break
+            ids.append(target)
+            lengths.append(n)
+
+    return build_neighbor_index(ids, lengths, flat_ids, flat_sims)
+
+
+def build_neighbor_index(ids, lengths, flat_ids, flat_sims):
+    """Pad ragged neighbor lists (CSR style) into sorted fixed-K matrices."""
+    ids = np.asarray(ids, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    flat_ids = np.asarray(flat_ids, dtype=np.int64)
+    flat_sims = np.asarray(flat_sims, dtype=np.float64)
+
+    k = int(lengths.max()) if len(lengths) else 0
+    neighbors = np.full((len(ids), k), MISSING, dtype=np.int64)
+    sims = np.zeros((len(ids), k), dtype=np.float64)
+
+    rows = np.repeat(np.arange(len(ids)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    cols = np.arange(len(flat_ids)) - np.repeat(starts, lengths)
+    neighbors[rows, cols] = flat_ids
+    sims[rows, cols] = flat_sims
+
+    # a duplicated target line overrides the earlier one, like the old dict loader
+    order = np.argsort(ids, kind="stable")
+    ids = ids[order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[:-1] = ids[1:] != ids[:-1]
+    order = order[keep]
+
+    return {
+        "ids": ids[keep],
+        "neighbors": neighbors[order],
+        "sims": sims[order],
+    }
+
+
+def encode_neighbors(train, nbr, mode):
+    """Add "codes": neighbor IDs as train user codes (user mode) or movie codes (item mode)."""
+    space = train["user_ids"] if mode == "user" else train["movie_ids"]
+    codes = encode(space, nbr["neighbors"].ravel()).reshape(nbr["neighbors"].shape)
+    codes[nbr["neighbors"] == MISSING] = MISSING
+    out = dict(nbr)
+    out["codes"] = codes
+    return out
+
+
+def limit_neighbors(nbr, k=None, min_sim=None):
+    """
+    Variant of an encoded neighbor index: only the first k neighbors of every
+    list (lists are sorted by similarity) and/or only sim >= min_sim.
+    """
+    codes = nbr["codes"]
+    sims = nbr["sims"]
+    if k is not None:
+        codes = codes[:, :k]
+        sims = sims[:, :k]
+    if min_sim is not None:
+        codes = np.where(sims >= min_sim, codes, MISSING)
+    out = dict(nbr)
+    out["codes"] = codes
+    out["sims"] = sims
+    return out
+
+
+def build_inverse_neighbors(train, nbr):
+    """
+    Item-based index turned around: for every train movie code j, the target
+    movies i that list j as a neighbor, with sim(i, j) (CSR: ptr / targets / sims).
+    """
+    n_movies = len(train["movie_ids"])
+    target_codes = encode(train["movie_ids"], nbr["ids"])
+    codes = nbr["codes"]
+    valid = (codes >= 0) & (target_codes[:, None] >= 0)
+
+    j = codes[valid]
+    i = np.broadcast_to(target_codes[:, None], codes.shape)[valid]
+    s = nbr["sims"][valid]
+
+    order = np.argsort(j, kind="stable")
+    counts = np.bincount(j, minlength=n_movies)
+    return {
+        "ptr": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        "targets": i[order].astype(np.int64),
+        "sims": s[order],
+    }
+
+
+# --- prediction ---
+
+def lookup_ratings(train, u_codes, m_codes):
+    """r(u, i) for broadcastable code arrays -> (ratings, found mask)."""
+    keys_sorted = train["keys"]
+    n_movies = np.int64(len(train["movie_ids"]))
+    valid = (u_codes >= 0) & (m_codes >= 0)
+    keys = np.where(valid, u_codes * n_movies + m_codes, 0)
+
+    if len(keys_sorted) == 0:
+        return np.zeros(keys.shape, dtype=np.float32), np.zeros(keys.shape, dtype=bool)
+    pos = np.searchsorted(keys_sorted, keys)
+    pos = np.minimum(pos, len(keys_sorted) - 1)
+    found = valid & (keys_sorted[pos] == keys)
+    return train["ratings"][pos], found
+
+
+def predict_user_based(train, nbr, users, movies):
+    """
+    pred(u, i) = μ_u + Σ_v sim(u,v)·(r_v,i − μ_v) / Σ_v |sim(u,v)|
+    over the neighbors v of u who rated i. NaN where no prediction.
+    """
+    u = encode(train["user_ids"], users)
+    m = encode(train["movie_ids"], movies)
+    row = encode(nbr["ids"], users)
+
+    pred = np.full(len(u), np.nan)
+    ok = (u >= 0) & (row >= 0)
+    if not ok.any() or nbr["codes"].shape[1] == 0:
+        return pred
+
+    idx = np.nonzero(ok)[0]
+    v = nbr["codes"][row[idx]]                 # (B, K) neighbor user codes
+    s = nbr["sims"][row[idx]]                  # (B, K) sim(u, v)
+    r, found = lookup_ratings(train, v, m[idx, None])
+
+    means = train["user_means"]
+    centered = r - means[np.maximum(v, 0)]
+    score_sum = np.where(found, s * centered, 0.0).sum(axis=1)
+    sim_sum = np.where(found, np.abs(s), 0.0).sum(axis=1)
+
+    has = sim_sum != 0.0
+    pred[idx[has]] = means[u[idx[has]]] + score_sum[has] / sim_sum[has]
+    return pred
+
+
+def predict_item_based(train, nbr, users, movies):
+    """
+    pred(u, i) = Σ_j sim(i,j)·r_u,j / Σ_j |sim(i,j)|
+    over the neighbors j of i rated by u. NaN where no prediction.
+    """
+    u = encode(train["user_ids"], users)
+    row = encode(nbr["ids"], movies)
+
+    pred = np.full(len(u), np.nan)
+    ok = (u >= 0) & (row >= 0)
+    if not ok.any() or nbr["codes"].shape[1] == 0:
+        return pred
+
+    idx = np.nonzero(ok)[0]
+    j = nbr["codes"][row[idx]]                 # (B, K) neighbor movie codes
+    s = nbr["sims"][row[idx]]                  # (B, K) sim(i, j)
+    r, found = lookup_ratings(train, u[idx, None], j)
+
+    weighted = np.where(found, s * r, 0.0).sum(axis=1)
+    sim_sum = np.where(found, np.abs(s), 0.0).sum(axis=1)
+
+    has = sim_sum > 0
+    pred[idx[has]] = weighted[has] / sim_sum[has]
+    return pred
+
+
+# --- top-N ---
+
+def score_user_candidates(train, nbr, user_codes):
+    """
+    User-based scores for every movie rated by a neighbor but not by the user.
+    user_codes: train user codes of one batch.
+    Returns (user_codes, movie_codes, predictions) sorted by user, then movie;
+    same formula and clamping as the evaluation.
+    """
+    user_codes = np.asarray(user_codes, dtype=np.int64)
+    empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64))
+    if len(user_codes) == 0 or nbr["codes"].shape[1] == 0:
+        return empty
+
+    row = encode(nbr["ids"], train["user_ids"][user_codes])
+    ok = row >= 0
+    t_of_row = np.nonzero(ok)[0]
+    v = nbr["codes"][row[ok]]                  # (B, K) neighbor user codes
+    s = nbr["sims"][row[ok]]
+    valid = v >= 0
+    t = np.broadcast_to(t_of_row[:, None], v.shape)[valid]   # position in batch
+    v = v[valid]
+    s = s[valid]
+
+    # expand every (user, neighbor) into the neighbor's ratings (CSR ranges)
+    ptr = train["user_ptr"]
+    starts = ptr[v]
+    lengths = ptr[v + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return empty
+    rep = np.repeat(np.arange(len(v)), lengths)
+    pos = starts[rep] + (np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+
+    n_movies = np.int64(len(train["movie_ids"]))
+    means = train["user_means"]
+    movie = train["keys"][pos] % n_movies
+    s_rep = s[rep]
+    dev = train["ratings"][pos] - means[v][rep]           # r_v,i − μ_v
+
+    # Σ over neighbors per (user, movie) group
+    group_keys, inv = np.unique(t[rep] * n_movies + movie, return_inverse=True)
+    score_sum = np.bincount(inv, weights=s_rep * dev)
+    sim_sum = np.bincount(inv, weights=np.abs(s_rep))
+
+    g_user = user_codes[group_keys // n_movies]
+    g_movie = group_keys % n_movies
+
+    _, already = lookup_ratings(train, g_user, g_movie)    # drop movies the user rated
+    keep = (sim_sum != 0.0) & ~already
+    pred = means[g_user[keep]] + score_sum[keep] / sim_sum[keep]
+    return g_user[keep], g_movie[keep], np.clip(pred, 0.5, 5.0)
+
+
+def score_item_candidates(train, inv, user_codes):
+    """
+    Item-based scores for every movie i having a neighbor j rated by the user
+    (inv = build_inverse_neighbors). Returns (user_codes, movie_codes,
+    predictions) sorted by user, then movie; rated movies are excluded.
+    """
+    user_codes = np.asarray(user_codes, dtype=np.int64)
+    empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64))
+    ptr = train["user_ptr"]
+    n_movies = np.int64(len(train["movie_ids"]))
+
+    # the users' own ratings r_u,j (CSR ranges of the train keys)
+    starts = ptr[user_codes]
+    lengths = ptr[user_codes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return empty
+    t = np.repeat(np.arange(len(user_codes)), lengths)
+    pos = starts[t] + (np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+    j = train["keys"][pos] % n_movies
+    r = train["ratings"][pos]
+
+    # every movie i that has j as a neighbor
+    i_start = inv["ptr"][j]
+    i_len = inv["ptr"][j + 1] - i_start
+    total = int(i_len.sum())
+    if total == 0:
+        return empty
+    rep = np.repeat(np.arange(len(j)), i_len)
+    ipos = i_start[rep] + (np.arange(total) - np.repeat(np.cumsum(i_len) - i_len, i_len))
+    movie = inv["targets"][ipos]
+    s = inv["sims"][ipos]
+
+    group_keys, g = np.unique(t[rep] * n_movies + movie, return_inverse=True)
+    weighted = np.bincount(g, weights=s * r[rep])
+    sim_sum = np.bincount(g, weights=np.abs(s))
+
+    g_user = user_codes[group_keys // n_movies]
+    g_movie = group_keys % n_movies
+
+    _, already = lookup_ratings(train, g_user, g_movie)
+    keep = (sim_sum > 0) & ~already
+    pred = weighted[keep] / sim_sum[keep]
+    return g_user[keep], g_movie[keep], np.clip(pred, 0.5, 5.0)
+
+
+def blend(pred_a, pred_b, alpha):
+    """alpha * a + (1 - alpha) * b where both exist, otherwise whichever exists (NaN if none)."""
+    both = ~np.isnan(pred_a) & ~np.isnan(pred_b)
+    out = np.where(np.isnan(pred_a), pred_b, pred_a)
+    out[both] = alpha * pred_a[both] + (1.0 - alpha) * pred_b[both]
+    return out
+
+
+def blend_candidates(cand_a, cand_b, alpha, n_movies):
+    """Blend two (users, movies, scores) candidate sets on their union, sorted by user, movie."""
+    keys_a = cand_a[0] * np.int64(n_movies) + cand_a[1]
+    keys_b = cand_b[0] * np.int64(n_movies) + cand_b[1]
+    keys = np.union1d(keys_a, keys_b)
+
+    score_a = np.full(len(keys), np.nan)
+    score_b = np.full(len(keys), np.nan)
+    score_a[np.searchsorted(keys, keys_a)] = cand_a[2]
+    score_b[np.searchsorted(keys, keys_b)] = cand_b[2]
+    return keys // n_movies, keys % n_movies, blend(score_a, score_b, alpha)
+
+
+def top_n_per_user(users, movies, scores, n):
+    """
+    Keep the n best scores of every user (input grouped by user) with a
+    partial selection per user; output sorted by user, then score desc.
+    """
+    if len(users) == 0:
+        return users, movies, scores
+
+    bounds = np.flatnonzero(np.diff(users)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [len(users)]])
+
+    picked = []
+    for a, b in zip(starts, ends):
+        seg = scores[a:b]
+        if b - a > n:
+            idx = np.argpartition(-seg, n - 1)[:n]
+        else:
+            idx = np.arange(b - a)
+        idx = idx[np.argsort(-seg[idx], kind="stable")]
+        picked.append(idx + a)
+
+    sel = np.concatenate(picked)
+    return users[sel], movies[sel], scores[sel]
+
+
+def batch_errors(pred, real):
+    """(sse, sae, cnt) over the predicted rows, predictions clamped to [0.5, 5]."""
+    has = ~np.isnan(pred)
+    if not has.any():
+        return 0.0, 0.0, 0
+    p = np.clip(pred[has], 0.5, 5.0)
+    err = p - np.asarray(real, dtype=np.float64)[has]
+    return float(np.dot(err, err)), float(np.abs(err).sum()), int(has.sum())
+
+
+def summarize(total_sse, total_sae, total_cnt, n_test):
+    """(rmse, mae, coverage %) or None when nothing was predicted."""
+    if total_cnt == 0:
+        return None
+    rmse = math.sqrt(total_sse / total_cnt)
+    mae = total_sae / total_cnt
+    cov = total_cnt / n_test * 100.0
+    return rmse, mae, cov
@@ -0,0 +1,94 @@
+import sys
+import time
+
+import cf_engine
+import ratings_io
+
+# config
+MODE = "user"                              # "user" or "item"
+EXACT_NEIGHBORS_FILE = "user_topk_neighbors.txt"       # exhaustive pipeline (step1 -> step3)
+APPROX_NEIGHBORS_FILE = "user_topk_neighbors_lsh.txt"  # LSH pipeline (step1_lsh -> step3)
+TRAIN_FILE = "ratings_train.csv"
+TEST_FILE = "ratings_test.csv"
+BATCH_SIZE = 100000
+
+
+def neighbor_overlap(exact, approx):
+    """
+    Compare two neighbor indexes (cf_engine.load_neighbor_index).
+    overlap = |exact top-K ∩ approx top-K| / |exact top-K|, averaged over ids
+    that have at least one exact neighbor.
+    """
+    approx_rows = cf_engine.encode(approx["ids"], exact["ids"])
+
+    total = 0.0
+    n_ids = 0
+    missing = 0  # ids with exact neighbors but no LSH neighbors at all
+
+    for i, row in enumerate(approx_rows):
+        exact_ids = set(exact["neighbors"][i][exact["neighbors"][i] != cf_engine.MISSING].tolist())
+        if not exact_ids:
+            continue
+        n_ids += 1
+        approx_ids = set()
+        if row != cf_engine.MISSING:
+            approx_ids = set(approx["neighbors"][row][approx["neighbors"][row] != cf_engine.MISSING].tolist())
+        if not approx_ids:
+            missing += 1
+            continue
+        total += len(exact_ids & approx_ids) / len(exact_ids)
+
+    mean_overlap = total / n_ids if n_ids else 0.0
+    return mean_overlap, n_ids, missing
+
+
+def run_eval(train, neighbors, test):
+    """Single-process RMSE / MAE / coverage with the eval scripts' formulas."""
+    predict = cf_engine.predict_item_based if MODE == "item" else cf_engine.predict_user_based
+    neighbors = cf_engine.encode_neighbors(train, neighbors, MODE)
+    users, movies, ratings = test
+
+    total_sse = 0.0
+    total_sae = 0.0
+    total_cnt = 0
+    for i in range(0, len(users), BATCH_SIZE):
+        pred = predict(train, neighbors, users[i : i + BATCH_SIZE], movies[i : i + BATCH_SIZE])
+        sse, sae, cnt = cf_engine.batch_errors(pred, ratings[i : i + BATCH_SIZE])
+        total_sse += sse
+        total_sae += sae
+        total_cnt += cnt
+
+    return cf_engine.summarize(total_sse, total_sae, total_cnt, len(users))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        MODE = sys.argv[1]
+    if len(sys.argv) > 3:
+        EXACT_NEIGHBORS_FILE, APPROX_NEIGHBORS_FILE = sys.argv[2], sys.argv[3]
+
+    exact = cf_engine.load_neighbor_index(EXACT_NEIGHBORS_FILE)
+    approx = cf_engine.load_neighbor_index(APPROX_NEIGHBORS_FILE)
+
+    mean_overlap, n_ids, missing = neighbor_overlap(exact, approx)
+    n_approx = int((approx["neighbors"] != cf_engine.MISSING).any(axis=1).sum()) if approx["neighbors"].size else 0
+
+    train = cf_engine.load_train_index(TRAIN_FILE)
+    test = ratings_io.load_ratings(TEST_FILE)
+
+    print(f"\n=== {MODE}-based neighbors: exhaustive vs LSH ===")
+    print(f"ids with neighbors : {n_ids} exhaustive / {n_approx} LSH")
+    print(f"ids missing in LSH : {missing}")
+    print(f"mean overlap@K     : {mean_overlap * 100:.2f}%")
+
+    for name, neighbors in (("exhaustive", exact), ("LSH", approx)):
+        t0 = time.time()
+        res = run_eval(train, neighbors, test)
+        if res is None:
+            print(f"{name:<11}: no predictable samples")
+            continue
+        rmse, mae, cov = res
+        print(
+            f"{name:<11}: RMSE {rmse:.5f}  MAE {mae:.5f}  "
+            f"coverage {cov:.2f}%  ({time.time() - t0:.2f}s)"
+        )
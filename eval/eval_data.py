@@ -0,0 +1,50 @@
+"""
+Loaders shared by the evaluation / training scripts (evaluate.py,
+evaluate_user_based.py, evaluate_item_based.py, train_mf.py).
+
+Each one prints what it loads and exits with status 1 when the file is
+missing, so a script fails before starting any worker.
+"""
+import sys
+import time
+
+import cf_engine
+import ratings_io
+
+
+def load_train_data(path):
+    """cf_engine train index of a ratings CSV."""
+    print("loading train...")
+    t0 = time.time()
+    try:
+        train = cf_engine.load_train_index(path)  # user_ids, movie_ids, keys, ratings, user_means
+    except FileNotFoundError:
+        print(f"train file not found: {path}")
+        sys.exit(1)
+    print(f"train loaded in {time.time() - t0:.2f}s: {len(train['keys'])} ratings")
+    return train
+
+
+def load_neighbors(path, train, mode):
+    """Neighbor index of a reducer3 file / .nbr store, ids encoded against train (mode: user / item)."""
+    print(f"loading {mode} neighbors...")
+    try:
+        nbr = cf_engine.load_neighbor_index(path)
+    except FileNotFoundError:
+        print(f"{mode} neighbor file not found: {path}")
+        sys.exit(1)
+    nbr = cf_engine.encode_neighbors(train, nbr, mode)  # neighbor ids -> user / movie codes
+    print(f"{mode} neighbors loaded: {len(nbr['ids'])} ids, K={nbr['codes'].shape[1]}")
+    return nbr
+
+
+def load_test_data(path):
+    """(userIds, movieIds, ratings) columns of a ratings CSV."""
+    print("loading test...")
+    try:
+        data = ratings_io.load_ratings(path)
+    except FileNotFoundError:
+        print(f"test file not found: {path}")
+        sys.exit(1)
+    print(f"test loaded: {len(data[0])} rows")
+    return data
@@ -0,0 +1,294 @@
+"""
+Unified evaluation: user-based, item-based and blended CF on the same data.
+
+Train / test / both neighbor files are loaded once and published to shared
+memory; every configuration (model, K, min sim, blend alpha) of the sweep
+runs in its own worker process over those shared arrays and reports
+
+    RMSE / MAE / coverage     on every test rating (same formulas as the old scripts)
+    precision / recall / NDCG @N   top-N over all unrated movies, for a sample of
+                                   test users; relevant = test rating >= RELEVANT_RATING
+    wall time / peak RSS      of the configuration's worker, as growth over the RSS
+                              it had at the start (pages inherited from the parent
+                              at fork are not counted)
+
+    python evaluate.py --models user,item,blend --k 10,20,50 --min-sim 0,0.1 --alpha 0.3,0.5
+"""
+import argparse
+import math
+import os
+import resource
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import cf_engine
+import eval_data
+import shared_arrays
+
+# config
+TRAIN_FILE = "ratings_train.csv"
+TEST_FILE = "ratings_test.csv"
+USER_NEIGHBORS_FILE = "user_topk_neighbors.txt"
+ITEM_NEIGHBORS_FILE = "item_topk_neighbors.txt"
+NUM_CORES = os.cpu_count()
+BATCH_SIZE = 100000       # test rows per vectorized step
+BATCH_USERS = 500         # users per top-N step
+TOP_N = 10                # cut-off of the ranking metrics
+RELEVANT_RATING = 4.0     # test ratings >= this count as relevant
+RANK_USERS = 10000        # test users sampled for ranking metrics (0 = all)
+SEED = 42
+
+# shared in workers (views on the parent's shared memory, see shared_arrays.py)
+global_data = None
+global_handles = None
+
+
+def build_relevance(train, test, rank_users, seed):
+    """
+    Ground truth for the ranking metrics:
+      users      sorted train user codes of the sampled test users
+      counts     their number of relevant test movies (also ones unknown to train)
+      keys       sorted user_code * n_movies + movie_code of the relevant ones in train
+    """
+    users, movies, ratings = test
+    rel = np.asarray(ratings) >= RELEVANT_RATING
+    u = cf_engine.encode(train["user_ids"], np.asarray(users)[rel])
+    movies = np.asarray(movies, dtype=np.int64)[rel]
+    ok = u >= 0
+    u, movies = u[ok], movies[ok]
+
+    span = movies.max(initial=0) + 1
+    pairs = np.unique(u * span + movies)                 # duplicate test rows count once
+    cand, counts = np.unique(pairs // span, return_counts=True)
+
+    if 0 < rank_users < len(cand):
+        pick = np.sort(np.random.default_rng(seed).choice(len(cand), rank_users, replace=False))
+        cand, counts = cand[pick], counts[pick]
+
+    m = cf_engine.encode(train["movie_ids"], movies)
+    keep = (m >= 0) & np.isin(u, cand)
+    keys = np.unique(u[keep] * np.int64(len(train["movie_ids"])) + m[keep])
+    return {"users": cand, "counts": counts.astype(np.int64), "keys": keys}
+
+
+# --- metrics ---
+
+def ranking_sums(batch_users, rel_counts, rec_users, rec_movies, rel_keys, n_movies, n):
+    """
+    Σ precision@n, Σ recall@n, Σ NDCG@n over batch_users (sorted codes).
+    rec_*: top-n lists from cf_engine.top_n_per_user (by user, best first).
+    Users without any recommendation contribute 0.
+    """
+    discount = 1.0 / np.log2(np.arange(n) + 2.0)
+    ideal = np.concatenate([[0.0], np.cumsum(discount)])
+
+    idx = np.searchsorted(batch_users, rec_users)
+    first = np.concatenate([[0], np.flatnonzero(np.diff(rec_users)) + 1])
+    rank = np.arange(len(rec_users)) - np.repeat(first, np.diff(np.append(first, len(rec_users))))
+
+    keys = rec_users * np.int64(n_movies) + rec_movies
+    pos = np.minimum(np.searchsorted(rel_keys, keys), max(len(rel_keys) - 1, 0))
+    hit = (rel_keys[pos] == keys) if len(rel_keys) else np.zeros(len(keys), dtype=bool)
+
+    B = len(batch_users)
+    hits = np.bincount(idx, weights=hit, minlength=B)
+    dcg = np.bincount(idx, weights=hit * discount[rank], minlength=B)
+    idcg = ideal[np.minimum(rel_counts, n)]
+
+    return float((hits / n).sum()), float((hits / rel_counts).sum()), float((dcg / idcg).sum())
+
+
+# --- one configuration (runs in a worker) ---
+
+def init_worker(spec, top_n):
+    global global_data, global_handles, TOP_N
+    global_data, global_handles = shared_arrays.attach(spec)
+    TOP_N = top_n  # the command line value, also under spawn
+
+
+def evaluate_config(config):
+    t0 = time.time()
+    # ru_maxrss (KB on Linux) is a high-water mark that a forked worker starts with at
+    # the parent's RSS; the baseline here leaves that out (one task per worker: maxtasksperchild=1)
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    data = global_data
+    train = data["train"]
+    model = config["model"]
+    n_movies = len(train["movie_ids"])
+
+    user_nbr = item_nbr = inv = None
+    if model in ("user", "blend"):
+        user_nbr = cf_engine.limit_neighbors(data["user_nbr"], config["k"], config["min_sim"])
+    if model in ("item", "blend"):
+        item_nbr = cf_engine.limit_neighbors(data["item_nbr"], config["k"], config["min_sim"])
+        inv = cf_engine.build_inverse_neighbors(train, item_nbr)
+
+    # rating prediction
+    test_u, test_m, test_r = data["test"]["users"], data["test"]["movies"], data["test"]["ratings"]
+    total_sse = 0.0
+    total_sae = 0.0
+    total_cnt = 0
+    for i in range(0, len(test_u), BATCH_SIZE):
+        users, movies = test_u[i : i + BATCH_SIZE], test_m[i : i + BATCH_SIZE]
+        if model == "user":
+            pred = cf_engine.predict_user_based(train, user_nbr, users, movies)
+        elif model == "item":
+            pred = cf_engine.predict_item_based(train, item_nbr, users, movies)
+        else:
+            pred = cf_engine.blend(
+                cf_engine.predict_user_based(train, user_nbr, users, movies),
+                cf_engine.predict_item_based(train, item_nbr, users, movies),
+                config["alpha"],
+            )
+        sse, sae, cnt = cf_engine.batch_errors(pred, test_r[i : i + BATCH_SIZE])
+        total_sse += sse
+        total_sae += sae
+        total_cnt += cnt
+
+    # top-N ranking
+    rel = data["relevance"]
+    sums = np.zeros(3)
+    for i in range(0, len(rel["users"]), BATCH_USERS):
+        batch = rel["users"][i : i + BATCH_USERS]
+        if model == "user":
+            cand = cf_engine.score_user_candidates(train, user_nbr, batch)
+        elif model == "item":
+            cand = cf_engine.score_item_candidates(train, inv, batch)
+        else:
+            cand = cf_engine.blend_candidates(
+                cf_engine.score_user_candidates(train, user_nbr, batch),
+                cf_engine.score_item_candidates(train, inv, batch),
+                config["alpha"],
+                n_movies,
+            )
+        rec_u, rec_m, _ = cf_engine.top_n_per_user(*cand, TOP_N)
+        sums += ranking_sums(
+            batch, rel["counts"][i : i + BATCH_USERS], rec_u, rec_m, rel["keys"], n_movies, TOP_N
+        )
+
+    n_rank = max(len(rel["users"]), 1)
+    return {
+        **config,
+        "errors": cf_engine.summarize(total_sse, total_sae, total_cnt, len(test_u)),
+        "ranking": tuple(sums / n_rank),
+        "seconds": time.time() - t0,
+        # peak RSS growth during this configuration: its own arrays plus the shared
+        # pages it touched
+        "peak_mb": (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) / 1024.0,
+    }
+
+
+# --- sweep ---
+
+def build_configs(models, ks, min_sims, alphas):
+    configs = []
+    for model in models:
+        for k in ks:
+            for min_sim in min_sims:
+                for alpha in alphas if model == "blend" else [None]:
+                    configs.append({"model": model, "k": k, "min_sim": min_sim, "alpha": alpha})
+    return configs
+
+
+def format_row(res):
+    k = "all" if res["k"] is None else str(res["k"])
+    min_sim = "-" if res["min_sim"] is None else f"{res['min_sim']:g}"
+    alpha = "-" if res["alpha"] is None else f"{res['alpha']:g}"
+    if res["errors"] is None:
+        errors = f"{'-':>8} {'-':>8} {'0.00%':>8}"
+    else:
+        rmse, mae, cov = res["errors"]
+        errors = f"{rmse:8.5f} {mae:8.5f} {cov:7.2f}%"
+    p, r, ndcg = res["ranking"]
+    return (
+        f"{res['model']:<6} {k:>4} {min_sim:>7} {alpha:>5}  {errors}  "
+        f"{p:7.4f} {r:7.4f} {ndcg:7.4f}  {res['seconds']:7.2f}s {res['peak_mb']:8.1f}"
+    )
+
+
+def parse_list(text, cast):
+    return [None if v in ("", "none", "all") else cast(v) for v in text.split(",")]
+
+
+def main():
+    global TOP_N
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", default=TRAIN_FILE)
+    parser.add_argument("--test", default=TEST_FILE)
+    parser.add_argument("--user-neighbors", default=USER_NEIGHBORS_FILE)
+    parser.add_argument("--item-neighbors", default=ITEM_NEIGHBORS_FILE)
+    parser.add_argument("--models", default="user,item,blend", help="comma list of user,item,blend")
+    parser.add_argument("--k", default="all", help="neighbors kept per list, e.g. 10,20,all")
+    parser.add_argument("--min-sim", default="none", help="similarity thresholds, e.g. none,0.1")
+    parser.add_argument("--alpha", default="0.5", help="blend weights of the user-based prediction")
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--rank-users", type=int, default=RANK_USERS, help="0 = every test user")
+    parser.add_argument("--cores", type=int, default=NUM_CORES)
+    parser.add_argument("--report", help="also write the results as TSV")
+    args = parser.parse_args()
+
+    TOP_N = args.top_n
+    models = args.models.split(",")
+    for model in models:
+        if model not in ("user", "item", "blend"):
+            parser.error(f"unknown model: {model}")
+    configs = build_configs(
+        models, parse_list(args.k, int), parse_list(args.min_sim, float), parse_list(args.alpha, float)
+    )
+
+    # load everything once
+    t0 = time.time()
+    train = eval_data.load_train_data(args.train)
+    data = {"train": train}
+    if any(m in ("user", "blend") for m in models):
+        data["user_nbr"] = eval_data.load_neighbors(args.user_neighbors, train, "user")
+    if any(m in ("item", "blend") for m in models):
+        data["item_nbr"] = eval_data.load_neighbors(args.item_neighbors, train, "item")
+    test = eval_data.load_test_data(args.test)
+    data["test"] = dict(zip(("users", "movies", "ratings"), test))
+    data["relevance"] = build_relevance(train, test, args.rank_users, SEED)
+    print(f"ranking users: {len(data['relevance']['users'])} (top-{TOP_N}, relevant >= {RELEVANT_RATING})")
+    print(f"data ready in {time.time() - t0:.2f}s")
+
+    handles, spec, shared = shared_arrays.publish(data)
+    del train, test, data, shared
+
+    processes = max(1, min(args.cores, len(configs)))
+    print(f"\nevaluating {len(configs)} configurations ({processes} workers)\n")
+    header = (
+        f"{'model':<6} {'K':>4} {'minsim':>7} {'alpha':>5}  {'RMSE':>8} {'MAE':>8} {'cov':>8}  "
+        f"{'P@' + str(TOP_N):>7} {'R@' + str(TOP_N):>7} {'NDCG':>7}  {'time':>8} {'peakMB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    t0 = time.time()
+    results = []
+    try:
+        # one fresh process per configuration, so its peak RSS is its own
+        with Pool(processes=processes, initializer=init_worker, initargs=(spec, TOP_N), maxtasksperchild=1) as pool:
+            for res in pool.imap_unordered(evaluate_config, configs):
+                print(format_row(res))
+                results.append(res)
+    finally:
+        shared_arrays.release(handles, unlink=True)
+
+    print(f"\nsweep time: {time.time() - t0:.2f}s")
+
+    if args.report:
+        fields = ("model", "k", "min_sim", "alpha")
+        results.sort(key=lambda r: configs.index({k: r[k] for k in fields}))
+        with open(args.report, "w") as f:
+            f.write("model\tk\tmin_sim\talpha\trmse\tmae\tcoverage\tprecision\trecall\tndcg\tseconds\tpeak_mb\n")
+            for r in results:
+                errors = r["errors"] or (math.nan, math.nan, 0.0)
+                fields = [r["model"], r["k"], r["min_sim"], r["alpha"], *errors, *r["ranking"], r["seconds"], r["peak_mb"]]
+                f.write("\t".join("" if v is None else str(v) for v in fields) + "\n")
+        print(f"report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Matrix factorization model files (written by train_mf.py) and scoring.
+
+    pred(u, i) = μ + b_u + b_i + p_u · q_i
+
+    mf_model/
+        meta.json                       {"mu", "factors", "reg", "iterations", ...}
+        user_ids.npy   movie_ids.npy    sorted raw IDs, row r belongs to ids[r]
+        user_factors.npy  item_factors.npy    float32 (n, factors)
+        user_bias.npy     item_bias.npy       float32 (n,)
+
+Arrays are memory-mapped on load. MFRecommendations serves dot-product
+top-N lists to the web app as a read-only {userId: [(movieId, pred), ...]}.
+"""
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+import cf_engine
+
+ARRAYS = ("user_ids", "movie_ids", "user_factors", "item_factors", "user_bias", "item_bias")
+
+
+def save_model(out_dir, model):
+    os.makedirs(out_dir, exist_ok=True)
+    for name in ARRAYS:
+        dtype = np.int32 if name.endswith("_ids") else np.float32
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.asarray(model[name], dtype=dtype))
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(model["meta"], f, indent=2)
+
+
+def load_model(path):
+    model = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    with open(os.path.join(path, "meta.json"), "r") as f:
+        model["meta"] = json.load(f)
+    return model
+
+
+def predict_codes(model, u, m):
+    """Predictions for encoded (user, movie) code arrays, all codes valid."""
+    p = np.asarray(model["user_factors"])[u]
+    q = np.asarray(model["item_factors"])[m]
+    return (
+        model["meta"]["mu"]
+        + np.asarray(model["user_bias"], dtype=np.float64)[u]
+        + np.asarray(model["item_bias"], dtype=np.float64)[m]
+        + np.einsum("ij,ij->i", p, q, dtype=np.float64)
+    )
+
+
+def predict(model, users, movies):
+    """Raw (user, movie) IDs -> predictions, NaN where the user or movie has no factors."""
+    u = cf_engine.encode(model["user_ids"], users)
+    m = cf_engine.encode(model["movie_ids"], movies)
+    pred = np.full(len(u), np.nan)
+    ok = (u >= 0) & (m >= 0)
+    pred[ok] = predict_codes(model, u[ok], m[ok])
+    return pred
+
+
+def top_n(model, user, n, exclude=()):
+    """[(movieId, pred), ...] best first for one raw user ID: one matrix-vector product."""
+    u = int(cf_engine.encode(model["user_ids"], [user])[0])
+    if u < 0:
+        return []
+    scores = (
+        model["meta"]["mu"]
+        + float(model["user_bias"][u])
+        + np.asarray(model["item_bias"], dtype=np.float64)
+        + np.asarray(model["item_factors"]) @ np.asarray(model["user_factors"][u])
+    )
+    if exclude:
+        seen = cf_engine.encode(model["movie_ids"], list(exclude))
+        scores[seen[seen >= 0]] = -np.inf
+
+    n = min(n, len(scores))
+    if n <= 0:
+        return []
+    idx = np.argpartition(-scores, n - 1)[:n]
+    idx = idx[np.argsort(-scores[idx], kind="stable")]
+    idx = idx[np.isfinite(scores[idx])]
+    preds = np.clip(scores[idx], 0.5, 5.0)
+    return list(zip(np.asarray(model["movie_ids"])[idx].tolist(), preds.tolist()))
+
+
+class MFRecommendations(Mapping):
+    """
+    Read-only {userId: [(movieId, pred), ...]} computed on lookup; movies in
+    rated[userId] (the user's [(movieId, rating), ...]) are skipped.
+    """
+
+    def __init__(self, model, rated=None, n=100):
+        self.model = model
+        self.rated = rated if rated is not None else {}
+        self.n = n
+
+    def __getitem__(self, user):
+        if user not in self:
+            raise KeyError(user)
+        exclude = [mid for mid, _ in self.rated.get(user, [])]
+        return top_n(self.model, user, self.n, exclude)
+
+    def __contains__(self, user):
+        try:
+            return int(cf_engine.encode(self.model["user_ids"], [int(user)])[0]) >= 0
+        except (TypeError, ValueError):
+            return False
+
+    def __iter__(self):
+        return iter(np.asarray(self.model["user_ids"]).tolist())
+
+    def __len__(self):
+        return len(self.model["user_ids"])
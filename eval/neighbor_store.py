@@ -0,0 +1,158 @@
+"""
+Compiled neighbor lists: reducer3 text output -> fixed-K binary arrays read with mmap.
+
+    python neighbor_store.py user_topk_neighbors.txt [--k 50]   # -> user_topk_neighbors.txt.nbr/
+
+    <txt>.nbr/
+        meta.json       {"k", "limit", "source": {"size", "mtime_ns"}, "version"}
+        ids.npy         int32 (n,)      sorted target ids, row i belongs to ids[i]
+        neighbors.npy   int32 (n, K)    neighbor ids in file order, -1 padded
+        sims.npy        float32 (n, K)  similarities, 0 padded
+
+cf_engine.load_neighbor_index() maps a .nbr directory (given directly, or an
+up-to-date one next to the text file) instead of parsing the text; the web
+app reads single users' rows through NeighborStore. Opening is a few mmap
+calls, whatever the file size.
+"""
+import json
+import os
+import shutil
+from collections.abc import Mapping
+
+import numpy as np
+
+STORE_SUFFIX = ".nbr"
+STORE_VERSION = 1
+ARRAYS = ("ids", "neighbors", "sims")
+
+
+def store_path(text_path):
+    return text_path + STORE_SUFFIX
+
+
+def _source_fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def compile_neighbors(nbr, out_dir, source=None, limit=None):
+    """
+    Write a parsed neighbor index (cf_engine.parse_neighbor_file of the text
+    file, cut to limit neighbors if given) as a store. Written to a temp dir
+    and renamed, like ratings_io's cache.
+    """
+    meta = {
+        "k": int(nbr["neighbors"].shape[1]),
+        "limit": limit,
+        "source": _source_fingerprint(source) if source else None,
+        "version": STORE_VERSION,
+    }
+    tmp_dir = f"{out_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, "ids.npy"), np.asarray(nbr["ids"], dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "neighbors.npy"), np.asarray(nbr["neighbors"], dtype=np.int32))
+    np.save(os.path.join(tmp_dir, "sims.npy"), np.asarray(nbr["sims"], dtype=np.float32))
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.rename(tmp_dir, out_dir)
+    return meta
+
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+def find_store(text_path, k=None):
+    """
+    The compiled store of a text file if it matches the file and holds at
+    least k neighbors per id (all of them when k is None), else None.
+    """
+    path = store_path(text_path)
+    try:
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != STORE_VERSION:
+        return None
+    if os.path.exists(text_path) and meta.get("source") != _source_fingerprint(text_path):
+        return None  # text rewritten since it was compiled
+    if meta.get("limit") is not None and (k is None or k > meta["limit"]):
+        return None
+    return path
+
+
+def open_store(path, k=None):
+    """{ids, neighbors, sims} as read-only memory maps (first k columns if k)."""
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    if k is not None:
+        arrays["neighbors"] = arrays["neighbors"][:, :k]
+        arrays["sims"] = arrays["sims"][:, :k]
+    return arrays
+
+
+class NeighborStore(Mapping):
+    """Read-only {id: [(neighborId, sim), ...]} view on a store, one row decoded per lookup."""
+
+    def __init__(self, path, k=None):
+        self.arrays = open_store(path, k)
+        self.ids = self.arrays["ids"]
+
+    def _row(self, key):
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            return -1
+        pos = int(np.searchsorted(self.ids, key))
+        if pos < len(self.ids) and self.ids[pos] == key:
+            return pos
+        return -1
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row < 0:
+            raise KeyError(key)
+        nbrs = self.arrays["neighbors"][row]
+        valid = nbrs >= 0
+        return list(zip(nbrs[valid].tolist(), self.arrays["sims"][row][valid].tolist()))
+
+    def __contains__(self, key):
+        return self._row(key) >= 0
+
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def __len__(self):
+        return len(self.ids)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import cf_engine
+
+    parser = argparse.ArgumentParser(description="compile reducer3 neighbor text files into .nbr stores")
+    parser.add_argument("inputs", nargs="+", help="e.g. user_topk_neighbors.txt item_topk_neighbors.txt")
+    parser.add_argument("--k", type=int, default=None, help="keep only the first k neighbors")
+    parser.add_argument("--out", help="output dir (one input only); default <input>.nbr")
+    args = parser.parse_args()
+
+    if args.out and len(args.inputs) > 1:
+        parser.error("--out needs exactly one input")
+
+    for path in args.inputs:
+        if not os.path.exists(path):
+            print(f"neighbor file not found: {path}")
+            exit(1)
+        t0 = time.time()
+        nbr = cf_engine.parse_neighbor_file(path, args.k)
+        out = args.out or store_path(path)
+        meta = compile_neighbors(nbr, out, source=path, limit=args.k)
+        size = sum(os.path.getsize(os.path.join(out, f"{n}.npy")) for n in ARRAYS)
+        print(
+            f"{path} -> {out}: {len(nbr['ids'])} ids, K={meta['k']}, "
+            f"{os.path.getsize(path) / 2**20:.1f}MB -> {size / 2**20:.1f}MB ({time.time() - t0:.2f}s)"
+        )
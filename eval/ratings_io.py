@@ -0,0 +1,124 @@
+"""
+Fast columnar loading of ratings CSVs (userId, movieId, rating[, timestamp]).
+
+The first load parses the CSV with the pandas C engine straight into
+int32 / int32 / float32 columns and saves them next to the CSV:
+
+    ratings_train.csv.npycache/
+        meta.json       {"size": ..., "mtime_ns": ...} of the CSV it was built from
+        users.npy  movies.npy  ratings.npy
+
+Later loads check size + mtime and memory-map the .npy files instead of
+parsing again, so startup is close to instant and the pages are shared by
+every process reading the same cache.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CACHE_SUFFIX = ".npycache"
+CACHE_VERSION = 1
+COLUMNS = ("users", "movies", "ratings")
+
+
+def has_header(path):
+    """MovieLens files start with 'userId,...'; Hadoop-ready ones start with a digit."""
+    with open(path, "r") as f:
+        first = f.readline()
+    return bool(first) and not first[0].isdigit()
+
+
+def parse_ratings_csv(path, chunksize=None):
+    """
+    Parse with explicit dtypes (no per-row Python work).
+    With chunksize, returns an iterator of DataFrames instead of one.
+    """
+    return pd.read_csv(
+        path,
+        header=None,
+        skiprows=1 if has_header(path) else 0,
+        usecols=[0, 1, 2],
+        names=["userId", "movieId", "rating"],
+        dtype={"userId": np.int32, "movieId": np.int32, "rating": np.float32},
+        engine="c",
+        chunksize=chunksize,
+    )
+
+
+def iter_ratings(path, batch_size):
+    """
+    (users, movies, ratings) column batches of at most batch_size rows, parsed
+    chunk by chunk; the whole file is never in memory (no cache involved).
+    """
+    for df in parse_ratings_csv(path, chunksize=batch_size):
+        yield df["userId"].to_numpy(), df["movieId"].to_numpy(), df["rating"].to_numpy()
+
+
+def _cache_dir(path):
+    return path + CACHE_SUFFIX
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "version": CACHE_VERSION}
+
+
+def _read_cache(path):
+    cache_dir = _cache_dir(path)
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta != _fingerprint(path):
+        return None  # CSV changed since the cache was written
+    try:
+        return tuple(
+            np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+            for name in COLUMNS
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path, columns):
+    """Write into a temp dir and rename it, so readers never see half a cache."""
+    cache_dir = _cache_dir(path)
+    tmp_dir = f"{cache_dir}.tmp{os.getpid()}"
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, arr in zip(COLUMNS, columns):
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), arr)
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(_fingerprint(path), f)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.rename(tmp_dir, cache_dir)
+    except OSError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"[WARN] could not write ratings cache for {path}: {e}")
+
+
+def load_ratings(path, use_cache=True):
+    """
+    (users int32, movies int32, ratings float32) for a ratings CSV.
+    Arrays come back memory-mapped (read-only) when served from the cache.
+    """
+    if use_cache:
+        cached = _read_cache(path)
+        if cached is not None:
+            return cached
+
+    df = parse_ratings_csv(path)
+    columns = (
+        df["userId"].to_numpy(),
+        df["movieId"].to_numpy(),
+        df["rating"].to_numpy(),
+    )
+
+    if use_cache:
+        _write_cache(path, columns)
+    return columns
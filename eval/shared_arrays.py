@@ -0,0 +1,114 @@
+"""
+Put NumPy arrays into multiprocessing.shared_memory for Pool workers.
+
+The parent publishes (nested) dicts of arrays once; workers receive only a
+small spec {key: (segment name, shape, dtype)} and map the same physical
+pages, so worker RSS does not grow with the data and pool startup does not
+pickle or copy-on-write anything.
+
+    handles, spec, shared = publish({"train": train, "neighbors": nbr})   # parent
+    with Pool(initializer=init, initargs=(spec,)) as pool: ...
+    del shared; release(handles, unlink=True)                            # parent, when done
+
+    arrays, handles = attach(spec)                                       # worker initializer
+"""
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+def publish(arrays, handles=None):
+    """
+    Copy every array into its own shared memory segment.
+    Returns (handles, spec, views): views are the parent's arrays backed by
+    the segments, drop them before release().
+    """
+    if handles is None:
+        handles = []
+    spec = {}
+    shared = {}
+    for key, arr in arrays.items():
+        if isinstance(arr, dict):
+            _, spec[key], shared[key] = publish(arr, handles)
+            continue
+        arr = np.ascontiguousarray(arr)
+        shm = SharedMemory(create=True, size=max(arr.nbytes, 1))
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        view[...] = arr
+        handles.append(shm)
+        spec[key] = (shm.name, arr.shape, arr.dtype.str)
+        shared[key] = view
+    return handles, spec, shared
+
+
+def _open(name):
+    """Attach without letting this process' resource tracker own the segment."""
+    try:
+        return SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # older Pythons always register on attach; workers share the parent's
+        # tracker, so a second registration would be "leaked" or double removed
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach(spec, handles=None):
+    """Read-only views on published arrays, plus the handles keeping them mapped."""
+    if handles is None:
+        handles = []
+    arrays = {}
+    for key, entry in spec.items():
+        if isinstance(entry, dict):
+            arrays[key], _ = attach(entry, handles)
+            continue
+        name, shape, dtype = entry
+        shm = _open(name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        handles.append(shm)
+        arrays[key] = view
+    return arrays, handles
+
+
+def release(handles, unlink=False):
+    """Close the mappings; the publisher also unlinks the segments."""
+    for shm in handles:
+        shm.close()
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def imap_bounded(pool, func, iterable, max_in_flight):
+    """
+    pool.imap_unordered, but at most max_in_flight items are taken from
+    iterable ahead of the results (the Pool's task feeder would otherwise
+    drain a lazy iterable into its queue as fast as it can).
+    """
+    slots = threading.Semaphore(max_in_flight)
+    stopped = threading.Event()
+
+    def feed():
+        for item in iterable:
+            slots.acquire()
+            if stopped.is_set():
+                return
+            yield item
+
+    try:
+        for result in pool.imap_unordered(func, feed()):
+            slots.release()
+            yield result
+    finally:
+        # unblock the feeder thread if the caller stops early
+        stopped.set()
+        for _ in range(max_in_flight):
+            slots.release()
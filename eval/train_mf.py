@@ -0,0 +1,188 @@
+"""
+Matrix factorization (ALS with biases) on the train ratings, no cluster needed.
+
+    pred(u, i) = μ + b_u + b_i + p_u · q_i
+
+Alternating least squares, weighted-λ regularization (ALS-WR): with the item
+side fixed, every user's [p_u, b_u] is the solution of one small
+(FACTORS+1)² linear system, and the other way round. Users (items) are cut
+into blocks of ~BLOCK_NNZ ratings; a block's systems are built with array
+ops (outer products summed per user with np.add.reduceat; users with more
+than GRAM_ROW_NNZ ratings get y_iᵀ y_i from one matmul instead) and solved in
+one batched np.linalg.solve. Blocks run on a thread pool: NumPy releases the GIL
+in all of these.
+
+Writes the factors to OUTPUT_DIR (mf_model.py) and reports RMSE / MAE /
+coverage on the test set in the same format as the neighborhood scripts.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import cf_engine
+import eval_data
+import mf_model
+
+# config
+TRAIN_FILE = "ratings_train.csv"
+TEST_FILE = "ratings_test.csv"
+OUTPUT_DIR = "mf_model"
+FACTORS = 20
+REG = 0.05            # λ, scaled by each user's / item's number of ratings
+ITERATIONS = 10
+NUM_THREADS = os.cpu_count()
+BLOCK_NNZ = 16384     # ratings per solve block (memory ~ BLOCK_NNZ * (FACTORS+1)² * 8 bytes per thread)
+GRAM_ROW_NNZ = 256    # rows with more ratings: Gram matrix by matmul, no per-rating outer products
+EVAL_BATCH = 1000000  # rows per prediction batch
+SEED = 42
+
+
+# --- ALS ---
+
+def item_major(train):
+    """The train ratings as CSR by movie: (item_ptr, user codes, order into train rows)."""
+    n_movies = np.int64(len(train["movie_ids"]))
+    movie_codes = train["keys"] % n_movies
+    order = np.argsort(movie_codes, kind="stable")
+    counts = np.bincount(movie_codes, minlength=n_movies)
+    ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return ptr, (train["keys"] // n_movies)[order], order
+
+
+def make_blocks(ptr, block_nnz):
+    """Row ranges [lo, hi) of about block_nnz ratings each."""
+    cuts = np.searchsorted(ptr, np.arange(0, ptr[-1], block_nnz), side="right") - 1
+    cuts = np.unique(np.concatenate([cuts, [len(ptr) - 1]]))
+    return list(zip(cuts[:-1].tolist(), cuts[1:].tolist()))
+
+
+def solve_block(ptr, lo, hi, other, resid, fixed, reg, out):
+    """[x, bias] of rows lo..hi-1: (Σ y yᵀ + λ n I) x = Σ resid · y over each row's ratings."""
+    s, e = ptr[lo], ptr[hi]
+    counts = np.diff(ptr[lo : hi + 1])
+    rows = np.nonzero(counts)[0]
+    if len(rows) == 0:
+        return
+    starts = ptr[lo:hi][rows] - s
+
+    n = counts[rows]
+    y = fixed[other[s:e]]                                             # (nnz, d)
+    b = np.add.reduceat(y * resid[s:e, None], starts, axis=0)           # (rows, d)
+
+    d = fixed.shape[1]
+    a = np.empty((len(rows), d, d))
+    long_rows = n > GRAM_ROW_NNZ
+    short = np.flatnonzero(~long_rows)
+    if len(short):
+        # outer products summed per row: an (nnz, d, d) temporary of the short rows only
+        ys = y[np.repeat(~long_rows, n)]
+        short_starts = np.concatenate([[0], np.cumsum(n[short])[:-1]])
+        a[short] = np.add.reduceat(ys[:, :, None] * ys[:, None, :], short_starts, axis=0)
+    for r in np.flatnonzero(long_rows):
+        y_r = y[starts[r] : starts[r] + n[r]]
+        a[r] = y_r.T @ y_r
+    a += (reg * n)[:, None, None] * np.eye(d)
+    out[lo + rows] = np.linalg.solve(a, b[:, :, None])[:, :, 0]
+
+
+def als_step(ptr, other, resid, factors, reg, pool):
+    """One half step: new (factors, bias) of every row, the other side fixed."""
+    fixed = np.hstack([factors, np.ones((len(factors), 1))])  # constant column -> bias
+    out = np.zeros((len(ptr) - 1, fixed.shape[1]))
+    jobs = [
+        pool.submit(solve_block, ptr, lo, hi, other, resid, fixed, reg, out)
+        for lo, hi in make_blocks(ptr, BLOCK_NNZ)
+    ]
+    for job in jobs:
+        job.result()
+    return out[:, :-1], out[:, -1]
+
+
+def batch_predict(model, u, m):
+    out = np.empty(len(u))
+    for i in range(0, len(u), EVAL_BATCH):
+        out[i : i + EVAL_BATCH] = mf_model.predict_codes(model, u[i : i + EVAL_BATCH], m[i : i + EVAL_BATCH])
+    return out
+
+
+def train_als(train, test=None):
+    n_users = len(train["user_ids"])
+    n_movies = np.int64(len(train["movie_ids"]))
+    ratings = train["ratings"].astype(np.float64)
+    u_codes = train["keys"] // n_movies
+    m_codes = train["keys"] % n_movies
+    user_ptr = train["user_ptr"]
+    item_ptr, item_users, item_order = item_major(train)
+
+    mu = float(ratings.mean())
+    rng = np.random.default_rng(SEED)
+    P = np.zeros((n_users, FACTORS))
+    Q = rng.normal(0.0, 0.1, (int(n_movies), FACTORS))
+    bu = np.zeros(n_users)
+    bi = np.zeros(int(n_movies))
+
+    model = {"user_ids": train["user_ids"], "movie_ids": train["movie_ids"]}
+    model["meta"] = {"mu": mu, "factors": FACTORS, "reg": REG, "iterations": ITERATIONS, "seed": SEED}
+
+    with ThreadPoolExecutor(max_workers=NUM_THREADS) as pool:
+        for it in range(1, ITERATIONS + 1):
+            t0 = time.time()
+            # users: residual without the user's own bias
+            P, bu = als_step(user_ptr, m_codes, ratings - mu - bi[m_codes], Q, REG, pool)
+            # items: same on the movie-major order
+            Q, bi = als_step(item_ptr, item_users, (ratings - mu - bu[u_codes])[item_order], P, REG, pool)
+
+            model.update(user_factors=P, item_factors=Q, user_bias=bu, item_bias=bi)
+            err = batch_predict(model, u_codes, m_codes) - ratings
+            line = f"iter {it:2d}: train RMSE {np.sqrt(np.mean(err * err)):.5f}"
+            if test is not None:
+                pred = mf_model.predict(model, *test[:2])
+                sse, sae, cnt = cf_engine.batch_errors(pred, test[2])
+                if cnt:
+                    line += f"  test RMSE {np.sqrt(sse / cnt):.5f}"
+            print(f"{line}  ({time.time() - t0:.2f}s)")
+
+    return model
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        ITERATIONS = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        FACTORS = int(sys.argv[2])
+
+    train = eval_data.load_train_data(TRAIN_FILE)
+    test_u, test_m, test_r = eval_data.load_test_data(TEST_FILE)
+    n_test = len(test_u)
+
+    print(f"start ALS: {FACTORS} factors, λ={REG}, {ITERATIONS} iterations ({NUM_THREADS} threads)")
+    t0 = time.time()
+    model = train_als(train, (test_u, test_m, test_r))
+    t1 = time.time()
+
+    mf_model.save_model(OUTPUT_DIR, model)
+    print(f"factors written to {OUTPUT_DIR}/")
+
+    # same metrics as evaluate_user_based.py / evaluate_item_based.py
+    total_sse, total_sae, total_cnt = 0.0, 0.0, 0
+    for i in range(0, n_test, EVAL_BATCH):
+        pred = mf_model.predict(model, test_u[i : i + EVAL_BATCH], test_m[i : i + EVAL_BATCH])
+        sse, sae, cnt = cf_engine.batch_errors(pred, test_r[i : i + EVAL_BATCH])
+        total_sse += sse
+        total_sae += sae
+        total_cnt += cnt
+
+    res = cf_engine.summarize(total_sse, total_sae, total_cnt, n_test)
+    if res is not None:
+        rmse, mae, cov = res
+
+        print("\n=== matrix factorization results ===")
+        print(f"RMSE      : {rmse:.5f}")
+        print(f"MAE       : {mae:.5f}")
+        print(f"coverage  : {cov:.2f}% ({total_cnt}/{n_test})")
+        print(f"time      : {t1 - t0:.2f}s")
+    else:
+        print("no predictable samples; check test IDs vs train data")
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import cf_engine
+import shared_arrays
+
+# config
+TRAIN_FILE = "ratings_train.csv"
+NEIGHBORS_FILE = "user_topk_neighbors.txt"
+OUTPUT_DIR = "user_based_recommendations"   # part-xxxxx.npz (columnar) + part-xxxxx.tsv (LOAD DATA)
+TOP_N = 100                 # recommendations kept per user
+NUM_CORES = os.cpu_count()
+BATCH_USERS = 500           # users scored together in one vectorized task
+CHUNK_ROWS = 2000000        # output rows per part file
+LOAD_MYSQL = False          # also LOAD DATA every chunk into user_item_predictions
+MYSQL_TABLE = "user_item_predictions"
+
+# shared in workers (views on the parent's shared memory, see shared_arrays.py)
+global_train = None
+global_neighbors = None
+global_handles = None
+
+
+def init_worker(spec):
+    global global_train, global_neighbors, global_handles
+    arrays, global_handles = shared_arrays.attach(spec)
+    global_train = arrays["train"]
+    global_neighbors = arrays["neighbors"]
+
+
+def process_users(bounds):
+    # score all candidates of a range of user codes, keep top-N per user
+    start, end = bounds
+    train = global_train
+    users, movies, preds = cf_engine.score_user_candidates(
+        train, global_neighbors, np.arange(start, end)
+    )
+    users, movies, preds = cf_engine.top_n_per_user(users, movies, preds, TOP_N)
+    return (
+        train["user_ids"][users].astype(np.int32),    # back to raw MovieLens ids
+        train["movie_ids"][movies].astype(np.int32),
+        preds.astype(np.float32),
+    )
+
+
+def mysql_connection():
+    """Connection from Web/data_loader.py's DB_CONFIG, with LOAD DATA LOCAL enabled."""
+    web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Web")
+    sys.path.insert(0, web_dir)
+    import pymysql
+    from data_loader import DB_CONFIG
+
+    return pymysql.connect(**DB_CONFIG, local_infile=True, autocommit=True)
+
+
+def write_chunk(part, users, movies, preds, conn=None):
+    """One part file in both formats; optionally bulk-load the TSV."""
+    base = os.path.join(OUTPUT_DIR, f"part-{part:05d}")
+
+    np.savez_compressed(base + ".npz", userId=users, movieId=movies, prediction=preds)
+
+    tsv_path = base + ".tsv"
+    with open(tsv_path, "w") as f:
+        for u, m, p in zip(users.tolist(), movies.tolist(), preds.tolist()):
+            f.write(f"{u}\t{m}\t{p:.4f}\n")
+
+    if conn is not None:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE {MYSQL_TABLE} "
+                "FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' "
+                "(userId, movieId, prediction)",
+                (os.path.abspath(tsv_path),),
+            )
+
+
+if __name__ == "__main__":
+    print("loading train...")
+    t0 = time.time()
+    train = cf_engine.load_train_index(TRAIN_FILE)
+    print(f"train loaded in {time.time() - t0:.2f}s")
+
+    print("loading neighbors...")
+    neighbors = cf_engine.encode_neighbors(train, cf_engine.load_neighbor_index(NEIGHBORS_FILE), "user")
+    print(f"neighbors loaded: {len(neighbors['ids'])} users")
+
+    n_users = len(train["user_ids"])
+    ranges = [(i, min(i + BATCH_USERS, n_users)) for i in range(0, n_users, BATCH_USERS)]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    conn = mysql_connection() if LOAD_MYSQL else None
+
+    print(f"start top-{TOP_N} prediction for {n_users} users ({NUM_CORES} cores)")
+    t0 = time.time()
+
+    handles, spec, shared = shared_arrays.publish({"train": train, "neighbors": neighbors})
+    del train, neighbors, shared
+
+    buffer = []
+    buffered = 0
+    part = 0
+    total_rows = 0
+    done_users = 0
+
+    try:
+        with Pool(processes=NUM_CORES, initializer=init_worker, initargs=(spec,)) as pool:
+            for (start, end), result in zip(ranges, pool.imap(process_users, ranges)):
+                buffer.append(result)
+                buffered += len(result[0])
+                done_users += end - start
+
+                if buffered >= CHUNK_ROWS:
+                    cols = [np.concatenate(c) for c in zip(*buffer)]
+                    write_chunk(part, *cols, conn=conn)
+                    part += 1
+                    total_rows += buffered
+                    buffer, buffered = [], 0
+                    rate = done_users / (time.time() - t0)
+                    print(f"  {done_users}/{n_users} users, {total_rows} rows ({rate:.0f} users/s)")
+
+            if buffer:
+                cols = [np.concatenate(c) for c in zip(*buffer)]
+                write_chunk(part, *cols, conn=conn)
+                part += 1
+                total_rows += buffered
+    finally:
+        shared_arrays.release(handles, unlink=True)
+        if conn is not None:
+            conn.close()
+
+    print(f"\nwrote {total_rows} predictions in {part} parts to {OUTPUT_DIR}/")
+    print(f"time      : {time.time() - t0:.2f}s")
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Pipeline driver: split -> MR1..MR3 -> eval / prediction -> MySQL import as one DAG,
+with every stage's output cached under a content hash.
+
+A stage is one run of an existing script (data-preprocessing/, Hadoop/local_runner.py,
+eval/, Web/bulk_import.py). Its key is the hash of
+
+    its code     every source file the script runs (mappers, reducers, cf_engine, ...)
+    its inputs   content hash of external files, the key of the stage that made the rest
+    its config   the full command line
+
+The stage runs in CACHE_DIR/<stage>/<key>/ with its inputs linked in under the names the
+script expects; only the declared outputs (and stage.log) are kept. A stage whose key
+directory exists is skipped, so changing e.g. the item-based reducer re-runs only the
+item branch; the MySQL import stages (final) are never skipped, as their result lives in
+the database, not the cache. Stages whose inputs are ready run in parallel (--jobs), so
+the user-based and item-based branches overlap.
+
+    python pipeline.py                                    # everything up to the MySQL import
+    python pipeline.py user_eval item_eval                # only these (and what they need)
+    python pipeline.py --all                              # including the MySQL import
+    python pipeline.py --plan                             # keys, cached or not; runs nothing
+    python pipeline.py --force item_mr --set maps=16      # re-run a stage / override config
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = "pipeline_cache"
+HASH_BLOCK = 1024 * 1024
+CODE_SUFFIXES = (".py", ".sh")
+
+# config; part of each stage's key through its command line (override with --set key=value)
+CONFIG = {
+    "ratings": "ratings.csv",        # MovieLens ratings.csv (external input)
+    "strategy": "random",            # split_data.py --strategy
+    "ratio": 0.8,
+    "seed": 42,
+    "maps": max(1, (os.cpu_count() or 2) // 2),      # per MR branch: two branches run at once
+    "reduces": max(1, (os.cpu_count() or 2) // 2),
+    "top_n": 100,                    # recommendations imported per user
+}
+
+# every local module a stage's script imports belongs in its code list, or editing it
+# would leave the stage (and everything after it) served from the cache
+EVAL_COMMON = ["eval/cf_engine.py", "eval/ratings_io.py", "eval/shared_arrays.py", "eval/neighbor_store.py"]
+MR_COMMON = ["Hadoop/local_runner.py", "Hadoop/step2", "Hadoop/step3"]
+IMPORT_CODE = [
+    "Web/bulk_import.py", "Web/data_loader.py", "Web/id_maps.py", "Web/genre_index.py", "eval/mf_model.py",
+] + EVAL_COMMON
+
+
+class Stage:
+    """
+    One script run. inputs: {local name: "stage_name/output" or ("external", path)};
+    outputs: files / directories the script leaves in its working directory.
+    """
+
+    def __init__(self, name, cmd, code, inputs=None, outputs=(), final=False):
+        self.name = name
+        self.cmd = cmd
+        self.code = code
+        self.inputs = inputs or {}
+        self.outputs = list(outputs)
+        self.final = final  # side effect outside the cache (MySQL): only with --all / by name, never cached
+
+    @property
+    def deps(self):
+        return sorted({src.split("/", 1)[0] for src in self.inputs.values() if isinstance(src, str)})
+
+
+def make_stages(cfg):
+    mr_args = ["--maps", str(cfg["maps"]), "--reduces", str(cfg["reduces"])]
+    train_test = {"ratings_train.csv": "split/ratings_train.csv", "ratings_test.csv": "split/ratings_test.csv"}
+    stages = [
+        Stage(
+            "split",
+            ["data-preprocessing/split_data.py", "--input", "ratings.csv", "--strategy", cfg["strategy"],
+             "--ratio", str(cfg["ratio"]), "--seed", str(cfg["seed"])],
+            ["data-preprocessing/split_data.py", "eval/ratings_io.py"],
+            {"ratings.csv": ("external", cfg["ratings"])},
+            ["ratings_train.csv", "ratings_test.csv"],
+        ),
+    ]
+    for kind in ("user", "item"):
+        stages += [
+            Stage(
+                f"{kind}_mr",
+                ["Hadoop/local_runner.py", "pipeline", kind, "--input", "ratings_train.csv", "--workdir", "mr",
+                 "--getmerge", f"{kind}_topk_neighbors.txt"] + mr_args,
+                [f"Hadoop/step1_{kind}based"] + MR_COMMON,
+                {"ratings_train.csv": "split/ratings_train.csv"},
+                [f"{kind}_topk_neighbors.txt"],
+            ),
+            Stage(
+                f"{kind}_eval",
+                [f"eval/evaluate_{kind}_based.py"],
+                [f"eval/evaluate_{kind}_based.py", "eval/eval_data.py"] + EVAL_COMMON,
+                dict(train_test, **{f"{kind}_topk_neighbors.txt": f"{kind}_mr/{kind}_topk_neighbors.txt"}),
+            ),
+        ]
+    stages += [
+        Stage(
+            "user_predict",
+            ["eval/user_based_predict.py"],
+            ["eval/user_based_predict.py"] + EVAL_COMMON,
+            {"ratings_train.csv": "split/ratings_train.csv",
+             "user_topk_neighbors.txt": "user_mr/user_topk_neighbors.txt"},
+            ["user_based_recommendations"],
+        ),
+        Stage(
+            "import_neighbors",
+            ["Web/bulk_import.py", "neighbor-ranks", "user_topk_neighbors.txt"],
+            IMPORT_CODE,
+            {"user_topk_neighbors.txt": "user_mr/user_topk_neighbors.txt"},
+            final=True,
+        ),
+        Stage(
+            "import_predictions",
+            ["Web/bulk_import.py", "prediction-ranks", "user_based_recommendations", "--top-n", str(cfg["top_n"])],
+            IMPORT_CODE,
+            {"user_based_recommendations": "user_predict/user_based_recommendations"},
+            final=True,
+        ),
+    ]
+    return {s.name: s for s in stages}
+
+
+# --- hashing ---
+
+class FileHashes:
+    """sha256 of file contents, remembered by (size, mtime) in CACHE_DIR/hashes.json."""
+
+    def __init__(self, path):
+        self.path = path
+        self.known = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.known = json.load(f)
+
+    def file(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self.known.get(path)
+        if entry is not None and entry[:2] == stamp:
+            return entry[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                h.update(block)
+        self.known[path] = stamp + [h.hexdigest()]
+        return h.hexdigest()
+
+    def tree(self, path):
+        """A file, or every file of a directory (relative names included)."""
+        if not os.path.isdir(path):
+            return self.file(path)
+        h = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith((".", "_")))
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).encode("utf-8") + b"\0" + self.file(full).encode("ascii"))
+        return h.hexdigest()
+
+    def code(self, paths):
+        h = hashlib.sha256()
+        for rel in paths:
+            full = os.path.join(REPO_DIR, rel)
+            files = [full] if not os.path.isdir(full) else sorted(
+                os.path.join(full, f) for f in os.listdir(full) if f.endswith(CODE_SUFFIXES)
+            )
+            for path in files:
+                h.update(os.path.relpath(path, REPO_DIR).encode("utf-8") + b"\0" + self.file(path).encode("ascii"))
+        return h.hexdigest()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.known, f)
+        os.replace(tmp, self.path)
+
+
+def stage_keys(stages, hashes):
+    """{stage name: key} in dependency order; a key covers the keys of the stages it reads."""
+    keys = {}
+
+    def key_of(name):
+        if name in keys:
+            return keys[name]
+        stage = stages[name]
+        parts = {
+            "stage": name,
+            "cmd": stage.cmd,
+            "code": hashes.code(stage.code),
+            "inputs": {},
+        }
+        for local, src in sorted(stage.inputs.items()):
+            if isinstance(src, str):
+                dep, path = src.split("/", 1)
+                parts["inputs"][local] = f"{dep}:{key_of(dep)}:{path}"
+            else:
+                if not os.path.exists(src[1]):
+                    raise FileNotFoundError(f"{name}: input {src[1]} not found")
+                parts["inputs"][local] = hashes.tree(src[1])
+        keys[name] = hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        return keys[name]
+
+    for name in stages:
+        key_of(name)
+    return keys
+
+
+# --- running ---
+
+def stage_dir(cache_dir, name, key):
+    return os.path.join(cache_dir, name, key)
+
+
+def is_cached(cache_dir, name, key):
+    return os.path.exists(os.path.join(stage_dir(cache_dir, name, key), "_DONE"))
+
+
+def up_to_date(stage, cache_dir, key):
+    # a final stage's output is the database, which may have been reloaded or wiped since
+    # its last run: always run it when selected
+    return not stage.final and is_cached(cache_dir, stage.name, key)
+
+
+def run_stage(stage, keys, cache_dir):
+    """Run one stage in a scratch dir, keep its outputs, publish it under its key."""
+    final_dir = stage_dir(cache_dir, stage.name, keys[stage.name])
+    work = f"{final_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(work, ignore_errors=True)
+    os.makedirs(work)
+
+    for local, src in stage.inputs.items():
+        if isinstance(src, str):
+            dep, path = src.split("/", 1)
+            target = os.path.join(stage_dir(cache_dir, dep, keys[dep]), path)
+        else:
+            target = src[1]
+        os.symlink(os.path.abspath(target), os.path.join(work, local))
+
+    script = os.path.join(REPO_DIR, stage.cmd[0])
+    t0 = time.time()
+    with open(os.path.join(work, "stage.log"), "wb") as log:
+        code = subprocess.call([sys.executable, script] + stage.cmd[1:], cwd=work, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.time() - t0
+    if code != 0:
+        raise RuntimeError(f"exit code {code}, see {os.path.join(work, 'stage.log')}")
+    missing = [o for o in stage.outputs if not os.path.exists(os.path.join(work, o))]
+    if missing:
+        raise RuntimeError(f"outputs not written: {', '.join(missing)}")
+
+    # keep only the declared outputs: inputs are links, intermediates (MR step dirs) go
+    keep = set(stage.outputs) | {"stage.log"}
+    for entry in os.listdir(work):
+        path = os.path.join(work, entry)
+        if entry in keep and not os.path.islink(path):
+            continue
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+    if not stage.final:
+        with open(os.path.join(work, "_DONE"), "w") as f:
+            json.dump({"stage": stage.name, "cmd": stage.cmd, "seconds": round(elapsed, 2), "finished": time.time()}, f)
+    shutil.rmtree(final_dir, ignore_errors=True)  # a --force re-run replaces the old copy
+    os.rename(work, final_dir)
+    return elapsed
+
+
+def link_latest(cache_dir, name, key):
+    # CACHE_DIR/<stage>/latest -> the key dir of the last run / hit, for humans and scripts
+    link = os.path.join(cache_dir, name, "latest")
+    tmp = link + ".tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    os.symlink(key, tmp)
+    os.replace(tmp, link)
+
+
+def select(stages, targets, include_final):
+    """Targets plus everything they depend on."""
+    if not targets:
+        targets = [n for n, s in stages.items() if include_final or not s.final]
+    wanted = set()
+
+    def add(name):
+        if name not in stages:
+            raise KeyError(f"unknown stage {name!r} (have: {', '.join(stages)})")
+        if name not in wanted:
+            wanted.add(name)
+            for dep in stages[name].deps:
+                add(dep)
+
+    for name in targets:
+        add(name)
+    return [n for n in stages if n in wanted]  # definition order is a topological order
+
+
+def run_pipeline(stages, names, keys, cache_dir, jobs, force=()):
+    pending = [n for n in names if n in force or not up_to_date(stages[n], cache_dir, keys[n])]
+    for n in names:
+        if n not in pending:
+            print(f"[{n}] cached ({keys[n]})")
+            link_latest(cache_dir, n, keys[n])
+    done = set(names) - set(pending)
+    failed = []
+
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while pending or running:
+            if not failed:
+                ready = [n for n in pending if all(d in done for d in stages[n].deps)]
+                for n in ready[: jobs - len(running)]:
+                    print(f"[{n}] start ({keys[n]})")
+                    running[pool.submit(run_stage, stages[n], keys, cache_dir)] = n
+                    pending.remove(n)
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                n = running.pop(future)
+                try:
+                    elapsed = future.result()
+                except Exception as e:  # noqa: BLE001 - report and let the other branch finish
+                    print(f"[{n}] FAILED: {e}")
+                    failed.append(n)
+                    continue
+                print(f"[{n}] done in {elapsed:.1f}s")
+                link_latest(cache_dir, n, keys[n])
+                done.add(n)
+
+    print(f"pipeline {'failed' if failed else 'finished'} in {time.time() - t0:.1f}s")
+    return not failed
+
+
+def parse_set(items):
+    cfg = dict(CONFIG)
+    for item in items:
+        key, _, value = item.partition("=")
+        if key not in cfg:
+            raise SystemExit(f"--set {item}: unknown config key (have: {', '.join(cfg)})")
+        cfg[key] = type(cfg[key])(value)
+    return cfg
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="stages to bring up to date (default: all but the import)")
+    parser.add_argument("--all", action="store_true", help="include the MySQL import stages")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--jobs", type=int, default=2, help="stages run at the same time")
+    parser.add_argument("--force", action="append", default=[], help="re-run this stage even if cached")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="override CONFIG")
+    parser.add_argument("--plan", action="store_true", help="print stages, keys and cache state only")
+    args = parser.parse_args()
+
+    cfg = parse_set(args.set)
+    stages = make_stages(cfg)
+    try:
+        names = select(stages, args.targets, args.all)
+    except KeyError as e:
+        parser.error(e.args[0])
+    for name in args.force:
+        if name not in names:
+            parser.error(f"--force {name}: not a selected stage (selected: {', '.join(names)})")
+
+    os.makedirs(args.cache_dir, exist_ok=True)
+    hashes = FileHashes(os.path.join(args.cache_dir, "hashes.json"))
+    try:
+        keys = stage_keys({n: stages[n] for n in names}, hashes)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    hashes.save()
+
+    if args.plan:
+        for n in names:
+            state = "forced" if n in args.force else "cached" if up_to_date(stages[n], args.cache_dir, keys[n]) else "run"
+            deps = ", ".join(stages[n].deps) or "-"
+            print(f"{n:<20} {keys[n]}  {state:<6}  after: {deps}")
+        return
+
+    ok = run_pipeline(stages, names, keys, args.cache_dir, max(1, args.jobs), set(args.force))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()